@@ -198,6 +198,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'carts.context_processors.cart',  # Custom cart context processor
                 'core.context_processors.currency_processor',  # Add this line
+                'core.context_processors.page_cache_processor',
             ],
         },
     },
@@ -351,6 +352,39 @@ SESSION_COOKIE_AGE = 86400  # 1 day in seconds
 # INSTAGRAM_BUSINESS_ACCOUNT_ID = 'your-instagram-account-id'
 INSTAGRAM_ACCESS_TOKEN = os.getenv('INSTAGRAM_ACCESS_TOKEN', '')
 INSTAGRAM_BUSINESS_ACCOUNT_ID = os.getenv('INSTAGRAM_BUSINESS_ACCOUNT_ID', '')
+# Graph API endpoint of the feed (point it at a local fake to test), and how long the cached feed
+# is fresh and then served stale while it is refreshed in the background (see core.instagram_service)
+INSTAGRAM_API_URL = os.getenv('INSTAGRAM_API_URL', 'https://graph.instagram.com/me/media')
+INSTAGRAM_CACHE_TIMEOUT = int(os.getenv('INSTAGRAM_CACHE_TIMEOUT', 60 * 60))
+INSTAGRAM_STALE_TIMEOUT = int(os.getenv('INSTAGRAM_STALE_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Full-page cache of catalog pages for anonymous visitors without a cart (see core.page_cache)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'False') == 'True'
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 10 * 60))
+
+# Analytics ingestion (ProductView, PageView, SearchQuery, ActivityLog)
+# 'buffer': in-memory, written by a background thread; 'spool': local file drained
+# by `manage.py process_analytics`; 'sync': written in the request
+ANALYTICS_MODE = os.getenv('ANALYTICS_MODE', 'buffer')
+ANALYTICS_MAX_BATCH = int(os.getenv('ANALYTICS_MAX_BATCH', 500))
+ANALYTICS_MAX_LATENCY = float(os.getenv('ANALYTICS_MAX_LATENCY', 5))  # seconds
+ANALYTICS_MAX_BUFFER = int(os.getenv('ANALYTICS_MAX_BUFFER', 10000))
+ANALYTICS_OVERFLOW = os.getenv('ANALYTICS_OVERFLOW', 'drop_newest')  # drop_newest, drop_oldest or sync
+ANALYTICS_SPOOL_DIR = os.getenv('ANALYTICS_SPOOL_DIR', os.path.join(BASE_DIR, 'var', 'analytics'))
+
+# Email outbox: customer emails are queued and sent by `manage.py send_queued_emails --loop`
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))  # emails per mail server connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 60))  # seconds, doubled after every failure
+
+# Payment webhooks are stored and acknowledged at once, then processed by `manage.py process_webhooks --loop`
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', 50))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 5))
+WEBHOOK_RETRY_DELAY = int(os.getenv('WEBHOOK_RETRY_DELAY', 30))  # seconds, doubled after every failure
+
+# Payment gateway API calls; set "api_base" in a gateway's additional settings to use another server (e.g. a local fake)
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_CONNECT_TIMEOUT', 5))  # seconds
+PAYMENT_GATEWAY_READ_TIMEOUT = float(os.getenv('PAYMENT_GATEWAY_READ_TIMEOUT', 30))  # seconds
 # Security settings for production
 if not DEBUG:
     CSRF_COOKIE_SECURE = True
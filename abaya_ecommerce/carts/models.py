@@ -23,13 +23,20 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.user.email}"
     
+    def get_pricing(self, **kwargs):
+        """Price the cart in one pass (see carts.pricing.price_cart)."""
+        from .pricing import price_cart
+        
+        return price_cart(self, **kwargs)
+    
     def get_total_price(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.get_pricing().subtotal
     
     def get_item_count(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.items.aggregate(count=models.Sum('quantity'))['count'] or 0
     
     def clear(self):
+        # Items loaded through the cart carry it, so delete signal receivers don't look it up per item
         self.items.all().delete()
         self.save()
 
@@ -39,165 +46,28 @@ class Cart(models.Model):
         if not self.shipping_cost:
             return "Free"
             
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
+        from core.currency_utils import get_current_pricing
         
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert shipping cost if needed
-        shipping_cost = self.shipping_cost
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            shipping_cost = convert_price(shipping_cost, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(shipping_cost, selected_currency)
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.shipping_cost)
 
     def discount_display(self):
         """Get the formatted discount amount with currency symbol."""
         if not self.discount_amount:
             return "-"
             
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
+        from core.currency_utils import get_current_pricing
         
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert discount amount if needed
-        discount = self.discount_amount
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            discount = convert_price(discount, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return "- " + format_price(discount, selected_currency)
+        # Convert and format in the selected currency
+        return "- " + get_current_pricing().display(self.discount_amount)
 
     def get_subtotal_display(self):
         """Get the formatted subtotal with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Calculate subtotal in default currency
-        subtotal = self.get_total_price()
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            subtotal = convert_price(subtotal, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(subtotal, selected_currency)
+        return self.get_pricing().subtotal_display
 
     def get_total_display(self):
         """Get the formatted total (subtotal + shipping - discounts) with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Calculate subtotal in default currency
-        subtotal = self.get_total_price()
-        
-        # Include shipping and discounts
-        total = subtotal + self.shipping_cost - self.discount_amount
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            total = convert_price(total, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(total, selected_currency)
+        return self.get_pricing().total_display
 
 
 class CartItem(models.Model):
@@ -242,49 +112,10 @@ class CartItem(models.Model):
 
     def get_total_price_display(self):
         """Get the formatted total price (unit price × quantity) with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Get the unit price in the default currency
-        if self.product.sale_price:
-            unit_price = self.product.sale_price
-        else:
-            unit_price = self.product.price
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            unit_price = convert_price(unit_price, default_currency, selected_currency)
-        
-        # Calculate total
-        total = unit_price * self.quantity
+        from core.currency_utils import get_current_pricing
+        from .pricing import PricedLine
         
-        # Format with currency symbol
-        return format_price(total, selected_currency)
+        return PricedLine(self, get_current_pricing()).total_display
 
     def get_variant_display(self):
         """Get a display string for the product variant (size, color, fabric)"""
@@ -377,13 +208,20 @@ class GuestCart(models.Model):
     def __str__(self):
         return f"Guest cart {self.id}"
     
+    def get_pricing(self, **kwargs):
+        """Price the cart in one pass (see carts.pricing.price_cart)."""
+        from .pricing import price_cart
+        
+        return price_cart(self, **kwargs)
+    
     def get_total_price(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.get_pricing().subtotal
     
     def get_item_count(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.items.aggregate(count=models.Sum('quantity'))['count'] or 0
     
     def clear(self):
+        # Items loaded through the cart carry it, so delete signal receivers don't look it up per item
         self.items.all().delete()
         self.save()
         
@@ -393,165 +231,28 @@ class GuestCart(models.Model):
         if not self.shipping_cost:
             return "Free"
             
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
+        from core.currency_utils import get_current_pricing
         
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert shipping cost if needed
-        shipping_cost = self.shipping_cost
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            shipping_cost = convert_price(shipping_cost, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(shipping_cost, selected_currency)
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.shipping_cost)
 
     def discount_display(self):
         """Get the formatted discount amount with currency symbol."""
         if not self.discount_amount:
             return "-"
             
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
+        from core.currency_utils import get_current_pricing
         
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert discount amount if needed
-        discount = self.discount_amount
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            discount = convert_price(discount, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return "- " + format_price(discount, selected_currency)
+        # Convert and format in the selected currency
+        return "- " + get_current_pricing().display(self.discount_amount)
 
     def get_subtotal_display(self):
         """Get the formatted subtotal with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Calculate subtotal in default currency
-        subtotal = self.get_total_price()
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            subtotal = convert_price(subtotal, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(subtotal, selected_currency)
+        return self.get_pricing().subtotal_display
 
     def get_total_display(self):
         """Get the formatted total (subtotal + shipping - discounts) with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Calculate subtotal in default currency
-        subtotal = self.get_total_price()
-        
-        # Include shipping and discounts
-        total = subtotal + self.shipping_cost - self.discount_amount
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            total = convert_price(total, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(total, selected_currency)
+        return self.get_pricing().total_display
 
 
 class GuestCartItem(models.Model):
@@ -596,49 +297,10 @@ class GuestCartItem(models.Model):
 
     def get_total_price_display(self):
         """Get the formatted total price (unit price × quantity) with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Get the unit price in the default currency
-        if self.product.sale_price:
-            unit_price = self.product.sale_price
-        else:
-            unit_price = self.product.price
-        
-        # Convert to selected currency if needed
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            unit_price = convert_price(unit_price, default_currency, selected_currency)
-        
-        # Calculate total
-        total = unit_price * self.quantity
+        from core.currency_utils import get_current_pricing
+        from .pricing import PricedLine
         
-        # Format with currency symbol
-        return format_price(total, selected_currency)
+        return PricedLine(self, get_current_pricing()).total_display
 
     def get_variant_display(self):
         """Get a display string for the product variant (size, color, fabric)"""
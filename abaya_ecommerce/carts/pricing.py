@@ -0,0 +1,252 @@
+# carts/pricing.py
+from decimal import Decimal
+
+ZERO = Decimal('0.00')
+
+# Charges used at checkout before the customer has an address on file
+DEFAULT_SHIPPING = Decimal('100.00')
+DEFAULT_TAX_RATE = Decimal('0.18')  # 18% GST in India
+FREE_SHIPPING_THRESHOLD = Decimal('2000.00')
+
+def calculate_tax(cart_total, shipping_address):
+    """Calculate tax based on shipping address."""
+    # In a real-world scenario, this would include tax calculation logic
+    # based on shipping location, product types, etc.
+    # For now, we'll use a simple percentage
+    tax_rate = DEFAULT_TAX_RATE  # 18% GST in India
+    
+    # You might have different tax rates for different states in India
+    if shipping_address.state.upper() in ['KARNATAKA', 'DELHI', 'MAHARASHTRA']:
+        tax_rate = Decimal('0.18')
+    elif shipping_address.state.upper() in ['GUJARAT', 'TAMIL NADU']:
+        tax_rate = Decimal('0.15')
+    
+    return (cart_total * tax_rate).quantize(Decimal('0.01'))
+
+def calculate_shipping(cart_total, shipping_address):
+    """Calculate shipping fee based on cart total and shipping address."""
+    # In a real-world scenario, this would include complex shipping calculation
+    # based on weight, dimensions, distance, and shipping carrier rates
+    # For now, we'll use a simple logic
+    
+    if cart_total >= FREE_SHIPPING_THRESHOLD:
+        return Decimal('0.00')  # Free shipping for orders above 2000
+    
+    base_shipping = DEFAULT_SHIPPING
+    
+    # Additional shipping for remote areas
+    remote_states = ['ASSAM', 'ARUNACHAL PRADESH', 'MANIPUR', 'MEGHALAYA', 
+                    'MIZORAM', 'NAGALAND', 'SIKKIM', 'TRIPURA', 'ANDAMAN AND NICOBAR']
+    if shipping_address.state.upper() in remote_states:
+        base_shipping += Decimal('50.00')
+    
+    return base_shipping
+
+def resolve_coupon(code, subtotal):
+    """
+    Look up a coupon code and work out its discount on a subtotal.
+    
+    Returns:
+        (coupon, discount, error) where coupon is None and error is a message
+        for the customer if the code cannot be applied
+    """
+    from orders.models import Coupon
+    
+    try:
+        coupon = Coupon.objects.get(code__iexact=code, is_active=True)
+    except Coupon.DoesNotExist:
+        return None, ZERO, 'Invalid coupon code.'
+    
+    if not coupon.is_valid:
+        return None, ZERO, 'This coupon is no longer valid.'
+    
+    if coupon.min_order_amount and subtotal < coupon.min_order_amount:
+        return None, ZERO, f'Your order total must be at least {coupon.min_order_amount} to use this coupon.'
+    
+    discount = coupon.calculate_discount(subtotal)
+    if discount <= 0:
+        return None, ZERO, 'This coupon cannot be applied to your order.'
+    
+    # A fixed discount never takes the order below zero
+    return coupon, min(discount, subtotal).quantize(Decimal('0.01')), None
+
+def get_checkout_charges(amount, shipping_address=None):
+    """
+    Shipping and tax for a (discounted) order amount, estimated with the
+    default rates when there is no shipping address yet.
+    
+    Returns:
+        (shipping, tax) in the default currency
+    """
+    if shipping_address:
+        return calculate_shipping(amount, shipping_address), calculate_tax(amount, shipping_address)
+    return DEFAULT_SHIPPING, (amount * DEFAULT_TAX_RATE).quantize(Decimal('0.01'))
+
+
+class PricedLine:
+    """One cart item priced in the default currency, with its display values."""
+    
+    __slots__ = ('item', 'product', 'quantity', 'unit_price', 'total', 'pricing')
+
+    def __init__(self, item, pricing):
+        object.__setattr__(self, 'item', item)
+        object.__setattr__(self, 'product', item.product)
+        object.__setattr__(self, 'quantity', item.quantity)
+        object.__setattr__(self, 'unit_price', item.product.get_active_price())
+        object.__setattr__(self, 'total', self.unit_price * item.quantity)
+        object.__setattr__(self, 'pricing', pricing)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricedLine is read-only")
+
+    def __repr__(self):
+        return f"<PricedLine {self.quantity} x {self.product.name}: {self.total}>"
+
+    @property
+    def unit_price_display(self):
+        return self.pricing.display(self.unit_price)
+
+    @property
+    def total_display(self):
+        # Converted per unit, so the line total matches the unit price shown
+        return self.pricing.format(self.pricing.convert(self.unit_price) * self.quantity)
+
+
+class PricedCart:
+    """
+    Immutable result of pricing a cart: its lines and every total, computed
+    once in the default currency, plus converted and formatted values for
+    the selected currency.
+    
+    total = subtotal - discount + shipping + tax
+    """
+    
+    __slots__ = (
+        'lines', 'pricing', 'item_count', 'subtotal', 'discount', 'coupon',
+        'coupon_error', 'shipping', 'tax', 'total', 'converted',
+    )
+
+    def __init__(self, lines, pricing, discount=ZERO, shipping=ZERO, tax=ZERO, coupon=None, coupon_error=None):
+        subtotal = sum((line.total for line in lines), ZERO)
+        total = subtotal - discount + shipping + tax
+        values = {
+            'lines': tuple(lines),
+            'pricing': pricing,
+            'item_count': sum(line.quantity for line in lines),
+            'subtotal': subtotal,
+            'discount': discount,
+            'coupon': coupon,
+            'coupon_error': coupon_error,
+            'shipping': shipping,
+            'tax': tax,
+            'total': total,
+            # Amounts in the selected currency, e.g. {{ priced_cart.converted.total }}
+            'converted': {
+                'subtotal': pricing.convert(subtotal),
+                'discount': pricing.convert(discount),
+                'shipping': pricing.convert(shipping),
+                'tax': pricing.convert(tax),
+                'total': pricing.convert(total),
+            },
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricedCart is read-only")
+
+    def __repr__(self):
+        return f"<PricedCart {self.item_count} items: {self.total}>"
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    @property
+    def is_empty(self):
+        return not self.lines
+    
+    def for_address(self, shipping_address):
+        """Return a copy with checkout shipping and tax worked out for another address."""
+        shipping, tax = get_checkout_charges(self.subtotal - self.discount, shipping_address)
+        return PricedCart(
+            self.lines, self.pricing,
+            discount=self.discount, shipping=shipping, tax=tax,
+            coupon=self.coupon, coupon_error=self.coupon_error,
+        )
+
+    @property
+    def subtotal_display(self):
+        return self.pricing.format(self.converted['subtotal'])
+
+    @property
+    def discount_display(self):
+        if not self.discount:
+            return "-"
+        return "- " + self.pricing.format(self.converted['discount'])
+
+    @property
+    def shipping_display(self):
+        if not self.shipping:
+            return "Free"
+        return self.pricing.format(self.converted['shipping'])
+
+    @property
+    def tax_display(self):
+        return self.pricing.format(self.converted['tax'])
+
+    @property
+    def total_display(self):
+        return self.pricing.format(self.converted['total'])
+
+def load_lines(items, pricing):
+    """Price cart items, loading them together with their products in one query."""
+    if not items.query.select_related:
+        items = items.select_related('product', 'size', 'color', 'fabric')
+    return [PricedLine(item, pricing) for item in items]
+
+def price_cart(cart, pricing=None, items=None, coupon_code=None, shipping_address=None, checkout=False):
+    """
+    Price a Cart or GuestCart in one pass.
+    
+    Args:
+        cart: Cart or GuestCart
+        pricing: PricingContext; defaults to the one of the current request
+        items: Optional queryset of the cart's items, e.g. with extra prefetches
+        coupon_code: Coupon code to apply to the subtotal
+        shipping_address: Address used for the shipping and tax rules
+        checkout: Charge shipping and tax as at checkout, estimating them
+            with the default rates when there is no shipping address.
+            Otherwise the cart's own shipping cost and discount are used.
+    
+    Returns:
+        PricedCart instance
+    """
+    if pricing is None:
+        from core.currency_utils import get_current_pricing
+        pricing = get_current_pricing()
+    
+    lines = load_lines(cart.items.all() if items is None else items, pricing)
+    subtotal = sum((line.total for line in lines), ZERO)
+    
+    coupon, coupon_error = None, None
+    if coupon_code:
+        coupon, discount, coupon_error = resolve_coupon(coupon_code, subtotal)
+    elif checkout:
+        discount = ZERO
+    else:
+        discount = cart.discount_amount or ZERO
+    
+    if checkout:
+        # Shipping and tax are charged on the discounted amount
+        shipping, tax = get_checkout_charges(subtotal - discount, shipping_address)
+    else:
+        shipping, tax = cart.shipping_cost or ZERO, ZERO
+    
+    return PricedCart(
+        lines, pricing,
+        discount=discount, shipping=shipping, tax=tax,
+        coupon=coupon, coupon_error=coupon_error,
+    )
@@ -1,8 +1,11 @@
 # carts/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Cart, Wishlist
+from products.models import Product
+from .models import Cart, CartItem, GuestCart, GuestCartItem, Wishlist, WishlistItem
+from .summary import invalidate_all_summaries, invalidate_guest_summary, invalidate_user_summary
 
 User = get_user_model()
 
@@ -11,4 +14,53 @@ def create_user_cart_and_wishlist(sender, instance, created, **kwargs):
     """Create cart and wishlist for new users."""
     if created:
         Cart.objects.get_or_create(user=instance)
-        Wishlist.objects.get_or_create(user=instance)
\ No newline at end of file
+        Wishlist.objects.get_or_create(user=instance)
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    """Refresh the user's cached cart summary when cart items change."""
+    if CartItem.cart.is_cached(instance):
+        user_id = instance.cart.user_id
+    else:
+        user_id = Cart.objects.filter(pk=instance.cart_id).values_list('user_id', flat=True).first()
+    if user_id:
+        transaction.on_commit(lambda: invalidate_user_summary(user_id))
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def invalidate_wishlist_summary(sender, instance, **kwargs):
+    """Refresh the user's cached cart summary when wishlist items change."""
+    user_id = Wishlist.objects.filter(pk=instance.wishlist_id).values_list('user_id', flat=True).first()
+    if user_id:
+        transaction.on_commit(lambda: invalidate_user_summary(user_id))
+
+@receiver(post_save, sender=GuestCartItem)
+@receiver(post_delete, sender=GuestCartItem)
+def invalidate_guest_cart_summary(sender, instance, **kwargs):
+    """Refresh the guest session's cached cart summary when its items change."""
+    if GuestCartItem.cart.is_cached(instance):
+        session_key = instance.cart.session_key
+    else:
+        session_key = GuestCart.objects.filter(pk=instance.cart_id).values_list('session_key', flat=True).first()
+    if session_key:
+        transaction.on_commit(lambda: invalidate_guest_summary(session_key))
+
+@receiver(pre_save, sender=Product)
+def remember_product_price(sender, instance, raw=False, **kwargs):
+    """Remember the stored prices so a price change can be detected."""
+    instance._previous_prices = None
+    if not raw and not instance._state.adding:
+        instance._previous_prices = Product.objects.filter(pk=instance.pk).values_list('price', 'sale_price').first()
+
+@receiver(post_save, sender=Product)
+def invalidate_summaries_on_price_change(sender, instance, created, raw=False, **kwargs):
+    """Cart subtotals depend on product prices; invalidate them all when a price changes."""
+    previous = getattr(instance, '_previous_prices', None)
+    if previous and previous != (instance.price, instance.sale_price):
+        transaction.on_commit(invalidate_all_summaries)
+
+@receiver(post_delete, sender=Product)
+def invalidate_summaries_on_product_delete(sender, instance, **kwargs):
+    """Deleting a product removes it from carts through the cascade; refresh every summary."""
+    transaction.on_commit(invalidate_all_summaries)
\ No newline at end of file
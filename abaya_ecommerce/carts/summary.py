@@ -0,0 +1,75 @@
+# carts/summary.py
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CartItem, GuestCartItem, WishlistItem
+from .pricing import PricedCart, load_lines
+
+# Bumped whenever product prices may have changed, which invalidates every summary
+PRICE_VERSION_KEY = 'cart_summary_price_version'
+SUMMARY_TIMEOUT = getattr(settings, 'CART_SUMMARY_TIMEOUT', 60 * 60)  # seconds
+
+EMPTY_SUMMARY = {
+    'cart_count': 0,
+    'cart_total': 0,
+    'wishlist_count': 0,
+}
+
+def get_user_key(user_id):
+    return f'cart_summary:user:{user_id}'
+
+def get_guest_key(session_key):
+    return f'cart_summary:guest:{session_key}'
+
+def _summarize_items(items):
+    """Item count and subtotal (in the default currency) of cart items, in one query."""
+    from core.currency_utils import get_pricing_context
+    
+    # Priced like the cart page and checkout; the badge converts the subtotal itself
+    pricing = get_pricing_context(None)
+    priced_cart = PricedCart(load_lines(items, pricing), pricing)
+    return priced_cart.item_count, priced_cart.subtotal
+
+def get_cart_summary(request):
+    """
+    Get the header cart badge data (item count, subtotal, wishlist count)
+    for the current user or guest session, from the cache when possible.
+    """
+    if request.user.is_authenticated:
+        key = get_user_key(request.user.pk)
+    elif request.session.session_key:
+        key = get_guest_key(request.session.session_key)
+    else:
+        return dict(EMPTY_SUMMARY)
+    
+    cached = cache.get_many([key, PRICE_VERSION_KEY])
+    price_version = cached.get(PRICE_VERSION_KEY)
+    summary = cached.get(key)
+    if summary is not None and summary['price_version'] == price_version:
+        return summary
+    
+    summary = dict(EMPTY_SUMMARY, price_version=price_version)
+    if request.user.is_authenticated:
+        summary['cart_count'], summary['cart_total'] = _summarize_items(
+            CartItem.objects.filter(cart__user=request.user)
+        )
+        summary['wishlist_count'] = WishlistItem.objects.filter(wishlist__user=request.user).count()
+    else:
+        summary['cart_count'], summary['cart_total'] = _summarize_items(
+            GuestCartItem.objects.filter(cart__session_key=request.session.session_key)
+        )
+    
+    cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
+
+def invalidate_user_summary(user_id):
+    cache.delete(get_user_key(user_id))
+
+def invalidate_guest_summary(session_key):
+    cache.delete(get_guest_key(session_key))
+
+def invalidate_all_summaries():
+    """Invalidate every cart summary at once (e.g. after a price change)."""
+    cache.set(PRICE_VERSION_KEY, uuid.uuid4().hex, None)
@@ -6,8 +6,10 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.db import transaction
+from django.db.models import Prefetch
 
 from .models import Cart, CartItem, Wishlist, WishlistItem, GuestCart, GuestCartItem
+from .pricing import price_cart
 from products.models import Product, Currency, Size, Color, Fabric, FabricColor
 
 def get_or_create_guest_cart(request):
@@ -67,21 +69,24 @@ def cart_detail(request):
     else:
         cart = get_or_create_guest_cart(request)
     
-    # Add default images to cart items
-    for item in cart.items.all():
-        item.product.default_image = item.product.get_default_image()
+    # Load cart items with their products and default images in a fixed number of queries
+    cart_items = cart.items.select_related('size', 'color', 'fabric').prefetch_related(
+        Prefetch('product', queryset=Product.objects.with_default_image())
+    )
+    priced_cart = price_cart(cart, items=cart_items)
     
     # Get trending products for recommendations (if available)
     try:
-        from products.models import Product
-        trending_products = Product.objects.filter(is_active=True).order_by('-views')[:8]
-        for product in trending_products:
-            product.default_image = product.get_default_image()
+        trending_products = list(
+            Product.objects.filter(is_active=True).order_by('-popularity_score').with_default_image()[:8]
+        )
     except:
         trending_products = []
     
     return render(request, 'carts/cart_detail.html', {
         'cart': cart,
+        'cart_items': [line.item for line in priced_cart.lines],
+        'priced_cart': priced_cart,
         'trending_products': trending_products
     })
 
@@ -209,42 +214,34 @@ def update_cart(request):
         
         # Don't update if quantity hasn't changed
         old_quantity = cart_item.quantity
+        if old_quantity != quantity:
+            # Update quantity and save
+            cart_item.quantity = quantity
+            cart_item.save()
+        
+        # Price the whole cart once for every total in the response
+        priced_cart = price_cart(cart)
+        line = next(line for line in priced_cart.lines if line.item.pk == cart_item.pk)
+        
         if old_quantity == quantity:
-            return JsonResponse({
+            response_data = {
                 'status': 'info',
                 'message': 'Quantity unchanged',
-                'cart_count': cart.get_item_count(),
-                'item_total': float(cart_item.get_total_price()),
-                'cart_total': float(cart.get_total_price())
-            })
-        
-        # Update quantity and save
-        cart_item.quantity = quantity
-        cart_item.save()
-        
-        # Create response data
-        response_data = {
-            'status': 'success',
-            'message': 'Cart updated successfully',
-            'cart_count': cart.get_item_count(),
-            'item_total': float(cart_item.get_total_price()),
-            'cart_total': float(cart.get_total_price())
-        }
+            }
+        else:
+            response_data = {
+                'status': 'success',
+                'message': 'Cart updated successfully',
+            }
         
-        # Try to add formatted price displays if methods exist
-        try:
-            if hasattr(cart_item, 'get_total_price_display'):
-                response_data['item_total_formatted'] = cart_item.get_total_price_display()
-            
-            if hasattr(cart, 'get_subtotal_display'):
-                response_data['cart_subtotal_formatted'] = cart.get_subtotal_display()
-            
-            if hasattr(cart, 'get_total_display'):
-                response_data['cart_total_formatted'] = cart.get_total_display()
-        except Exception as price_error:
-            # If formatting fails, log it but continue anyway
-            import logging
-            logging.error(f"Error formatting prices: {price_error}")
+        response_data.update({
+            'cart_count': priced_cart.item_count,
+            'item_total': float(line.total),
+            'cart_total': float(priced_cart.subtotal),
+            'item_total_formatted': line.total_display,
+            'cart_subtotal_formatted': priced_cart.subtotal_display,
+            'cart_total_formatted': priced_cart.total_display,
+        })
         
         return JsonResponse(response_data)
     
@@ -281,23 +278,16 @@ def remove_from_cart(request):
     cart = cart_item.cart
     cart_item.delete()
     
-    # Get formatted total if available
-    try:
-        cart_total_formatted = cart.get_total_display()
-    except:
-        cart_total_formatted = None
+    priced_cart = price_cart(cart)
     
-    response_data = {
+    return JsonResponse({
         'status': 'success',
         'message': f"{product_name} removed from your cart",
-        'cart_count': cart.get_item_count(),
-        'cart_total': float(cart.get_total_price())
-    }
-    
-    if cart_total_formatted:
-        response_data['cart_total_formatted'] = cart_total_formatted
-    
-    return JsonResponse(response_data)
+        'cart_count': priced_cart.item_count,
+        'cart_total': float(priced_cart.subtotal),
+        'cart_subtotal_formatted': priced_cart.subtotal_display,
+        'cart_total_formatted': priced_cart.total_display,
+    })
 
 @require_POST
 def clear_cart(request):
@@ -321,11 +311,15 @@ def wishlist_detail(request):
     """Display the wishlist."""
     wishlist, created = Wishlist.objects.get_or_create(user=request.user)
     
-    # Add default images to wishlist items
-    for item in wishlist.items.all():
-        item.product.default_image = item.product.get_default_image()
+    # Load wishlist items with their products and default images in a fixed number of queries
+    wishlist_items = wishlist.items.select_related('size', 'color', 'fabric').prefetch_related(
+        Prefetch('product', queryset=Product.objects.with_default_image())
+    )
         
-    return render(request, 'carts/wishlist_detail.html', {'wishlist': wishlist})
+    return render(request, 'carts/wishlist_detail.html', {
+        'wishlist': wishlist,
+        'wishlist_items': wishlist_items,
+    })
 
 @login_required
 @require_POST
@@ -3,10 +3,11 @@ from django.contrib import admin
 # Register your models here.
 # core/admin.py
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import Setting, EmailTemplate, EmailLog, ActivityLog
+from .models import Setting, EmailTemplate, EmailLog, OutboxEmail, ActivityLog
 
 @admin.register(Setting)
 class SettingAdmin(admin.ModelAdmin):
@@ -96,6 +97,26 @@ class EmailLogAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at', 'sent_at')
+    search_fields = ('recipient', 'subject', 'template_name', 'html_template')
+    readonly_fields = ('recipient', 'from_email', 'subject', 'template_name', 'html_template', 'text_template',
+                      'body', 'context', 'user', 'log', 'status', 'attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='SENT').update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} emails will be sent by the next worker run.")
+    retry_now.short_description = 'Send again now'
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'action', 'entity_type', 'ip_address', 'created_at')
@@ -0,0 +1,262 @@
+# core/analytics.py
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = getattr(settings, 'ANALYTICS_MAX_BATCH', 500)
+MAX_LATENCY = getattr(settings, 'ANALYTICS_MAX_LATENCY', 5)  # seconds
+MAX_BUFFER = getattr(settings, 'ANALYTICS_MAX_BUFFER', 10000)
+# What to do when the memory buffer is full: 'drop_newest', 'drop_oldest' or 'sync'
+# (write the event in the request, pushing back on the caller)
+OVERFLOW = getattr(settings, 'ANALYTICS_OVERFLOW', 'drop_newest')
+SPOOL_DIR = getattr(settings, 'ANALYTICS_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'var', 'analytics'))
+
+
+def get_mode():
+    """
+    Ingestion mode: 'buffer' keeps events in memory and writes them from a
+    background thread, 'spool' appends them to a local file that the
+    process_analytics command drains, 'sync' writes every event immediately
+    (tests, debugging). Read on every event, so tests can override it.
+    """
+    return getattr(settings, 'ANALYTICS_MODE', 'buffer')
+
+
+def write_events(events):
+    """
+    Insert unsaved model instances with one bulk_create per model and batch.
+
+    A batch that fails (e.g. the product was deleted in the meantime) is retried
+    row by row so one bad event does not lose the rest.
+
+    Returns:
+        Number of events written
+    """
+    by_model = {}
+    for event in events:
+        by_model.setdefault(type(event), []).append(event)
+
+    written = 0
+    for model, instances in by_model.items():
+        for start in range(0, len(instances), MAX_BATCH):
+            batch = instances[start:start + MAX_BATCH]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch)
+                written += len(batch)
+            except DatabaseError:
+                for instance in batch:
+                    try:
+                        with transaction.atomic():
+                            instance.save(force_insert=True)
+                        written += 1
+                    except DatabaseError as e:
+                        logger.warning(f"Dropping {model.__name__} event: {str(e)}")
+    return written
+
+
+def serialize_event(event):
+    """Serialize an unsaved model instance to a JSON line."""
+    return json.dumps({
+        'model': event._meta.label,
+        'fields': {field.attname: getattr(event, field.attname) for field in event._meta.concrete_fields},
+    }, cls=DjangoJSONEncoder)
+
+
+def deserialize_event(line):
+    """Build an unsaved model instance from a line written by serialize_event."""
+    data = json.loads(line)
+    model = apps.get_model(data['model'])
+    fields = {}
+    for field in model._meta.concrete_fields:
+        if field.attname in data['fields']:
+            value = data['fields'][field.attname]
+            fields[field.attname] = None if value is None else field.to_python(value)
+    return model(**fields)
+
+
+class MemoryBuffer:
+    """
+    Bounded in-memory queue of events, written in batches by a daemon thread
+    once MAX_BATCH events are waiting or the oldest has waited MAX_LATENCY seconds.
+    """
+
+    def __init__(self):
+        self._events = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.dropped = 0
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so pre-forking servers start one per worker
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='analytics-flush', daemon=True)
+        self._thread.start()
+
+    def add(self, event):
+        with self._condition:
+            if len(self._events) >= MAX_BUFFER and OVERFLOW != 'sync':
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logger.warning(f"Analytics buffer full, {self.dropped} events dropped so far")
+                if OVERFLOW != 'drop_oldest':
+                    return
+                self._events.popleft()
+
+            if len(self._events) < MAX_BUFFER:
+                self._events.append((time.monotonic(), event))
+                self._ensure_worker()
+                # Wake the worker for the first event (to start the latency clock) and for a full batch
+                if len(self._events) == 1 or len(self._events) >= MAX_BATCH:
+                    self._condition.notify()
+                return
+
+        # Buffer full with the 'sync' policy: write in the caller's thread
+        write_events([event])
+
+    def _take_batch(self, wait):
+        with self._condition:
+            while wait:
+                if len(self._events) >= MAX_BATCH:
+                    break
+                if self._events:
+                    remaining = MAX_LATENCY - (time.monotonic() - self._events[0][0])
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                else:
+                    self._condition.wait()
+
+            batch = []
+            while self._events and len(batch) < MAX_BATCH:
+                batch.append(self._events.popleft()[1])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch(wait=True)
+            try:
+                write_events(batch)
+            except Exception as e:
+                logger.error(f"Error writing analytics events: {str(e)}")
+            finally:
+                connection.close()
+
+    def flush(self):
+        """Write everything that is waiting, in the calling thread."""
+        written = 0
+        while True:
+            batch = self._take_batch(wait=False)
+            if not batch:
+                return written
+            written += write_events(batch)
+
+
+class SpoolFile:
+    """
+    Append-only JSON lines file per process. process_analytics renames finished
+    files out of the way and bulk inserts them.
+    """
+
+    def __init__(self, directory=SPOOL_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self):
+        return os.path.join(self.directory, f'events-{os.getpid()}.jsonl')
+
+    def add(self, event):
+        line = serialize_event(event) + '\n'
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(), 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def flush(self):
+        """Move the current spool files aside and write their events. Returns the number written."""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        written = 0
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.jsonl'):
+                # Writers reopen the file for every event, so after the rename
+                # new events go to a fresh file
+                processing = path + f'.{int(time.time() * 1000)}.processing'
+                os.replace(path, processing)
+            elif name.endswith('.processing'):
+                # Left behind by an interrupted run
+                processing = path
+            else:
+                continue
+
+            events = []
+            with open(processing, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(deserialize_event(line))
+                    except (ValueError, LookupError) as e:
+                        logger.warning(f"Skipping malformed analytics event: {str(e)}")
+                    if len(events) >= MAX_BATCH:
+                        written += write_events(events)
+                        events = []
+            written += write_events(events)
+            os.remove(processing)
+        return written
+
+
+_memory_buffer = MemoryBuffer()
+_spool_file = SpoolFile()
+
+
+def record_event(event):
+    """
+    Queue an unsaved analytics model instance (ProductView, PageView, SearchQuery,
+    ActivityLog, ...) for writing according to ANALYTICS_MODE.
+    """
+    mode = get_mode()
+    if mode == 'sync':
+        write_events([event])
+    elif mode == 'spool':
+        try:
+            _spool_file.add(event)
+        except OSError as e:
+            logger.error(f"Error spooling analytics event: {str(e)}")
+    else:
+        _memory_buffer.add(event)
+
+
+def flush_events():
+    """
+    Write all pending events now: the memory buffer of this process and any spool files.
+
+    Returns:
+        Number of events written
+    """
+    return _memory_buffer.flush() + _spool_file.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    if get_mode() == 'buffer':
+        try:
+            _memory_buffer.flush()
+        except Exception as e:
+            logger.error(f"Error writing analytics events on exit: {str(e)}")
@@ -1,18 +1,29 @@
 # core/context_processors.py
-from products.models import Currency
-from core.currency_utils import get_selected_currency
+from core.currency_registry import currency_registry
+from core.currency_utils import get_pricing_context
 
 def currency_processor(request):
     """
     Context processor to add currency information to all templates.
     """
     # Get all active currencies for the currency selector
-    currencies = Currency.objects.filter(is_active=True).order_by('-is_default', 'code')
+    currencies = currency_registry.get_active()
     
-    # Get the currently selected currency
-    selected_currency = get_selected_currency(request)
+    # Get the currently selected currency from the request's pricing context
+    selected_currency = get_pricing_context(request).currency
     
     return {
         'currencies': currencies,
         'selected_currency': selected_currency,
-    }
\ No newline at end of file
+    }
+
+def page_cache_processor(request):
+    """
+    Render a placeholder instead of the CSRF token in pages that are being
+    cached for every visitor; core.page_cache puts each visitor's token in.
+    """
+    from core.page_cache import CSRF_PLACEHOLDER
+    
+    if getattr(request, '_page_cache_render', False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
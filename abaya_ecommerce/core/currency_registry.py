@@ -0,0 +1,40 @@
+# core/currency_registry.py
+from django.conf import settings
+
+from core.registry import VersionedRegistry
+
+
+class CurrencyRegistry(VersionedRegistry):
+    """
+    In-process registry of currencies, loaded once and shared by all requests.
+
+    Saving or deleting a Currency invalidates it (see core.signals). The
+    Currency instances handed out are shared; treat them as read-only.
+    """
+
+    VERSION_CACHE_KEY = 'currency_registry_version'
+    CHECK_INTERVAL = getattr(settings, 'CURRENCY_REGISTRY_CHECK_INTERVAL', 5)  # seconds
+
+    def _load(self):
+        from products.models import Currency
+
+        # (default currency, active currencies by code, active currencies)
+        currencies = list(Currency.objects.all())
+        default_currency = next((c for c in currencies if c.is_default), None)
+        active = [c for c in currencies if c.is_active]
+        return default_currency, {c.code: c for c in active}, active
+
+    def get_default(self):
+        """Return the default currency, or None if none is configured."""
+        return self._get_snapshot()[0]
+
+    def get(self, code):
+        """Return the active currency with the given code, or None."""
+        return self._get_snapshot()[1].get(code)
+
+    def get_active(self):
+        """Return all active currencies, default first and then by code."""
+        return list(self._get_snapshot()[2])
+
+
+currency_registry = CurrencyRegistry()
@@ -1,5 +1,29 @@
 # core/currency_utils.py
 from products.models import Currency
+from core.currency_registry import currency_registry
+
+def get_default_currency():
+    """
+    Get the default currency from the currency registry.
+    Creates INR as the default currency if none exists.
+    """
+    default_currency = currency_registry.get_default()
+    if default_currency is None:
+        default_currency = Currency.objects.create(
+            code='INR',
+            name='Indian Rupee',
+            symbol='₹',
+            exchange_rate=1.0,
+            is_default=True,
+            is_active=True
+        )
+    return default_currency
+
+def get_currency(code):
+    """
+    Get an active currency by code, falling back to the default currency.
+    """
+    return currency_registry.get(code) or get_default_currency()
 
 def get_selected_currency(request):
     """
@@ -7,44 +31,16 @@ def get_selected_currency(request):
     """
     currency_code = request.session.get('currency_code')
     
-    # If no currency is selected or the selected currency doesn't exist, use default
-    if not currency_code:
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-            request.session['currency_code'] = default_currency.code
-            return default_currency
-        except Currency.DoesNotExist:
-            # If no default currency, create INR as default
-            default_currency = Currency.objects.create(
-                code='INR',
-                name='Indian Rupee',
-                symbol='₹',
-                exchange_rate=1.0,
-                is_default=True,
-                is_active=True
-            )
-            request.session['currency_code'] = default_currency.code
-            return default_currency
-    
     # Get the selected currency
-    try:
-        return Currency.objects.get(code=currency_code, is_active=True)
-    except Currency.DoesNotExist:
-        # If selected currency doesn't exist or is inactive, use default
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-            request.session['currency_code'] = default_currency.code
-            return default_currency
-        except Currency.DoesNotExist:
-            # Fallback to INR if everything fails
-            return Currency.objects.create(
-                code='INR',
-                name='Indian Rupee',
-                symbol='₹',
-                exchange_rate=1.0,
-                is_default=True,
-                is_active=True
-            )
+    if currency_code:
+        currency = currency_registry.get(currency_code)
+        if currency:
+            return currency
+    
+    # If no currency is selected or the selected currency doesn't exist, use default
+    default_currency = get_default_currency()
+    request.session['currency_code'] = default_currency.code
+    return default_currency
 
 def convert_price(price, from_currency, to_currency):
     """
@@ -63,16 +59,10 @@ def convert_price(price, from_currency, to_currency):
     
     # Convert currency codes to Currency objects if needed
     if isinstance(from_currency, str):
-        try:
-            from_currency = Currency.objects.get(code=from_currency, is_active=True)
-        except Currency.DoesNotExist:
-            from_currency = Currency.objects.get(is_default=True)
+        from_currency = get_currency(from_currency)
     
     if isinstance(to_currency, str):
-        try:
-            to_currency = Currency.objects.get(code=to_currency, is_active=True)
-        except Currency.DoesNotExist:
-            to_currency = Currency.objects.get(is_default=True)
+        to_currency = get_currency(to_currency)
     
     # Base currency (usually the default currency) has exchange_rate of 1.0
     # Convert price to base currency, then to target currency
@@ -98,50 +88,96 @@ def format_price(price, currency):
     
     # Convert currency code to Currency object if needed
     if isinstance(currency, str):
-        try:
-            currency = Currency.objects.get(code=currency, is_active=True)
-        except Currency.DoesNotExist:
-            currency = Currency.objects.get(is_default=True)
+        currency = get_currency(currency)
     
     return f"{currency.symbol}{price:,.2f}"
 
-# Add this function to core/currency_utils.py
-
 def get_selected_currency_from_request():
     """
     Get the currently selected currency from the request.
     Falls back to default currency if no currency is selected or if the selected currency doesn't exist.
     To be used within model methods.
     """
-    from products.models import Currency
-    from core.middleware import get_current_request
+    return get_current_pricing().currency
+
+
+class PricingContext:
+    """
+    Immutable snapshot of how prices are shown for one request.
     
-    # Get default currency
-    try:
-        default_currency = Currency.objects.get(is_default=True)
-    except Currency.DoesNotExist:
-        # Create a default currency if none exists
-        default_currency = Currency.objects.create(
-            code='INR',
-            name='Indian Rupee',
-            symbol='₹',
-            exchange_rate=1.0,
-            is_default=True,
-            is_active=True
-        )
+    Prices are stored in the default currency; the context holds the selected
+    currency, the default currency and the factor between them, and converts
+    and formats amounts exactly like convert_price and format_price.
+    """
+    
+    __slots__ = ('currency', 'default_currency', 'rate', 'symbol')
+    
+    def __init__(self, currency, default_currency):
+        object.__setattr__(self, 'currency', currency)
+        object.__setattr__(self, 'default_currency', default_currency)
+        object.__setattr__(self, 'rate', currency.exchange_rate / default_currency.exchange_rate)
+        object.__setattr__(self, 'symbol', currency.symbol)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("PricingContext is read-only")
+    
+    def __repr__(self):
+        return f"<PricingContext {self.default_currency.code}->{self.currency.code}>"
+    
+    @property
+    def is_default(self):
+        """Whether prices are shown in the currency they are stored in."""
+        return self.currency.id == self.default_currency.id
+    
+    def convert(self, price):
+        """Convert a price from the default currency to the selected currency."""
+        if price is None or self.is_default:
+            return price
+        return convert_price(price, self.default_currency, self.currency)
+    
+    def format(self, price):
+        """Format a price that is already in the selected currency."""
+        if price is None:
+            return None
+        return f"{self.symbol}{price:,.2f}"
+    
+    def display(self, price):
+        """Convert and format a price stored in the default currency."""
+        return self.format(self.convert(price))
+
+def get_pricing_context(request, currency=None):
+    """
+    Get the pricing context for a request, resolving it on first use.
+    
+    Args:
+        request: HttpRequest or None
+        currency: Optional Currency object or code to price in instead of the
+            currency selected for the request
+    
+    Returns:
+        PricingContext instance
+    """
+    if currency is not None:
+        if isinstance(currency, str):
+            currency = get_currency(currency)
+        return PricingContext(currency, get_default_currency())
+    
+    if request is None or not hasattr(request, 'session'):
+        default_currency = get_default_currency()
+        return PricingContext(default_currency, default_currency)
+    
+    pricing = getattr(request, '_pricing_context', None)
+    if pricing is None:
+        pricing = PricingContext(get_selected_currency(request), get_default_currency())
+        request._pricing_context = pricing
+    return pricing
+
+def get_current_pricing(currency=None):
+    """
+    Get the pricing context of the request being handled.
+    Falls back to the default currency outside a request (emails, commands).
+    To be used within model methods.
+    """
+    from core.middleware import get_current_request
     
-    # Try to get the selected currency from the request
-    try:
-        request = get_current_request()
-        if request and request.session.get('currency_code'):
-            try:
-                return Currency.objects.get(
-                    code=request.session['currency_code'],
-                    is_active=True
-                )
-            except Currency.DoesNotExist:
-                return default_currency
-    except:
-        pass
-    
-    return default_currency
\ No newline at end of file
+    return get_pricing_context(get_current_request(), currency)
@@ -0,0 +1,74 @@
+# core/email_templates.py
+from django.conf import settings
+from django.template import Context, Template
+
+from core.registry import VersionedRegistry
+
+
+class CompiledEmailTemplate:
+    """An EmailTemplate with its subject and bodies compiled once, ready to render many times."""
+    
+    __slots__ = ('id', 'name', 'updated_at', 'subject', 'html', 'text')
+
+    def __init__(self, template):
+        self.id = template.id
+        self.name = template.name
+        self.updated_at = template.updated_at
+        self.subject = Template(template.subject)
+        self.html = Template(template.html_content)
+        self.text = Template(template.text_content) if template.text_content else None
+
+    def render(self, context):
+        """
+        Render the template with a context dict.
+        
+        Returns:
+            (subject, html, text) where text is None without a plain text version
+        """
+        context = Context(context)
+        subject = self.subject.render(context)
+        html = self.html.render(context)
+        text = self.text.render(context) if self.text else None
+        return subject, html, text
+
+
+class EmailTemplateCache(VersionedRegistry):
+    """
+    Active email templates by name, compiled on first use.
+    
+    Compiled templates are kept per template id and updated_at, so reloading
+    after an edit only recompiles the templates that changed. Saving or
+    deleting an EmailTemplate invalidates the cache (see core.signals).
+    """
+    
+    VERSION_CACHE_KEY = 'email_template_cache_version'
+    CHECK_INTERVAL = getattr(settings, 'EMAIL_TEMPLATE_CACHE_CHECK_INTERVAL', 5)  # seconds
+
+    def __init__(self):
+        super().__init__()
+        self._compiled = {}
+
+    def _load(self):
+        from .models import EmailTemplate
+        
+        templates = {template.name: template for template in EmailTemplate.objects.filter(is_active=True)}
+        
+        # Drop compiled versions of templates that were edited or removed
+        current = {(template.id, template.updated_at) for template in templates.values()}
+        self._compiled = {key: compiled for key, compiled in self._compiled.items() if key in current}
+        return templates
+
+    def get(self, name):
+        """Return the compiled active template with the given name, or None."""
+        template = self._get_snapshot().get(name)
+        if template is None:
+            return None
+        
+        key = (template.id, template.updated_at)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = CompiledEmailTemplate(template)
+        return compiled
+
+
+email_template_cache = EmailTemplateCache()
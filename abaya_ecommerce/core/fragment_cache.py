@@ -0,0 +1,45 @@
+# core/fragment_cache.py
+import uuid
+
+from django.core.cache import cache
+
+from .currency_registry import currency_registry
+from .currency_utils import get_pricing_context
+
+PRODUCT_CARD_VERSION_KEY = 'product_card_version'
+
+
+def get_product_card_version():
+    """Shared version of every product card, for changes that affect many products (e.g. a category rename)."""
+    version = cache.get(PRODUCT_CARD_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(PRODUCT_CARD_VERSION_KEY, version, None):
+            version = cache.get(PRODUCT_CARD_VERSION_KEY, version)
+    return version
+
+
+def invalidate_product_cards():
+    """Re-render every cached product card on its next use."""
+    cache.set(PRODUCT_CARD_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_product_card_key(request, product):
+    """
+    What a cached product card depends on: the product and its updated_at
+    (bumped by media and category changes, see products.signals), its
+    rating, the selected currency and the exchange rates, and the shared
+    card version.
+    """
+    # Looked up once per request, not once per card
+    version = getattr(request, '_product_card_version', None)
+    if version is None:
+        version = get_product_card_version()
+        if request is not None:
+            request._product_card_version = version
+    
+    currency = get_pricing_context(request).currency
+    return (
+        f"{product.pk}:{product.updated_at.timestamp()}:{product.review_count}:{product.average_rating}:"
+        f"{currency.code}:{currency_registry.get_version()}:{version}"
+    )
@@ -0,0 +1,198 @@
+# core/images.py
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import ImageDerivative
+
+logger = logging.getLogger(__name__)
+
+# Widths of the derivatives; images narrower than one are not scaled up
+WIDTHS = getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 960, 1280, 1920))
+QUALITY = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+# How long a failed image waits before it is tried again on request
+RETRY_DELAY = getattr(settings, 'IMAGE_DERIVATIVE_RETRY_DELAY', 60 * 60)  # seconds
+CACHE_TIMEOUT = getattr(settings, 'IMAGE_DERIVATIVE_CACHE_TIMEOUT', 24 * 60 * 60)  # seconds
+
+# Output formats: file extension and Pillow save options
+FORMATS = {
+    'WEBP': ('webp', {'quality': QUALITY, 'method': 4}),
+    'JPEG': ('jpg', {'quality': QUALITY, 'optimize': True, 'progressive': True}),
+}
+
+# Uploaded image fields that get derivatives: (model, field, filters)
+SOURCES = (
+    ('products.ProductMedia', 'file', {'type': 'IMAGE'}),
+    ('products.Category', 'image', {}),
+    ('products.Color', 'image', {}),
+    ('products.ReviewImage', 'image', {}),
+)
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 1), thread_name_prefix='images')
+
+
+def _cache_key(name):
+    return f"image_derivatives:{hashlib.md5(name.encode()).hexdigest()}"
+
+
+def _hash_file(name):
+    digest = hashlib.sha256()
+    with default_storage.open(name, 'rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render(image, width, height, image_format):
+    options = FORMATS[image_format][1]
+    if image.width != width:
+        image = image.resize((width, height), Image.LANCZOS)
+    
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if image_format == 'JPEG' and has_alpha:
+        # JPEG has no transparency; flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    
+    output = BytesIO()
+    image.save(output, image_format, **options)
+    return output.getvalue()
+
+
+def _set_cached(name, derivatives):
+    """Cache the srcset entries of an image: {format: [(width, url)]} by ascending width."""
+    entry = {}
+    for derivative in sorted(derivatives, key=lambda derivative: derivative.width):
+        entry.setdefault(derivative.format, []).append((derivative.width, default_storage.url(derivative.file.name)))
+    cache.set(_cache_key(name), entry, CACHE_TIMEOUT)
+    return entry
+
+
+def _delete_files(names):
+    """Delete derivative files no derivative refers to any more (identical uploads share files)."""
+    in_use = set(ImageDerivative.objects.filter(file__in=names).values_list('file', flat=True))
+    for file_name in set(names) - in_use:
+        default_storage.delete(file_name)
+
+
+def _touch_products(name):
+    """Bump updated_at of the products showing an image, so their cached cards pick up its new srcset."""
+    apps.get_model('products', 'Product').objects.filter(media__file=name).update(updated_at=timezone.now())
+
+
+def generate_derivatives(name, force=False):
+    """
+    Create the resized WebP and JPEG copies of an uploaded image, replacing
+    those of an earlier upload under the same name.
+    
+    Args:
+        name: Storage name of the image, e.g. 'products/abaya.jpg'
+        force: Render the copies even if they are up to date
+    
+    The cached cards of the products showing the image are rendered again;
+    cached pages keep serving the original until they expire (the
+    rebuild_image_derivatives command invalidates them once per run).
+    
+    Returns:
+        Number of derivatives written (0 if they were up to date)
+    """
+    source_hash = _hash_file(name)
+    existing = list(ImageDerivative.objects.filter(source_name=name))
+    if existing and not force and all(derivative.source_hash == source_hash for derivative in existing):
+        _set_cached(name, existing)
+        return 0
+    
+    with default_storage.open(name, 'rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    
+    widths = sorted({width for width in WIDTHS if width < image.width} | {min(image.width, max(WIDTHS))})
+    derivatives = []
+    for image_format, (extension, _) in FORMATS.items():
+        for width in widths:
+            height = max(1, round(image.height * width / image.width))
+            # Named after the source content, so unchanged images keep their URLs
+            file_name = f"derivatives/{source_hash[:2]}/{source_hash}-{width}.{extension}"
+            if force or not default_storage.exists(file_name):
+                default_storage.delete(file_name)
+                file_name = default_storage.save(file_name, ContentFile(_render(image, width, height, image_format)))
+            derivatives.append(ImageDerivative(
+                source_name=name, source_hash=source_hash, format=image_format,
+                width=width, height=height, file=file_name,
+            ))
+    
+    with transaction.atomic():
+        ImageDerivative.objects.filter(source_name=name).delete()
+        ImageDerivative.objects.bulk_create(derivatives)
+    _delete_files([derivative.file.name for derivative in existing if derivative.source_hash != source_hash])
+    
+    _set_cached(name, derivatives)
+    _touch_products(name)
+    return len(derivatives)
+
+
+def delete_derivatives(name):
+    """Delete the derivatives of an image that was removed or replaced."""
+    files = list(ImageDerivative.objects.filter(source_name=name).values_list('file', flat=True))
+    ImageDerivative.objects.filter(source_name=name).delete()
+    _delete_files(files)
+    cache.delete(_cache_key(name))
+
+
+def _generate_in_background(name):
+    try:
+        generate_derivatives(name)
+    except Exception:
+        logger.exception(f"Generating derivatives of {name} failed")
+        cache.set(_cache_key(name), {}, RETRY_DELAY)
+    finally:
+        cache.delete(f"{_cache_key(name)}:pending")
+        connection.close()
+
+
+def schedule_derivatives(name):
+    """Generate the derivatives of an image in a background thread, unless that is already under way."""
+    if cache.add(f"{_cache_key(name)}:pending", True, RETRY_DELAY):
+        # Serve the original until the derivatives are ready, without looking them up on every request
+        cache.add(_cache_key(name), {}, RETRY_DELAY)
+        _executor.submit(_generate_in_background, name)
+
+
+def get_derivatives(name):
+    """
+    srcset entries of an uploaded image, {format: [(width, url)]} by
+    ascending width. Images without derivatives yet get them generated in
+    the background and return {} meanwhile.
+    """
+    entry = cache.get(_cache_key(name))
+    if entry is None:
+        derivatives = list(ImageDerivative.objects.filter(source_name=name))
+        if not derivatives:
+            schedule_derivatives(name)
+            return {}
+        entry = _set_cached(name, derivatives)
+    return entry
+
+
+def iter_source_names():
+    """Storage names of every uploaded image that should have derivatives."""
+    for model_name, field, filters in SOURCES:
+        names = apps.get_model(model_name).objects.filter(**filters).exclude(
+            **{f'{field}__isnull': True}
+        ).exclude(
+            **{field: ''}
+        ).values_list(field, flat=True).distinct().order_by()
+        yield from names.iterator()
@@ -1,25 +1,129 @@
 # core/instagram_service.py
 import requests
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='instagram')
+
 class InstagramService:
-    """Service for fetching content from Instagram"""
+    """
+    Service for fetching content from Instagram
+    
+    One master feed of the latest FEED_SIZE posts is cached, and every
+    count, media type and page is sliced from it. The feed is served while
+    it is up to STALE_TIMEOUT old, but once it is older than CACHE_TIMEOUT
+    it is refreshed in a background thread. Only one request at a time
+    calls the API (the refresh lock); if the call fails, the stale feed
+    keeps being served and the next attempt waits RETRY_DELAY.
+    """
     
     CACHE_KEY = 'instagram_feed'
-    CACHE_TIMEOUT = 60 * 60  # 1 hour
+    LOCK_KEY = 'instagram_feed_refresh'
+    CACHE_TIMEOUT = getattr(settings, 'INSTAGRAM_CACHE_TIMEOUT', 60 * 60)  # 1 hour
+    STALE_TIMEOUT = getattr(settings, 'INSTAGRAM_STALE_TIMEOUT', 7 * 24 * 60 * 60)  # 1 week
+    RETRY_DELAY = getattr(settings, 'INSTAGRAM_RETRY_DELAY', 5 * 60)  # seconds
+    FEED_SIZE = getattr(settings, 'INSTAGRAM_FEED_SIZE', 100)  # posts in the master feed
+    TIMEOUT = (getattr(settings, 'INSTAGRAM_CONNECT_TIMEOUT', 3), getattr(settings, 'INSTAGRAM_READ_TIMEOUT', 5))  # seconds
+    API_URL = getattr(settings, 'INSTAGRAM_API_URL', 'https://graph.instagram.com/me/media')
+    FIELDS = 'id,media_type,media_url,permalink,thumbnail_url,caption,timestamp'
+    
+    @staticmethod
+    def fetch_feed():
+        """
+        Fetch the latest FEED_SIZE posts from the Instagram Graph API,
+        following the result pages.
+        
+        Raises:
+            requests.RequestException: If the API cannot be reached or returns an error
+        """
+        media_items = []
+        url = InstagramService.API_URL
+        
+        # API parameters; the next page URLs carry them along
+        params = {
+            'fields': InstagramService.FIELDS,
+            'access_token': settings.INSTAGRAM_ACCESS_TOKEN,
+            'limit': min(InstagramService.FEED_SIZE, 100),
+        }
+        
+        while url and len(media_items) < InstagramService.FEED_SIZE:
+            response = requests.get(url, params=params, timeout=InstagramService.TIMEOUT)
+            response.raise_for_status()  # Raise exception for HTTP errors
+            
+            data = response.json()
+            media_items.extend(data.get('data', []))
+            url = data.get('paging', {}).get('next')
+            params = None
+        
+        return media_items[:InstagramService.FEED_SIZE]
+    
+    @staticmethod
+    def refresh_feed():
+        """
+        Fetch the feed and cache it. Called by whoever holds the refresh lock.
+        
+        Returns:
+            The new feed, or None if fetching failed
+        """
+        try:
+            media_items = InstagramService.fetch_feed()
+        except Exception as e:
+            # Not str(e): the request URL in it carries the access token
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            logger.error(f"Error fetching Instagram feed: {e.__class__.__name__} (HTTP status {status})")
+            # Keep the lock so no one else retries before RETRY_DELAY; the stale feed stays cached
+            cache.set(InstagramService.LOCK_KEY, 'failed', InstagramService.RETRY_DELAY)
+            return None
+        
+        cache.set(
+            InstagramService.CACHE_KEY,
+            {'items': media_items, 'fetched_at': time.time()},
+            InstagramService.STALE_TIMEOUT
+        )
+        cache.delete(InstagramService.LOCK_KEY)
+        return media_items
+    
+    @staticmethod
+    def get_master_feed():
+        """
+        The cached master feed, refreshed in the background when it is
+        older than CACHE_TIMEOUT. Without a cached feed, one request fetches
+        it while concurrent ones wait up to the API timeout for it.
+        """
+        if not settings.INSTAGRAM_ACCESS_TOKEN:
+            return []
+        
+        feed = cache.get(InstagramService.CACHE_KEY)
+        if feed is not None:
+            if time.time() - feed['fetched_at'] > InstagramService.CACHE_TIMEOUT:
+                if cache.add(InstagramService.LOCK_KEY, 'fetching', sum(InstagramService.TIMEOUT) * 2):
+                    _executor.submit(InstagramService.refresh_feed)
+            return feed['items']
+        
+        if cache.add(InstagramService.LOCK_KEY, 'fetching', sum(InstagramService.TIMEOUT) * 2):
+            return InstagramService.refresh_feed() or []
+        
+        # Another request is fetching the feed; after a failed attempt there is nothing to wait for
+        deadline = time.monotonic() + sum(InstagramService.TIMEOUT)
+        while time.monotonic() < deadline and cache.get(InstagramService.LOCK_KEY) == 'fetching':
+            time.sleep(0.1)
+        feed = cache.get(InstagramService.CACHE_KEY)
+        return feed['items'] if feed else []
     
     @staticmethod
-    def get_instagram_feed(count=8, media_type=None):
+    def get_instagram_feed(count=8, media_type=None, offset=0):
         """
         Get Instagram feed with photos and videos
         
         Args:
             count: Number of items to return
             media_type: Filter by media type ('IMAGE', 'VIDEO', 'CAROUSEL_ALBUM', None for all)
+            offset: Number of (matching) items to skip, for pagination
         
         Returns:
             List of Instagram media items with fields:
@@ -31,48 +135,15 @@ class InstagramService:
             - caption: Post caption
             - timestamp: When the media was posted
         """
-        # Check cache first
-        cache_key = f"{InstagramService.CACHE_KEY}_{count}_{media_type}"
-        cached_feed = cache.get(cache_key)
-        if cached_feed:
-            return cached_feed
-            
-        try:
-            # Instagram Graph API endpoint
-            base_url = "https://graph.instagram.com/me/media"
-            
-            # API parameters
-            params = {
-                'fields': 'id,media_type,media_url,permalink,thumbnail_url,caption,timestamp',
-                'access_token': settings.INSTAGRAM_ACCESS_TOKEN,
-                'limit': count * 2  # Request more to account for filtering
-            }
-            
-            # Make the API request
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()  # Raise exception for HTTP errors
-            
-            # Parse response
-            data = response.json()
-            media_items = data.get('data', [])
-            
-            # Filter by media type if specified
-            if media_type:
-                media_items = [item for item in media_items if item.get('media_type') == media_type]
-            
-            # Limit to requested count
-            media_items = media_items[:count]
-            
-            # Cache the result
-            cache.set(cache_key, media_items, InstagramService.CACHE_TIMEOUT)
-            
-            return media_items
-            
-        except Exception as e:
-            logger.error(f"Error fetching Instagram feed: {str(e)}")
-            return []
+        media_items = InstagramService.get_master_feed()
+        
+        # Filter by media type if specified
+        if media_type:
+            media_items = [item for item in media_items if item.get('media_type') == media_type]
+        
+        return media_items[offset:offset + count]
     
     @staticmethod
-    def get_instagram_videos(count=4):
+    def get_instagram_videos(count=4, offset=0):
         """Get Instagram videos only"""
-        return InstagramService.get_instagram_feed(count=count, media_type='VIDEO')
\ No newline at end of file
+        return InstagramService.get_instagram_feed(count=count, media_type='VIDEO', offset=offset)
@@ -0,0 +1,23 @@
+# core/management/commands/process_analytics.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import MAX_LATENCY, flush_events
+
+
+class Command(BaseCommand):
+    help = 'Write spooled analytics events (product views, page views, searches, activity) to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and flush periodically')
+        parser.add_argument('--interval', type=float, default=MAX_LATENCY, help='Seconds between flushes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            written = flush_events()
+            if written or not options['loop']:
+                self.stdout.write(f"Wrote {written} analytics events.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
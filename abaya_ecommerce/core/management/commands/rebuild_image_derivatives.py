@@ -0,0 +1,40 @@
+# core/management/commands/rebuild_image_derivatives.py
+from django.core.management.base import BaseCommand
+
+from core.images import delete_derivatives, generate_derivatives, iter_source_names
+from core.models import ImageDerivative
+from core.page_cache import invalidate_page_cache
+
+
+class Command(BaseCommand):
+    help = 'Create the resized WebP/JPEG derivatives of uploaded images that lack them or are out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these images (storage names, e.g. products/abaya.jpg)')
+        parser.add_argument('--force', action='store_true', help='Render the derivatives again even if they are up to date')
+        parser.add_argument('--prune', action='store_true', help='Also delete the derivatives of images that no longer exist')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(iter_source_names())
+        written = failed = 0
+        for name in names:
+            try:
+                written += generate_derivatives(name, force=options['force'])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+
+        pruned = 0
+        if options['prune'] and not options['names']:
+            orphans = set(ImageDerivative.objects.values_list('source_name', flat=True)) - set(names)
+            for name in orphans:
+                delete_derivatives(name)
+            pruned = len(orphans)
+
+        if written or pruned:
+            # Once per run, not per image: cached pages show the new srcsets
+            invalidate_page_cache('catalog')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} derivatives of {len(names)} images, {failed} failed, pruned {pruned} removed images."
+        ))
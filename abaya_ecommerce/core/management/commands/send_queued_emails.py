@@ -0,0 +1,31 @@
+# core/management/commands/send_queued_emails.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import BATCH_SIZE, send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Render and send the emails waiting in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and send new emails as they are queued')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait when the outbox is empty with --loop')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Emails sent over one connection')
+
+    def handle(self, *args, **options):
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = send_queued_emails(options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                if not sent and not failed:
+                    break
+
+            if total_sent or total_failed or not options['loop']:
+                self.stdout.write(f"Sent {total_sent} emails, {total_failed} failed.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -1,32 +1,61 @@
 # core/middleware.py
-import threading
+from contextvars import ContextVar
 
-# Thread local storage
-_thread_locals = threading.local()
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+# Context local storage; unlike a thread local this is isolated per request
+# under ASGI as well, where many requests share one thread or event loop.
+_current_request = ContextVar('current_request', default=None)
 
 def get_current_request():
     """
-    Returns the request object for the current thread.
+    Returns the request object for the current context.
     """
-    return getattr(_thread_locals, 'request', None)
+    return _current_request.get()
 
 class RequestMiddleware:
     """
-    Middleware that stores the request object in thread local storage.
+    Middleware that stores the request object in context local storage.
     This allows models to access the request (and session) to get the current currency.
+    
+    It also attaches ``request.pricing``, the pricing context for the request,
+    which is resolved once on first use and shared by every price rendered.
     """
     
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _attach_pricing(self, request):
+        from core.currency_utils import get_pricing_context
         
+        request.pricing = SimpleLazyObject(lambda: get_pricing_context(request))
+
     def __call__(self, request):
-        # Store request in thread local storage
-        _thread_locals.request = request
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         
-        # Process the request
-        response = self.get_response(request)
+        # Store request in context local storage
+        self._attach_pricing(request)
+        token = _current_request.set(request)
         
-        # Clear thread local storage
-        del _thread_locals.request
+        # Process the request
+        try:
+            return self.get_response(request)
+        finally:
+            # Clear context local storage
+            _current_request.reset(token)
+    
+    async def __acall__(self, request):
+        self._attach_pricing(request)
+        token = _current_request.set(request)
         
-        return response
\ No newline at end of file
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_outbox_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source_name', models.CharField(db_index=True, max_length=255)),
+                ('source_hash', models.CharField(max_length=64)),
+                ('format', models.CharField(choices=[('WEBP', 'WebP'), ('JPEG', 'JPEG')], max_length=4)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('file', models.ImageField(max_length=255, upload_to='derivatives/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Image Derivative',
+                'verbose_name_plural': 'Image Derivatives',
+                'ordering': ['source_name', 'format', 'width'],
+                'unique_together': {('source_name', 'format', 'width')},
+            },
+        ),
+    ]
@@ -3,7 +3,9 @@ from django.db import models
 # Create your models here.
 # core/models.py
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class Setting(models.Model):
@@ -105,6 +107,42 @@ class EmailLog(models.Model):
         return f"Email to {self.recipient} ({self.status})"
 
 
+class OutboxEmail(models.Model):
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.EmailField()
+    from_email = models.CharField(max_length=255, blank=True, null=True)
+    subject = models.CharField(max_length=255, blank=True)
+    # What to render: an EmailTemplate by name, or template files (with the
+    # subject above), or a ready plain text body
+    template_name = models.CharField(max_length=100, blank=True, null=True)
+    html_template = models.CharField(max_length=255, blank=True, null=True)
+    text_template = models.CharField(max_length=255, blank=True, null=True)
+    body = models.TextField(blank=True, null=True)
+    context = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)  # Model instances are stored as references
+    user = models.ForeignKey('users.User', on_delete=models.SET_NULL, blank=True, null=True, related_name='queued_emails')
+    log = models.OneToOneField(EmailLog, on_delete=models.SET_NULL, blank=True, null=True, related_name='outbox_email')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING', db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = 'Outbox Email'
+        verbose_name_plural = 'Outbox Emails'
+        ordering = ['next_attempt_at']
+    
+    def __str__(self):
+        return f"Email to {self.recipient} ({self.status})"
+
+
 class ActivityLog(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='activity_logs')
@@ -114,7 +152,7 @@ class ActivityLog(models.Model):
     details = models.TextField(blank=True, null=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # Event time; rows are written later in batches
     
     class Meta:
         verbose_name = 'Activity Log'
@@ -122,4 +160,33 @@ class ActivityLog(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.user.email} - {self.action}"
\ No newline at end of file
+        return f"{self.user.email} - {self.action}"
+
+class ImageDerivative(models.Model):
+    """
+    A resized copy of an uploaded image (see core.images), for srcset.
+    Derivatives are named after the content hash of their source, so a
+    replaced upload gets new URLs and old ones can be cached forever.
+    """
+    FORMAT_CHOICES = (
+        ('WEBP', 'WebP'),
+        ('JPEG', 'JPEG'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    source_name = models.CharField(max_length=255, db_index=True)  # Storage name of the original upload
+    source_hash = models.CharField(max_length=64)
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to='derivatives/', max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Image Derivative'
+        verbose_name_plural = 'Image Derivatives'
+        ordering = ['source_name', 'format', 'width']
+        unique_together = ('source_name', 'format', 'width')
+    
+    def __str__(self):
+        return f"{self.source_name} ({self.format}, {self.width}w)"
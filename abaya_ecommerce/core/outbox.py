@@ -0,0 +1,263 @@
+# core/outbox.py
+import json
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .email_templates import email_template_cache
+from .models import EmailLog, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)  # seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 6 * 60 * 60)  # seconds
+# How long a worker holds the emails it claimed; if it dies they are retried after this
+LEASE = getattr(settings, 'EMAIL_OUTBOX_LEASE', 5 * 60)  # seconds
+
+MODEL_KEY = '__model__'
+
+def serialize_context(context):
+    """
+    Make a template context storable: model instances and querysets are
+    replaced by references that deserialize_context loads again, and
+    everything else is encoded to JSON right away.
+    
+    Raises:
+        TypeError: If a value cannot be stored, so the caller finds out
+            before the email is queued rather than when it is written
+            after the transaction commits
+    """
+    data = {}
+    for key, value in (context or {}).items():
+        if isinstance(value, models.Model):
+            value = {MODEL_KEY: value._meta.label, 'pk': str(value.pk)}
+        elif isinstance(value, models.QuerySet):
+            value = {MODEL_KEY: value.model._meta.label, 'pks': [str(pk) for pk in value.values_list('pk', flat=True)]}
+        try:
+            # Stored as the worker will read it back, whatever the caller changes later
+            data[key] = json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+        except (TypeError, ValueError) as e:
+            raise TypeError(f"Email context value '{key}' cannot be stored: {e}") from e
+    return data
+
+def deserialize_context(data):
+    """Load the model instances referenced by a context stored with serialize_context."""
+    context = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and MODEL_KEY in value:
+            model = apps.get_model(value[MODEL_KEY])
+            if 'pks' in value:
+                objects = model._default_manager.in_bulk(value['pks'])
+                value = [objects[pk] for pk in map(model._meta.pk.to_python, value['pks']) if pk in objects]
+            else:
+                value = model._default_manager.get(pk=value['pk'])
+        context[key] = value
+    return context
+
+def build_email(recipient, subject='', html_template=None, text_template=None, context=None,
+                template_name=None, body=None, user=None, from_email=None):
+    """
+    Build an unsaved outbox email for queue_emails.
+    
+    Args:
+        recipient: Email address
+        subject: Subject line (ignored with template_name)
+        html_template, text_template: Template files rendered with context
+        context: Template context; model instances are stored as references
+            and loaded again when the email is rendered, other values must
+            be JSON serializable (TypeError otherwise)
+        template_name: Name of an EmailTemplate to render instead of files
+        body: Plain text body, when there are no templates
+        user: User the email is for (optional)
+        from_email: Sender, defaults to DEFAULT_FROM_EMAIL
+    """
+    return OutboxEmail(
+        recipient=recipient,
+        from_email=from_email,
+        subject=subject[:255],
+        template_name=template_name,
+        html_template=html_template,
+        text_template=text_template,
+        body=body,
+        context=serialize_context(context),
+        user=user,
+    )
+
+def queue_emails(emails):
+    """
+    Queue unsaved outbox emails (see build_email) for the outbox worker
+    (manage.py send_queued_emails), with one insert per table however many
+    there are.
+    
+    The emails are rendered and sent by the worker, so the caller never
+    waits on the mail server. They are written to the outbox once the
+    current transaction commits, so nothing is sent for a rolled back order.
+    """
+    emails = list(emails)
+    
+    def enqueue():
+        logs = [
+            EmailLog(
+                recipient=email.recipient,
+                subject=email.subject or email.template_name or '',
+                body='',
+                user=email.user,
+                status='QUEUED',
+            )
+            for email in emails
+        ]
+        with transaction.atomic():
+            EmailLog.objects.bulk_create(logs, batch_size=500)
+            for email, log in zip(emails, logs):
+                email.log = log
+            OutboxEmail.objects.bulk_create(emails, batch_size=500)
+    
+    if emails:
+        transaction.on_commit(enqueue, robust=True)
+    return emails
+
+def queue_email(recipient, subject='', **kwargs):
+    """Queue one email for the outbox worker; takes the arguments of build_email."""
+    return queue_emails([build_email(recipient, subject, **kwargs)])[0]
+
+def get_template_defaults():
+    """Variables every EmailTemplate can use."""
+    from core.utils import get_settings
+    
+    return {
+        'site_name': get_settings('site', key='site_name', default='Abaya Ecommerce'),
+        'site_url': get_settings('site', key='site_url', default='https://example.com'),
+    }
+
+def render_email(email, defaults=None):
+    """
+    Render an outbox email.
+    
+    Args:
+        email: OutboxEmail
+        defaults: Result of get_template_defaults(), to share it across a batch
+    
+    Returns:
+        (subject, text, html, template_id) where html and template_id may be None
+    """
+    context = deserialize_context(email.context)
+    template_id = None
+    
+    if email.template_name:
+        template = email_template_cache.get(email.template_name)
+        if template is None:
+            raise ValueError(f"Email template '{email.template_name}' not found or is inactive.")
+        
+        # Add default context variables
+        for key, value in (defaults or get_template_defaults()).items():
+            context.setdefault(key, value)
+        
+        subject, html, text = template.render(context)
+        template_id = template.id
+    else:
+        subject = email.subject
+        html = render_to_string(email.html_template, context) if email.html_template else None
+        text = render_to_string(email.text_template, context) if email.text_template else email.body
+    
+    return subject, text or html or '', html, template_id
+
+def claim_emails(batch_size=BATCH_SIZE):
+    """
+    Claim up to batch_size due emails for this worker by pushing their next
+    attempt past the lease, so concurrent workers skip them.
+    """
+    now = timezone.now()
+    due = OutboxEmail.objects.filter(status='PENDING', next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    
+    lease_until = now + timedelta(seconds=LEASE)
+    due.filter(pk__in=ids).update(next_attempt_at=lease_until)
+    return list(OutboxEmail.objects.filter(pk__in=ids, next_attempt_at=lease_until).order_by('created_at'))
+
+def _mark_sent(email, subject, body, template_id):
+    now = timezone.now()
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        status='SENT', attempts=email.attempts + 1, sent_at=now, last_error=None
+    )
+    if email.log_id:
+        EmailLog.objects.filter(pk=email.log_id).update(
+            template_id=template_id, subject=subject[:255], body=body, status='SENT', sent_at=now, error_message=None
+        )
+
+def _mark_failed(email, error, retry=True):
+    attempts = email.attempts + 1
+    if retry and attempts < MAX_ATTEMPTS:
+        delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            attempts=attempts, next_attempt_at=timezone.now() + timedelta(seconds=delay), last_error=error
+        )
+        logger.warning(f"Email to {email.recipient} failed (attempt {attempts}), retrying in {delay}s: {error}")
+        return
+    
+    OutboxEmail.objects.filter(pk=email.pk).update(status='FAILED', attempts=attempts, last_error=error)
+    if email.log_id:
+        EmailLog.objects.filter(pk=email.log_id).update(status='FAILED', error_message=error)
+    logger.error(f"Giving up on email to {email.recipient} after {attempts} attempts: {error}")
+
+def send_queued_emails(batch_size=BATCH_SIZE):
+    """
+    Render and send one batch of due outbox emails over a single mail server
+    connection, updating their EmailLog rows.
+    
+    Returns:
+        (sent, failed) counts; failed emails are retried with backoff
+    """
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0, 0
+    
+    sent = failed = 0
+    defaults = get_template_defaults() if any(email.template_name for email in emails) else None
+    connection = get_connection()
+    try:
+        for email in emails:
+            try:
+                subject, text, html, template_id = render_email(email, defaults)
+            except Exception as e:
+                # Rendering fails the same way every time; do not retry
+                _mark_failed(email, str(e), retry=False)
+                failed += 1
+                continue
+            
+            message = EmailMultiAlternatives(
+                subject,
+                text,
+                email.from_email or settings.DEFAULT_FROM_EMAIL,
+                [email.recipient],
+                connection=connection,
+            )
+            if html:
+                message.attach_alternative(html, 'text/html')
+            
+            try:
+                # Opens the connection the first time (or after an error) and reuses it after that
+                connection.open()
+                message.send()
+            except Exception as e:
+                connection.close()
+                _mark_failed(email, str(e))
+                failed += 1
+                continue
+            
+            _mark_sent(email, subject, html or text, template_id)
+            sent += 1
+    finally:
+        connection.close()
+    
+    return sent, failed
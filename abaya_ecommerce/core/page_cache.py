@@ -0,0 +1,154 @@
+# core/page_cache.py
+import hashlib
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .currency_registry import currency_registry
+from .currency_utils import get_default_currency
+
+# Off unless enabled in settings; views opt in with @cache_anonymous_page
+ENABLED = getattr(settings, 'PAGE_CACHE_ENABLED', False)
+TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 10 * 60)  # seconds
+
+# What cached pages depend on; invalidate_page_cache() with a tag drops every page carrying it
+TAGS = ('catalog', 'currency', 'settings')
+
+# Rendered instead of the CSRF token in pages that are cached, and replaced
+# with the visitor's own token whenever such a page is served
+CSRF_PLACEHOLDER = 'page-cache-csrf-token'
+
+
+def _tag_key(tag):
+    return f'page_cache_tag:{tag}'
+
+
+def _get_tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def invalidate_page_cache(*tags):
+    """Serve every cached page carrying one of the tags (all tags if none are given) fresh on its next request."""
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags or TAGS}, None)
+
+
+def _get_currency_code(request):
+    # Like get_selected_currency(), without storing the default in a new session
+    currency_code = request.session.get('currency_code')
+    if currency_code and currency_registry.get(currency_code):
+        return currency_code
+    return get_default_currency().code
+
+
+def get_page_cache_key(request, tags=TAGS):
+    """
+    Cache key of a page: its URL with the query parameters sorted and blank
+    ones dropped (as filter forms submit them), the selected currency and
+    the current versions of its tags.
+    """
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values if value)
+    url = f"{request.get_host()}{request.path}?{urlencode(params)}"
+    return (
+        f"page_cache:{hashlib.md5(url.encode()).hexdigest()}:{_get_currency_code(request)}:"
+        f"{':'.join(_get_tag_versions(tags))}"
+    )
+
+
+def _is_cacheable(request):
+    if not ENABLED or request.method not in ('GET', 'HEAD'):
+        return False
+    
+    if request.user.is_authenticated:
+        return False
+    
+    # Pending messages and a guest cart show up in the page
+    if '_messages' in request.session or 'messages' in request.COOKIES:
+        return False
+    
+    from carts.summary import get_cart_summary
+    return not get_cart_summary(request)['cart_count']
+
+
+def _is_cacheable_response(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def _insert_csrf_token(request, content):
+    placeholder = CSRF_PLACEHOLDER.encode()
+    if placeholder in content:
+        content = content.replace(placeholder, get_token(request).encode())
+    return content
+
+
+def replay_on_hit(request, func, *args):
+    """
+    Call func(request, *args) now, and again whenever the page being
+    rendered is served from the cache, e.g. to record analytics events.
+    func must be a module-level function and args picklable.
+    """
+    func(request, *args)
+    replays = getattr(request, '_page_cache_replays', None)
+    if replays is not None:
+        replays.append((func, args))
+
+
+def cache_anonymous_page(view_func=None, *, tags=TAGS):
+    """
+    Serve a view's GET responses from the cache to anonymous visitors
+    without a cart or pending messages, keyed by get_page_cache_key().
+    Everyone else gets the view as usual.
+    
+    Calls registered with replay_on_hit() run on every cache hit as well.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+            
+            key = get_page_cache_key(request, tags)
+            entry = cache.get(key)
+            if entry is not None:
+                # Lets get_session_id() skip starting a session for analytics
+                request.page_cache_hit = True
+                for func, func_args in entry['replays']:
+                    func(request, *func_args)
+                return HttpResponse(_insert_csrf_token(request, entry['content']), content_type=entry['content_type'])
+            
+            request._page_cache_render = True
+            request._page_cache_replays = []
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                # Error pages rendered after an exception get the real token
+                request._page_cache_render = False
+                replays = request._page_cache_replays
+                request._page_cache_replays = None
+            
+            if _is_cacheable_response(response):
+                cache.set(key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'replays': replays,
+                }, TIMEOUT)
+            if not response.streaming:
+                response.content = _insert_csrf_token(request, response.content)
+            return response
+        return wrapper
+    
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
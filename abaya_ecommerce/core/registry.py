@@ -0,0 +1,68 @@
+# core/registry.py
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+class VersionedRegistry:
+    """
+    In-process snapshot of database state, loaded once and shared by all requests.
+
+    Changing the underlying data bumps a version key in Django's cache (see
+    invalidate). Every process compares that key with the version it loaded,
+    at most once every CHECK_INTERVAL seconds, and reloads when they differ.
+
+    Subclasses set VERSION_CACHE_KEY and implement _load(). Snapshots are
+    shared between threads; treat them as read-only.
+    """
+
+    VERSION_CACHE_KEY = None
+    CHECK_INTERVAL = 5  # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0
+
+    def _get_shared_version(self):
+        """Get the version shared by all workers, creating it if the cache has none."""
+        version = cache.get(self.VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.VERSION_CACHE_KEY, version, None):
+                version = cache.get(self.VERSION_CACHE_KEY, version)
+        return version
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _get_snapshot(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return self._snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return self._snapshot
+
+            version = self._get_shared_version()
+            if self._snapshot is None or version != self._version:
+                self._snapshot = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._snapshot
+
+    def get_version(self):
+        """Version of the snapshot in use, e.g. to key caches derived from it."""
+        self._get_snapshot()
+        return self._version
+
+    def invalidate(self):
+        """Drop the local copy and tell the other workers to reload theirs."""
+        cache.set(self.VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with self._lock:
+            self._snapshot = None
+            self._version = None
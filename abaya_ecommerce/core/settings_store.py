@@ -0,0 +1,64 @@
+# core/settings_store.py
+import copy
+from types import MappingProxyType
+
+from django.conf import settings
+
+from core.registry import VersionedRegistry
+
+
+def _copy(value):
+    # JSON settings are dicts or lists; hand out copies so callers cannot change the snapshot
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+class SettingsStore(VersionedRegistry):
+    """
+    In-process snapshot of all Setting rows with their typed values, grouped
+    by group and key, so reading a setting costs no query.
+    
+    Saving or deleting a Setting invalidates it (see core.signals).
+    """
+    
+    VERSION_CACHE_KEY = 'settings_store_version'
+    CHECK_INTERVAL = getattr(settings, 'SETTINGS_STORE_CHECK_INTERVAL', 5)  # seconds
+
+    def _load(self):
+        from .models import Setting
+        
+        # (all settings, public settings), each {group: {key: typed value}}
+        all_settings, public_settings = {}, {}
+        for setting in Setting.objects.all():
+            value = setting.get_typed_value()
+            all_settings.setdefault(setting.group, {})[setting.key] = value
+            if setting.is_public:
+                public_settings.setdefault(setting.group, {})[setting.key] = value
+
+        def freeze(groups):
+            return MappingProxyType({group: MappingProxyType(values) for group, values in groups.items()})
+        
+        return freeze(all_settings), freeze(public_settings)
+
+    def get(self, group=None, key=None, default=None, public_only=False):
+        """Look up settings like core.utils.get_settings."""
+        groups = self._get_snapshot()[1 if public_only else 0]
+        
+        if group and key:
+            values = groups.get(group)
+            if values is None or key not in values:
+                return default
+            return _copy(values[key])
+        
+        elif group:
+            return {key: _copy(value) for key, value in groups.get(group, {}).items()}
+        
+        else:
+            return {
+                group: {key: _copy(value) for key, value in values.items()}
+                for group, values in groups.items()
+            }
+
+
+settings_store = SettingsStore()
@@ -1,9 +1,16 @@
 # core/signals.py
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import EmailLog
+from products.models import Category, Color, Currency, ProductMedia, ReviewImage
+from .models import EmailLog, EmailTemplate, Setting
+from .currency_registry import currency_registry
+from .email_templates import email_template_cache
+from .images import delete_derivatives, schedule_derivatives
+from .page_cache import invalidate_page_cache
+from .settings_store import settings_store
 
 @receiver(post_save, sender=EmailLog)
 def update_email_status(sender, instance, created, **kwargs):
@@ -12,4 +19,75 @@ def update_email_status(sender, instance, created, **kwargs):
         # If the email is already marked as sent, no need to update
         if instance.status == 'SENT' and not instance.sent_at:
             instance.sent_at = timezone.now()
-            instance.save(update_fields=['sent_at'])
\ No newline at end of file
+            instance.save(update_fields=['sent_at'])
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def invalidate_currency_registry(sender, instance, **kwargs):
+    """Reload the currency registry in every worker once the change is committed."""
+    transaction.on_commit(currency_registry.invalidate)
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def invalidate_currency_pages(sender, instance, **kwargs):
+    """Cached pages show prices in the selected currency; serve them fresh after rate changes."""
+    transaction.on_commit(lambda: invalidate_page_cache('currency'))
+
+@receiver(post_save, sender=EmailTemplate)
+@receiver(post_delete, sender=EmailTemplate)
+def invalidate_email_template_cache(sender, instance, **kwargs):
+    """Recompile the template in every worker once the change is committed."""
+    transaction.on_commit(email_template_cache.invalidate)
+
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+def invalidate_settings_store(sender, instance, **kwargs):
+    """Reload settings in every worker once the change is committed."""
+    transaction.on_commit(settings_store.invalidate)
+
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+def invalidate_settings_pages(sender, instance, **kwargs):
+    """Cached pages show site settings; serve them fresh once a setting changes."""
+    transaction.on_commit(lambda: invalidate_page_cache('settings'))
+
+# Uploaded images that get resized derivatives (see core.images.SOURCES)
+IMAGE_FIELDS = {ProductMedia: 'file', Category: 'image', Color: 'image', ReviewImage: 'image'}
+
+def _get_image_name(sender, instance):
+    image = getattr(instance, IMAGE_FIELDS[sender])
+    if not image or getattr(instance, 'type', 'IMAGE') != 'IMAGE':
+        return None
+    return image.name
+
+@receiver(pre_save, sender=ProductMedia)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Color)
+@receiver(pre_save, sender=ReviewImage)
+def delete_replaced_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Delete the resized copies of an image that was replaced or removed once the change is committed."""
+    if raw or instance._state.adding:
+        return
+    old_name = sender.objects.filter(pk=instance.pk).values_list(IMAGE_FIELDS[sender], flat=True).first()
+    if old_name and old_name != _get_image_name(sender, instance):
+        transaction.on_commit(lambda: delete_derivatives(old_name))
+
+@receiver(post_save, sender=ProductMedia)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Color)
+@receiver(post_save, sender=ReviewImage)
+def generate_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Create the resized copies of an uploaded image in the background once it is committed."""
+    name = None if raw else _get_image_name(sender, instance)
+    if name:
+        transaction.on_commit(lambda: schedule_derivatives(name))
+
+@receiver(post_delete, sender=ProductMedia)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Color)
+@receiver(post_delete, sender=ReviewImage)
+def delete_image_derivatives(sender, instance, **kwargs):
+    """Delete the resized copies of a deleted image once the deletion is committed."""
+    name = _get_image_name(sender, instance)
+    if name:
+        transaction.on_commit(lambda: delete_derivatives(name))
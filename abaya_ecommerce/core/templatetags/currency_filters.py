@@ -1,8 +1,7 @@
 # Update core/templatetags/currency_filters.py with this implementation
 
 from django import template
-from core.currency_utils import convert_price, format_price
-from django.core.cache import cache
+from core.currency_utils import get_current_pricing
 
 register = template.Library()
 
@@ -15,23 +14,8 @@ def convert_currency_filter(price, to_currency=None):
     if not price:
         return 0
     
-    # If no currency specified, use the selected currency from context
-    if not to_currency:
-        from core.middleware import get_current_request
-        request = get_current_request()
-        if request:
-            from core.currency_utils import get_selected_currency
-            to_currency = get_selected_currency(request)
-    
-    # Get the default currency (prices are stored in this currency)
-    from products.models import Currency
-    try:
-        default_currency = Currency.objects.get(is_default=True)
-    except Currency.DoesNotExist:
-        return price
-    
-    # Convert the price
-    return convert_price(price, default_currency, to_currency)
+    # If no currency specified, use the pricing context of the current request
+    return get_current_pricing(to_currency or None).convert(price)
 
 @register.filter(name='format_currency')
 def format_currency_filter(price, currency=None):
@@ -43,15 +27,8 @@ def format_currency_filter(price, currency=None):
     if not price:
         return ''
     
-    # If no currency specified, use the selected currency from context
-    if not currency:
-        from core.middleware import get_current_request
-        request = get_current_request()
-        if request:
-            from core.currency_utils import get_selected_currency
-            currency = get_selected_currency(request)
-    
-    return format_price(price, currency)
+    # If no currency specified, use the pricing context of the current request
+    return get_current_pricing(currency or None).format(price)
 
 @register.filter(name='currency')
 def currency_filter(price, currency=None):
@@ -62,21 +39,5 @@ def currency_filter(price, currency=None):
     if not price:
         return ''
     
-    # If no currency specified, use the selected currency from context
-    if not currency:
-        from core.middleware import get_current_request
-        request = get_current_request()
-        if request:
-            from core.currency_utils import get_selected_currency
-            currency = get_selected_currency(request)
-    
-    # Get the default currency (prices are stored in this currency)
-    from products.models import Currency
-    try:
-        default_currency = Currency.objects.get(is_default=True)
-    except Currency.DoesNotExist:
-        return format_price(price, currency)
-    
-    # Convert and format the price
-    converted_price = convert_price(price, default_currency, currency)
-    return format_price(converted_price, currency)
\ No newline at end of file
+    # If no currency specified, use the pricing context of the current request
+    return get_current_pricing(currency or None).display(price)
\ No newline at end of file
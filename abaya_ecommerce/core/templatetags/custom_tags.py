@@ -1,6 +1,8 @@
 # core/templatetags/custom_tags.py
 from django import template
 
+from core.fragment_cache import get_product_card_key
+
 register = template.Library()
 
 @register.simple_tag
@@ -14,4 +16,16 @@ def url_replace(request, field, value):
     query_dict = request.GET.copy()
     query_dict[field] = value
     
-    return query_dict.urlencode()
\ No newline at end of file
+    return query_dict.urlencode()
+
+@register.simple_tag(takes_context=True)
+def product_card_key(context, product):
+    """
+    Cache key of a product card, for the {% cache %} tag. Changes whenever
+    the card would render differently (see core.fragment_cache).
+    
+    Usage:
+        {% product_card_key product as card_key %}
+        {% cache 86400 product_card card_key %}...{% endcache %}
+    """
+    return get_product_card_key(context.get('request'), product)
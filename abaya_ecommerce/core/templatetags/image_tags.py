@@ -0,0 +1,35 @@
+# core/templatetags/image_tags.py
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core.images import get_derivatives
+
+register = template.Library()
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    Render an uploaded image as a <picture> with WebP and JPEG srcsets of
+    its resized derivatives (see core.images), so browsers download the
+    smallest copy that fits. Images without derivatives yet are rendered
+    as they are.
+    
+    Usage: {% responsive_image product.default_image product.name sizes="(max-width: 768px) 50vw, 25vw" class="img-fluid" %}
+    """
+    if not image:
+        return ''
+    
+    derivatives = get_derivatives(image.name)
+    attrs = flatatt({'alt': alt, 'loading': 'lazy', **attrs})
+    jpeg = derivatives.get('JPEG')
+    if not jpeg:
+        return format_html('<img src="{}"{}>', image.url, attrs)
+    
+    webp = derivatives.get('WEBP', [])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        ', '.join(f'{url} {width}w' for width, url in webp), sizes,
+        jpeg[-1][1], ', '.join(f'{url} {width}w' for width, url in jpeg), sizes,
+        attrs,
+    )
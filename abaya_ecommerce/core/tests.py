@@ -1,3 +1,131 @@
-from django.test import TestCase
+# core/tests.py
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from products.models import Color
+
+from . import instagram_service
+from .instagram_service import InstagramService
+
+FEED_PAGES = [
+    {
+        'data': [
+            {'id': '1', 'media_type': 'IMAGE'},
+            {'id': '2', 'media_type': 'VIDEO'},
+            {'id': '3', 'media_type': 'IMAGE'},
+        ],
+        'paging': {'next': 'https://graph.instagram.com/me/media?after=3'},
+    },
+    {
+        'data': [
+            {'id': '4', 'media_type': 'VIDEO'},
+            {'id': '5', 'media_type': 'CAROUSEL_ALBUM'},
+        ],
+    },
+]
+
+
+def api_response(data):
+    return mock.Mock(**{'json.return_value': data})
+
+
+@override_settings(INSTAGRAM_ACCESS_TOKEN='token')
+class InstagramServiceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # Refresh in the calling thread instead of the background executor
+        patcher = mock.patch.object(instagram_service, '_executor', mock.Mock(submit=lambda func: func()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cache.clear)
+
+    def test_feed_is_sliced_from_master_feed(self):
+        with mock.patch('requests.get', side_effect=[api_response(page) for page in FEED_PAGES]) as get:
+            feed = InstagramService.get_instagram_feed(count=2, offset=1)
+            videos = InstagramService.get_instagram_videos()
+            images = InstagramService.get_instagram_feed(media_type='IMAGE')
+        
+        # Both result pages are fetched once, and the next page URL carries the parameters
+        self.assertEqual(get.call_count, 2)
+        self.assertIsNone(get.call_args_list[1].kwargs['params'])
+        self.assertEqual([item['id'] for item in feed], ['2', '3'])
+        self.assertEqual([item['id'] for item in videos], ['2', '4'])
+        self.assertEqual([item['id'] for item in images], ['1', '3'])
+
+    def test_concurrent_requests_share_one_fetch(self):
+        fetching = threading.Event()
+        release = threading.Event()
+
+        def slow_get(url, params=None, timeout=None):
+            fetching.set()
+            release.wait(5)
+            return api_response(FEED_PAGES[1])
+        
+        results = []
+        with mock.patch('requests.get', side_effect=slow_get) as get:
+            first = threading.Thread(target=lambda: results.append(InstagramService.get_master_feed()))
+            first.start()
+            fetching.wait(5)
+            # Waits for the fetch under way instead of calling the API as well
+            second = threading.Thread(target=lambda: results.append(InstagramService.get_master_feed()))
+            second.start()
+            time.sleep(0.2)
+            release.set()
+            first.join(5)
+            second.join(5)
+        
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(results, [FEED_PAGES[1]['data']] * 2)
+
+    def test_stale_feed_is_served_when_refresh_fails(self):
+        stale = [{'id': '1', 'media_type': 'IMAGE'}]
+        cache.set(InstagramService.CACHE_KEY, {
+            'items': stale, 'fetched_at': time.time() - InstagramService.CACHE_TIMEOUT - 1,
+        })
+        
+        with mock.patch('requests.get', side_effect=requests.ConnectionError) as get:
+            self.assertEqual(InstagramService.get_master_feed(), stale)
+            # Not retried before RETRY_DELAY
+            self.assertEqual(InstagramService.get_master_feed(), stale)
+        
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(cache.get(InstagramService.CACHE_KEY)['items'], stale)
+
+    def test_failed_first_fetch_returns_empty_feed(self):
+        with mock.patch('requests.get', return_value=mock.Mock(**{'raise_for_status.side_effect': requests.HTTPError})):
+            self.assertEqual(InstagramService.get_instagram_feed(), [])
+        self.assertIsNone(cache.get(InstagramService.CACHE_KEY))
+
+
+class ImageDerivativeSignalTests(TestCase):
+    def setUp(self):
+        # No background rendering of files that do not exist
+        patcher = mock.patch('core.signals.schedule_derivatives')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.color = Color.objects.create(name='Maroon', image='colors/maroon.jpg')
+
+    def save(self):
+        with mock.patch('core.signals.delete_derivatives') as delete_derivatives:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.color.save()
+        return delete_derivatives
+
+    def test_replaced_image_derivatives_are_deleted(self):
+        self.color.image = 'colors/maroon-2.jpg'
+        self.save().assert_called_once_with('colors/maroon.jpg')
+
+    def test_removed_image_derivatives_are_deleted(self):
+        self.color.image = None
+        self.save().assert_called_once_with('colors/maroon.jpg')
+
+    def test_unchanged_image_derivatives_are_kept(self):
+        self.color.name = 'Burgundy'
+        self.save().assert_not_called()
@@ -1,7 +1,6 @@
 # core/utils.py
 import json
-from django.utils import timezone
-from .models import ActivityLog, Setting, EmailTemplate, EmailLog
+from .models import ActivityLog
 
 def log_activity(request, action, entity_type=None, entity_id=None, details=None):
     """
@@ -31,8 +30,9 @@ def log_activity(request, action, entity_type=None, entity_id=None, details=None
     # Get user agent
     user_agent = request.META.get('HTTP_USER_AGENT', '')
     
-    # Create activity log
-    ActivityLog.objects.create(
+    # Queue activity log; it is written in batches by core.analytics
+    from core.analytics import record_event
+    record_event(ActivityLog(
         user=user,
         action=action,
         entity_type=entity_type,
@@ -40,11 +40,12 @@ def log_activity(request, action, entity_type=None, entity_id=None, details=None
         details=details,
         ip_address=ip_address,
         user_agent=user_agent
-    )
+    ))
 
 def get_settings(group=None, key=None, default=None, public_only=False):
     """
-    Get settings from the database.
+    Get settings from the in-process settings store (see core.settings_store),
+    which only queries the database again after a setting changes.
     
     Args:
         group: Settings group (e.g., 'site', 'email')
@@ -57,39 +58,17 @@ def get_settings(group=None, key=None, default=None, public_only=False):
         If only group provided: Dict of settings in that group
         If neither provided: Dict of all settings grouped by group
     """
-    query = Setting.objects.all()
+    from .settings_store import settings_store
     
-    if public_only:
-        query = query.filter(is_public=True)
-    
-    if group and key:
-        # Get specific setting
-        try:
-            setting = query.get(group=group, key=key)
-            return setting.get_typed_value()
-        except Setting.DoesNotExist:
-            return default
-    
-    elif group:
-        # Get all settings in group
-        settings_dict = {}
-        for setting in query.filter(group=group):
-            settings_dict[setting.key] = setting.get_typed_value()
-        return settings_dict
-    
-    else:
-        # Get all settings grouped by group
-        settings_dict = {}
-        for setting in query:
-            if setting.group not in settings_dict:
-                settings_dict[setting.group] = {}
-            settings_dict[setting.group][setting.key] = setting.get_typed_value()
-        return settings_dict
+    return settings_store.get(group, key, default, public_only)
 
 def send_template_email(template_name, recipient, context=None, user=None):
     """
     Send an email using a template from the database.
     
+    The email is queued in the outbox and rendered and sent by the
+    send_queued_emails worker; its EmailLog is updated there.
+    
     Args:
         template_name: Name of the template to use
         recipient: Email address of the recipient
@@ -97,85 +76,48 @@ def send_template_email(template_name, recipient, context=None, user=None):
         user: User object (optional)
         
     Returns:
-        True if the email was sent successfully, False otherwise
+        True once the email is queued, False if the context cannot be stored
     """
-    from django.core.mail import send_mail
-    from django.template import Template, Context
-    from django.conf import settings as django_settings
+    from core.models import EmailLog
+    from core.outbox import queue_email
     
     try:
-        # Get template
-        template = EmailTemplate.objects.get(name=template_name, is_active=True)
-        
-        # Create context
-        if context is None:
-            context = {}
-        
-        # Add default context variables
-        context['site_name'] = get_settings('site', key='site_name', default='Abaya Ecommerce')
-        context['site_url'] = get_settings('site', key='site_url', default='https://example.com')
-        
-        # Render subject and content
-        subject_template = Template(template.subject)
-        html_template = Template(template.html_content)
-        
-        subject = subject_template.render(Context(context))
-        html_content = html_template.render(Context(context))
-        
-        # Render plain text content if available
-        text_content = None
-        if template.text_content:
-            text_template = Template(template.text_content)
-            text_content = text_template.render(Context(context))
-        
-        # Send email
-        send_mail(
-            subject,
-            text_content or html_content,
-            django_settings.DEFAULT_FROM_EMAIL,
-            [recipient],
-            html_message=html_content,
-            fail_silently=False
-        )
-        
-        # Log email
-        email_log = EmailLog.objects.create(
-            template=template,
-            recipient=recipient,
-            subject=subject,
-            body=html_content,
-            user=user,
-            status='SENT',
-            sent_at=timezone.now()
-        )
-        
-        return True
-    
-    except EmailTemplate.DoesNotExist:
-        # Log error
+        queue_email(recipient, template_name=template_name, context=context, user=user)
+    except TypeError as e:
         EmailLog.objects.create(
-            template=None,
             recipient=recipient,
-            subject=f"[Error] Template {template_name} not found",
-            body="",
-            user=user,
-            status='FAILED',
-            error_message=f"Email template '{template_name}' not found or is inactive."
-        )
-        return False
-    
-    except Exception as e:
-        # Log error
-        EmailLog.objects.create(
-            template=None,
-            recipient=recipient,
-            subject=f"[Error] Failed to send email",
+            subject="[Error] Failed to send email",
             body="",
             user=user,
             status='FAILED',
             error_message=str(e)
         )
         return False
+    return True
+
+def send_template_emails(template_name, messages):
+    """
+    Send a template from the database to many recipients, e.g. for a
+    notification run, queued with one insert per table. The outbox worker
+    renders every message from the template compiled once in
+    core.email_templates.
+    
+    Args:
+        template_name: Name of the template to use
+        messages: Iterable of (recipient, context, user) tuples; user may be None
+        
+    Returns:
+        Number of emails queued
+    
+    Raises:
+        TypeError: If a context cannot be stored; nothing is queued then
+    """
+    from core.outbox import build_email, queue_emails
+    
+    return len(queue_emails(
+        build_email(recipient, template_name=template_name, context=context, user=user)
+        for recipient, context, user in messages
+    ))
 
 def get_client_ip(request):
     """Get the client IP address from the request."""
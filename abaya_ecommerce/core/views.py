@@ -11,22 +11,17 @@ from products.models import Product, Category, Currency
 from .utils import log_activity, get_settings
 from .forms import ContactForm, NewsletterForm
 from .instagram_service import InstagramService  # Add this import
+from .currency_registry import currency_registry
+from .page_cache import cache_anonymous_page
 
+@cache_anonymous_page
 def home(request):
     """Display the home page with featured products, categories, etc."""
     # Get featured products
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:8]
-    
-    # Add default images to featured products
-    for product in featured_products:
-        product.default_image = product.get_default_image()
+    featured_products = Product.objects.filter(is_active=True, is_featured=True).with_default_image()[:8]
     
     # Get new arrivals
-    new_arrivals = Product.objects.filter(is_active=True).order_by('-created_at')[:8]
-    
-    # Add default images to new arrivals
-    for product in new_arrivals:
-        product.default_image = product.get_default_image()
+    new_arrivals = Product.objects.filter(is_active=True).order_by('-created_at').with_default_image()[:8]
     
     # Get top categories
     top_categories = Category.objects.filter(is_active=True)[:6]
@@ -57,15 +52,8 @@ def get_instagram_videos(request):
         # Calculate offset
         offset = (page - 1) * count
         
-        # Get Instagram videos
-        from .instagram_service import InstagramService
-        instagram_videos = InstagramService.get_instagram_videos(count=count + offset)
-        
-        # Get just the videos for this page
-        if offset < len(instagram_videos):
-            instagram_videos = instagram_videos[offset:offset + count]
-        else:
-            instagram_videos = []
+        # Get just the videos for this page (sliced from the cached feed)
+        instagram_videos = InstagramService.get_instagram_videos(count=count, offset=offset)
         
         # Format the response
         videos_data = []
@@ -114,17 +102,15 @@ def contact(request):
             subject = form.cleaned_data['subject']
             message = form.cleaned_data['message']
             
-            from django.core.mail import send_mail
             from django.conf import settings as django_settings
+            from core.outbox import queue_email
             
             admin_email = get_settings('email', key='admin_email', default=django_settings.DEFAULT_FROM_EMAIL)
             
-            send_mail(
+            queue_email(
+                admin_email,
                 f'Contact Form: {subject}',
-                f'Name: {name}\nEmail: {email}\n\nMessage:\n{message}',
-                django_settings.DEFAULT_FROM_EMAIL,
-                [admin_email],
-                fail_silently=False,
+                body=f'Name: {name}\nEmail: {email}\n\nMessage:\n{message}'
             )
             
             # Save activity log
@@ -177,9 +163,7 @@ def newsletter_signup(request):
                 )
             
             # Send confirmation email
-            from django.core.mail import send_mail
-            from django.conf import settings as django_settings
-            from django.template.loader import render_to_string
+            from core.outbox import queue_email
             
             subject = 'Newsletter Subscription Confirmation'
             context = {
@@ -187,16 +171,13 @@ def newsletter_signup(request):
                 'email': email,
                 'site_name': get_settings('site', key='site_name', default='Abaya Ecommerce')
             }
-            html_message = render_to_string('core/emails/newsletter_confirmation.html', context)
-            plain_message = render_to_string('core/emails/newsletter_confirmation_plain.html', context)
             
-            send_mail(
+            queue_email(
+                email,
                 subject,
-                plain_message,
-                django_settings.DEFAULT_FROM_EMAIL,
-                [email],
-                html_message=html_message,
-                fail_silently=False
+                html_template='core/emails/newsletter_confirmation.html',
+                text_template='core/emails/newsletter_confirmation_plain.html',
+                context=context
             )
             
             messages.success(request, 'Thank you for subscribing to our newsletter!')
@@ -239,11 +220,8 @@ def change_currency(request):
         currency_code = request.POST.get('currency_code')
         if currency_code:
             # Check if the currency exists and is active
-            try:
-                currency = Currency.objects.get(code=currency_code, is_active=True)
+            if currency_registry.get(currency_code):
                 request.session['currency_code'] = currency_code
-            except Currency.DoesNotExist:
-                pass
     
     # Redirect back to the referring page
     next_page = request.POST.get('next') or request.META.get('HTTP_REFERER', '/')
@@ -12,5 +12,5 @@ class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
     
-    # def ready(self):
-    #     import dashboard.signals  # Import signals
\ No newline at end of file
+    def ready(self):
+        import dashboard.signals  # Import signals
\ No newline at end of file
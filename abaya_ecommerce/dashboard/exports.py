@@ -0,0 +1,217 @@
+# dashboard/exports.py
+import csv
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, DecimalField, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Product, ProductView
+
+from .reports import day_start
+from .rollups import SALES_STATUSES
+from .timeseries import empty_sales, get_sales_series, zero_fill
+
+# Rows fetched from the database at a time; the response never holds more than one chunk
+CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+ZERO = Decimal('0.00')
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+ORDER_FIELDS = [
+    'id', 'order_number', 'created_at', 'status', 'payment_status', 'user__email', 'user__name',
+    'currency__code', 'subtotal', 'shipping_amount', 'tax_amount', 'discount_amount', 'total', 'coupon__code',
+]
+ORDER_ITEM_FIELDS = [
+    'order_id', 'product_id', 'product__sku', 'product__name', 'size__name', 'color__name', 'fabric__name',
+    'quantity', 'price', 'total',
+]
+CUSTOMER_FIELDS = [
+    'id', 'email', 'name', 'phone', 'role', 'is_active', 'created_at',
+    'order_count', 'total_spend', 'average_order_value', 'first_order_at', 'last_order_at',
+]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back each written line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """JSON encoder writing times in the local time zone, like the CSV export."""
+
+    def default(self, o):
+        if isinstance(o, datetime) and timezone.is_aware(o):
+            o = timezone.localtime(o)
+        return super().default(o)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+def _iter_csv(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_cell(row.get(column)) for column in columns])
+
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=ExportJSONEncoder) + '\n'
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def get_export_format(request):
+    """Export format requested with ?format=, csv by default."""
+    export_format = request.GET.get('format', 'csv')
+    return export_format if export_format in EXPORT_FORMATS else 'csv'
+
+
+def export_response(rows, columns, export_format, filename):
+    """
+    Stream rows to the client as a CSV or NDJSON download.
+    
+    Args:
+        rows: Iterable of dicts, consumed lazily while the response is sent
+        columns: Keys written to the CSV, in order; NDJSON writes whole rows
+        export_format: 'csv' or 'ndjson'
+        filename: Name of the download without the extension
+    """
+    content_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'ndjson':
+        content = _iter_ndjson(rows)
+    else:
+        content = _iter_csv(rows, columns)
+    
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+def iter_orders(orders, chunk_size=CHUNK_SIZE):
+    """
+    Orders of a queryset with their line items, as dicts with an 'items'
+    list. The items of each chunk of orders are fetched with one query.
+    """
+    rows = orders.values(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        items = {}
+        for item in OrderItem.objects.filter(
+            order_id__in=[order['id'] for order in chunk]
+        ).values(*ORDER_ITEM_FIELDS).order_by('created_at'):
+            items.setdefault(item.pop('order_id'), []).append(item)
+        
+        for order in chunk:
+            order['items'] = items.get(order['id'], [])
+            yield order
+
+
+def iter_order_lines(orders):
+    """One row per line item, with the order's columns repeated, for flat formats like CSV."""
+    for order in orders:
+        items = order.pop('items')
+        for item in items or [{}]:
+            yield {**order, **{f'item_{key}': value for key, value in item.items()}}
+
+
+ORDER_LINE_COLUMNS = ORDER_FIELDS + [f'item_{field}' for field in ORDER_ITEM_FIELDS if field != 'order_id']
+
+
+def iter_customers(users, chunk_size=CHUNK_SIZE):
+    """Customers of a queryset with their lifetime order statistics."""
+    return users.annotate(
+        order_count=Count('orders'),
+        total_spend=Sum('orders__total'),
+        average_order_value=Round(Avg('orders__total'), 2),
+        first_order_at=Min('orders__created_at'),
+        last_order_at=Max('orders__created_at'),
+    ).values(*CUSTOMER_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _per_product(queryset, **aggregate):
+    """Subquery of one aggregate of a queryset for the product of the outer row."""
+    (name, expression), = aggregate.items()
+    return Subquery(
+        queryset.filter(product_id=OuterRef('pk')).values('product_id').annotate(**{name: expression}).values(name)
+    )
+
+
+def iter_product_report(first_day, last_day, category=None, chunk_size=CHUNK_SIZE):
+    """Units sold, revenue, orders and views of every product sold or viewed in a date range."""
+    start, end = day_start(first_day), day_start(last_day + timedelta(days=1))
+    
+    products = Product.objects.all()
+    # Apply category filter if provided (including subcategories)
+    if category:
+        products = Product.objects.in_category(category)
+    
+    sold = OrderItem.objects.filter(
+        order__created_at__gte=start, order__created_at__lt=end, order__status__in=SALES_STATUSES
+    ).order_by()
+    views = ProductView.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+    
+    # Subqueries rather than joins, so sales and views don't multiply each other
+    return products.annotate(
+        total_quantity=Coalesce(_per_product(sold, total_quantity=Sum('quantity')), 0),
+        total_revenue=Coalesce(
+            _per_product(sold, total_revenue=Sum(F('quantity') * F('price'))), Value(ZERO),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+        order_count=Coalesce(_per_product(sold, order_count=Count('order', distinct=True)), 0),
+        view_count=Coalesce(_per_product(views, view_count=Count('id')), 0),
+    ).filter(
+        Q(total_quantity__gt=0) | Q(view_count__gt=0)
+    ).values(
+        'id', 'sku', 'name', 'total_quantity', 'total_revenue', 'order_count', 'view_count'
+    ).order_by('-total_revenue', 'name').iterator(chunk_size=chunk_size)
+
+
+def iter_customer_report(first_day, last_day, chunk_size=CHUNK_SIZE):
+    """Orders and spend of every customer who ordered in a date range."""
+    start, end = day_start(first_day), day_start(last_day + timedelta(days=1))
+    
+    return Order.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end
+    ).values(
+        'user_id', 'user__email', 'user__name'
+    ).annotate(
+        order_count=Count('id'),
+        total_spend=Sum('total'),
+        first_order_at=Min('created_at'),
+        last_order_at=Max('created_at'),
+    ).order_by('-total_spend', 'user__email').iterator(chunk_size=chunk_size)
+
+
+def iter_sales_report(first_day, last_day, period='daily'):
+    """Revenue, sales, average order value and units sold per day, week, month or year of a date range."""
+    start, end = day_start(first_day), day_start(last_day + timedelta(days=1))
+    
+    # One row per bucket, so holding the series is fine; gaps are written as zero
+    series = zero_fill(get_sales_series(start, end, period), first_day, last_day, period, empty_sales)
+    for bucket, row in series.items():
+        yield {'period_start': bucket, **row}
@@ -0,0 +1,25 @@
+# dashboard/management/commands/compact_sales_rollups.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dashboard.rollups import compact_rollups
+
+
+class Command(BaseCommand):
+    help = "Recount today's hourly sales rollups and compact earlier days into daily ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Recount the rollups of the last N days as well')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.now() - timedelta(days=options['days'])
+        
+        hours, days = compact_rollups(since)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {hours} hourly and {days} daily sales rollups."
+        ))
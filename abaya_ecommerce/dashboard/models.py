@@ -41,4 +41,57 @@ class ActivityLogEntry(models.Model):
         ordering = ['-created_at']
         
     def __str__(self):
-        return f"{self.user.email} - {self.action} - {self.entity_type} - {self.created_at}"
\ No newline at end of file
+        return f"{self.user.email} - {self.action} - {self.entity_type} - {self.created_at}"
+
+
+class SalesRollup(models.Model):
+    """
+    Sales, customer and traffic totals per hour or day, maintained by
+    dashboard.rollups for the dashboard home page.
+
+    A day is either covered by hourly rows (today, until it is compacted)
+    or by a single daily row, never both.
+    """
+    PERIOD_CHOICES = (
+        ('HOUR', 'Hour'),
+        ('DAY', 'Day'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField(db_index=True)
+    order_count = models.PositiveIntegerField(default=0)  # All orders placed
+    sales_count = models.PositiveIntegerField(default=0)  # Orders shipped, delivered or completed
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Total of those orders
+    units_sold = models.PositiveIntegerField(default=0)
+    new_customers = models.PositiveIntegerField(default=0)
+    product_views = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Sales Rollup'
+        verbose_name_plural = 'Sales Rollups'
+        unique_together = ('period', 'period_start')
+        ordering = ['-period_start']
+    
+    def __str__(self):
+        return f"{self.get_period_display()} of {self.period_start}: {self.sales_count} sales, {self.revenue}"
+
+
+class ProductSalesRollup(models.Model):
+    """Units sold and revenue per product, for the same periods as SalesRollup."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='sales_rollups')
+    period = models.CharField(max_length=4, choices=SalesRollup.PERIOD_CHOICES)
+    period_start = models.DateTimeField(db_index=True)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = 'Product Sales Rollup'
+        verbose_name_plural = 'Product Sales Rollups'
+        unique_together = ('product', 'period', 'period_start')
+        ordering = ['-period_start']
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.quantity} sold ({self.get_period_display()} of {self.period_start})"
@@ -0,0 +1,503 @@
+# dashboard/reports.py
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Product, ProductView
+from users.models import User
+
+from .rollups import SALES_STATUSES
+from .timeseries import PERIOD_KEYS, bucket_start, empty_sales, get_period, get_sales_series
+
+logger = logging.getLogger(__name__)
+
+# How long the results of a closed day stay cached; changes to its orders invalidate them earlier
+CACHE_TIMEOUT = getattr(settings, 'REPORT_CACHE_TIMEOUT', 7 * 24 * 60 * 60)  # seconds
+# Reports that need more uncached days than this are generated in the background
+SYNC_MAX_DAYS = getattr(settings, 'REPORT_SYNC_MAX_DAYS', 92)
+JOB_TIMEOUT = getattr(settings, 'REPORT_JOB_TIMEOUT', 60 * 60)  # seconds
+# A running job refreshes its entry every JOB_HEARTBEAT_INTERVAL; one whose process died
+# is resubmitted once its heartbeat is older than JOB_STALE_TIMEOUT
+JOB_HEARTBEAT_INTERVAL = getattr(settings, 'REPORT_JOB_HEARTBEAT_INTERVAL', 15)  # seconds
+JOB_STALE_TIMEOUT = getattr(settings, 'REPORT_JOB_STALE_TIMEOUT', 60)  # seconds
+
+DAY_VERSION_KEY = 'report_day_version:{}'
+JOB_KEY = 'report_job:{}'
+
+ZERO = Decimal('0.00')
+
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'REPORT_WORKERS', 2), thread_name_prefix='report')
+
+
+def get_date_range(request, default_days=30):
+    """
+    Read the start_date/end_date (YYYY-MM-DD) filters of a report, defaulting
+    to the last default_days days.
+    
+    Returns:
+        (start_date, end_date, first_day, last_day) as given and as dates
+    """
+    today = timezone.localdate()
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    
+    # Default to last 30 days if no dates provided
+    if not start_date:
+        start_date = (today - timedelta(days=default_days)).strftime('%Y-%m-%d')
+    if not end_date:
+        end_date = today.strftime('%Y-%m-%d')
+    
+    try:
+        first_day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        last_day = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        # Handle invalid dates
+        first_day, last_day = today - timedelta(days=default_days), today
+    
+    return start_date, end_date, first_day, last_day
+
+
+def day_start(day):
+    """Start of a local day, as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _iter_days(first, last):
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def invalidate_day(moment):
+    """Drop the cached report results of the day containing moment, e.g. after one of its orders changed."""
+    cache.set(DAY_VERSION_KEY.format(timezone.localdate(moment)), uuid.uuid4().hex, None)
+
+
+def _get_day_versions(days):
+    keys = {day: DAY_VERSION_KEY.format(day) for day in days}
+    versions = cache.get_many(list(keys.values()))
+    
+    # A day without a version (never cached, or evicted) gets a new one, so nothing older is reused
+    missing = {key: uuid.uuid4().hex for key in keys.values() if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {day: versions[key] for day, key in keys.items()}
+
+
+def _filters_key(filters):
+    return hashlib.md5(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class Report:
+    """
+    A dashboard report built from per-day partial results, so the results of
+    closed days can be cached and combined for any date range.
+    
+    Subclasses implement compute(), returning the partial result of each day
+    in a range from a few grouped queries, empty() and merge().
+    """
+    
+    name = None
+    # Bump when the partial results change shape, so older cached ones are not reused
+    version = 1
+
+    def compute(self, start, end, **filters):
+        """Partial results by local date for the days from start up to end."""
+        raise NotImplementedError
+
+    def empty(self):
+        """Partial result of a day without data."""
+        raise NotImplementedError
+
+    def merge(self, partials, **options):
+        """Combine the partial results of a range, {date: partial} in date order, into the report's context."""
+        raise NotImplementedError
+
+    def load(self, first_day, last_day, filters, max_missing=None):
+        """
+        Partial results of the days from first_day to last_day: closed days
+        from the cache where possible, the rest computed in one pass and
+        cached, and today always live.
+        
+        Returns:
+            {date: partial} for every day in date order, or None if more
+            than max_missing closed days would have to be computed
+        """
+        today = timezone.localdate()
+        closed = list(_iter_days(first_day, min(last_day, today - timedelta(days=1))))
+        
+        suffix = _filters_key(filters)
+        keys = {day: f"report:{self.name}:{self.version}:{day}:{version}:{suffix}" for day, version in _get_day_versions(closed).items()}
+        cached = cache.get_many(list(keys.values()))
+        partials = {day: cached[key] for day, key in keys.items() if key in cached}
+        
+        missing = [day for day in closed if day not in partials]
+        if max_missing is not None and len(missing) > max_missing:
+            return None
+        
+        if missing:
+            computed = self.compute(day_start(missing[0]), day_start(missing[-1] + timedelta(days=1)), **filters)
+            fresh = {day: computed.get(day, self.empty()) for day in missing}
+            cache.set_many({keys[day]: partial for day, partial in fresh.items()}, CACHE_TIMEOUT)
+            partials.update(fresh)
+        
+        if first_day <= today <= last_day:
+            computed = self.compute(day_start(today), day_start(today + timedelta(days=1)), **filters)
+            partials[today] = computed.get(today, self.empty())
+        
+        # Days after today have no data yet
+        return {day: partials.get(day) or self.empty() for day in _iter_days(first_day, last_day)}
+
+    def get(self, first_day, last_day, filters=None, background=True, **options):
+        """
+        Build the report for a date range.
+        
+        Args:
+            first_day, last_day: Dates of the range (inclusive)
+            filters: Filters the partial results depend on, e.g. a category
+            background: Generate ranges with more than SYNC_MAX_DAYS uncached
+                days in a background thread instead of during the request
+            options: Passed to merge(), e.g. the trend period
+        
+        Returns:
+            (context, job_id) where context is None and job_id can be polled
+            with get_job_status() while the report is generated
+        """
+        filters = filters or {}
+        job_id = _filters_key([self.name, first_day, last_day, filters])
+        job = cache.get(JOB_KEY.format(job_id))
+        if job and job['status'] == 'failed':
+            # Reported to the poller once; loading the report again retries
+            cache.delete(JOB_KEY.format(job_id))
+            job = None
+        elif job and job['status'] == 'running' and _is_stale(job):
+            # The process running the job died; start it again
+            cache.delete(JOB_KEY.format(job_id))
+            job = None
+        
+        max_missing = None
+        if background and not (job and job['status'] == 'done'):
+            max_missing = SYNC_MAX_DAYS
+        partials = self.load(first_day, last_day, filters, max_missing)
+        
+        if partials is None:
+            if cache.add(JOB_KEY.format(job_id), _running(), JOB_STALE_TIMEOUT):
+                _executor.submit(self._run_job, job_id, first_day, last_day, filters)
+            return None, job_id
+        
+        return self.merge(partials, **options), None
+
+    def _run_job(self, job_id, first_day, last_day, filters):
+        key = JOB_KEY.format(job_id)
+        stopped = threading.Event()
+        
+        def heartbeat():
+            while not stopped.wait(JOB_HEARTBEAT_INTERVAL):
+                cache.set(key, _running(), JOB_STALE_TIMEOUT)
+        
+        beating = threading.Thread(target=heartbeat, name=f'report-heartbeat-{job_id[:8]}', daemon=True)
+        beating.start()
+        try:
+            self.load(first_day, last_day, filters)
+            status = {'status': 'done'}
+        except Exception as e:
+            logger.exception(f"Generating the {self.name} report failed")
+            status = {'status': 'failed', 'error': str(e)}
+        finally:
+            # Stop the heartbeat first so it cannot overwrite the final status
+            stopped.set()
+            beating.join()
+            connection.close()
+        cache.set(key, status, JOB_TIMEOUT)
+
+
+def _running():
+    return {'status': 'running', 'heartbeat': timezone.now().timestamp()}
+
+
+def _is_stale(job):
+    return timezone.now().timestamp() - job.get('heartbeat', 0) > JOB_STALE_TIMEOUT
+
+
+def get_job_status(job_id):
+    """Status of a report generated in the background: running, done, failed or unknown."""
+    job = cache.get(JOB_KEY.format(job_id))
+    return job['status'] if job else 'unknown'
+
+
+class ProductReport(Report):
+    """Best selling, highest revenue and most viewed products, and sales per category."""
+    
+    name = 'products'
+
+    def empty(self):
+        return {'products': {}, 'views': {}, 'categories': {}}
+
+    def compute(self, start, end, category=None):
+        tz = timezone.get_current_timezone()
+        partials = {}
+        
+        order_items = OrderItem.objects.filter(
+            order__created_at__gte=start,
+            order__created_at__lt=end,
+            order__status__in=SALES_STATUSES
+        )
+        # Apply category filter if provided (including subcategories)
+        if category:
+            order_items = order_items.filter(product__in=Product.objects.in_category(category))
+        order_items = order_items.annotate(day=TruncDate('order__created_at', tzinfo=tz))
+        
+        # An order falls on a single day, so distinct orders per day add up over a range
+        products = order_items.values(
+            'day', 'product_id', 'product__name', 'product__sku'
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(F('quantity') * F('price')),
+            order_count=Count('order', distinct=True)
+        ).order_by()
+        for row in products:
+            partial = partials.setdefault(row['day'], self.empty())
+            partial['products'][row['product_id']] = (
+                row['product__name'], row['product__sku'],
+                row['total_quantity'], row['total_revenue'] or ZERO, row['order_count'],
+            )
+        
+        views = ProductView.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end
+        ).annotate(
+            day=TruncDate('created_at', tzinfo=tz)
+        ).values(
+            'day', 'product_id', 'product__name', 'product__sku'
+        ).annotate(
+            view_count=Count('id')
+        ).order_by()
+        for row in views:
+            partial = partials.setdefault(row['day'], self.empty())
+            partial['views'][row['product_id']] = (row['product__name'], row['product__sku'], row['view_count'])
+        
+        # Per product, so the distinct products of a category can be counted over a range
+        categories = order_items.values(
+            'day', 'product__categories__id', 'product__categories__name', 'product_id'
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(F('quantity') * F('price'))
+        ).order_by()
+        for row in categories:
+            partial = partials.setdefault(row['day'], self.empty())
+            name, quantity, revenue, product_ids = partial['categories'].get(
+                row['product__categories__id'], (row['product__categories__name'], 0, ZERO, frozenset())
+            )
+            partial['categories'][row['product__categories__id']] = (
+                name, quantity + row['total_quantity'], revenue + (row['total_revenue'] or ZERO),
+                product_ids | {row['product_id']},
+            )
+        
+        return partials
+
+    def merge(self, partials):
+        products, views, categories = {}, {}, {}
+        for partial in partials.values():
+            for product_id, (name, sku, quantity, revenue, orders) in partial['products'].items():
+                row = products.setdefault(product_id, {
+                    'product_id': product_id, 'product__name': name, 'product__sku': sku,
+                    'total_quantity': 0, 'total_revenue': ZERO, 'order_count': 0,
+                })
+                row['total_quantity'] += quantity
+                row['total_revenue'] += revenue
+                row['order_count'] += orders
+            for product_id, (name, sku, count) in partial['views'].items():
+                row = views.setdefault(product_id, {
+                    'product_id': product_id, 'product__name': name, 'product__sku': sku, 'view_count': 0,
+                })
+                row['view_count'] += count
+            for category_id, (name, quantity, revenue, product_ids) in partial['categories'].items():
+                row = categories.setdefault(category_id, {
+                    'product__categories__id': category_id, 'product__categories__name': name,
+                    'total_quantity': 0, 'total_revenue': ZERO, 'product_ids': set(),
+                })
+                row['total_quantity'] += quantity
+                row['total_revenue'] += revenue
+                row['product_ids'] |= product_ids
+        
+        for row in categories.values():
+            row['product_count'] = len(row.pop('product_ids'))
+        
+        products = list(products.values())
+        return {
+            'top_selling_products': sorted(products, key=lambda row: row['total_quantity'], reverse=True)[:20],
+            'highest_revenue_products': sorted(products, key=lambda row: row['total_revenue'], reverse=True)[:20],
+            'most_viewed_products': sorted(views.values(), key=lambda row: row['view_count'], reverse=True)[:20],
+            'categories_data': sorted(categories.values(), key=lambda row: row['total_revenue'], reverse=True),
+        }
+
+
+class CustomerReport(Report):
+    """Top customers, new customers over time and customer statistics."""
+    
+    name = 'customers'
+
+    def empty(self):
+        return {'customers': {}, 'new_customers': 0}
+
+    def compute(self, start, end):
+        tz = timezone.get_current_timezone()
+        partials = {}
+        
+        orders = Order.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end
+        ).annotate(
+            day=TruncDate('created_at', tzinfo=tz)
+        ).values(
+            'day', 'user_id', 'user__email', 'user__name'
+        ).annotate(
+            order_count=Count('id'),
+            total_spend=Sum('total')
+        ).order_by()
+        for row in orders:
+            partial = partials.setdefault(row['day'], self.empty())
+            partial['customers'][row['user_id']] = (
+                row['user__email'], row['user__name'], row['order_count'], row['total_spend'] or ZERO,
+            )
+        
+        signups = User.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end
+        ).annotate(
+            day=TruncDate('created_at', tzinfo=tz)
+        ).values('day').annotate(
+            count=Count('id')
+        ).order_by()
+        for row in signups:
+            partials.setdefault(row['day'], self.empty())['new_customers'] = row['count']
+        
+        return partials
+
+    def merge(self, partials, period='daily'):
+        period = get_period(period)
+        customers = {}
+        trend = {}
+        order_count, order_total = 0, ZERO
+        for day, partial in partials.items():
+            for user_id, (email, name, count, spend) in partial['customers'].items():
+                row = customers.setdefault(user_id, {
+                    'user_id': user_id, 'user__email': email, 'user__name': name,
+                    'order_count': 0, 'total_spend': ZERO,
+                })
+                row['order_count'] += count
+                row['total_spend'] += spend
+                order_count += count
+                order_total += spend
+            
+            bucket = bucket_start(day, period)
+            trend[bucket] = trend.get(bucket, 0) + partial['new_customers']
+        
+        key = 'day' if period == 'daily' else PERIOD_KEYS[period]
+        customers = list(customers.values())
+        return {
+            'top_customers_by_orders': sorted(customers, key=lambda row: row['order_count'], reverse=True)[:20],
+            'top_customers_by_spend': sorted(customers, key=lambda row: row['total_spend'], reverse=True)[:20],
+            'new_customers_trend': [{key: day_start(bucket), 'count': count} for bucket, count in trend.items()],
+            'stats': {
+                'new_customers': sum(partial['new_customers'] for partial in partials.values()),
+                'active_customers': len(customers),
+                'average_order_value': (order_total / order_count).quantize(Decimal('0.01')) if order_count else 0,
+            },
+        }
+
+
+class SalesReport(Report):
+    """Sales totals, top selling products and sales over time."""
+    
+    name = 'sales'
+    version = 2
+
+    def empty(self):
+        return {'total': ZERO, 'count': 0, 'units': 0, 'products': {}}
+
+    def compute(self, start, end):
+        partials = {}
+        
+        for row in get_sales_series(start, end, 'daily'):
+            partial = partials.setdefault(timezone.localdate(row['bucket']), self.empty())
+            partial['total'] = row['revenue']
+            partial['count'] = row['count']
+            partial['units'] = row['units']
+        
+        products = OrderItem.objects.filter(
+            order__created_at__gte=start,
+            order__created_at__lt=end,
+            order__status__in=SALES_STATUSES
+        ).annotate(
+            day=TruncDate('order__created_at', tzinfo=timezone.get_current_timezone())
+        ).values(
+            'day', 'product__name'
+        ).annotate(
+            total_quantity=Sum('quantity'),
+            total_value=Sum(F('quantity') * F('price'))
+        ).order_by()
+        for row in products:
+            partial = partials.setdefault(row['day'], self.empty())
+            partial['products'][row['product__name']] = (row['total_quantity'], row['total_value'] or ZERO)
+        
+        return partials
+
+    def merge(self, partials, period='daily'):
+        period = get_period(period)
+        total, count, units = ZERO, 0, 0
+        products = {}
+        buckets = {}
+        for day, partial in partials.items():
+            total += partial['total']
+            count += partial['count']
+            units += partial['units']
+            for name, (quantity, value) in partial['products'].items():
+                row = products.setdefault(name, {'product__name': name, 'total_quantity': 0, 'total_value': ZERO})
+                row['total_quantity'] += quantity
+                row['total_value'] += value
+            
+            row = buckets.setdefault(bucket_start(day, period), empty_sales())
+            row['revenue'] += partial['total']
+            row['count'] += partial['count']
+            row['units'] += partial['units']
+        
+        key = PERIOD_KEYS[period]
+        time_series = [
+            {
+                key: bucket, 'total': row['revenue'], 'count': row['count'], 'units': row['units'],
+                'average_order_value': (row['revenue'] / row['count']).quantize(Decimal('0.01')) if row['count'] else ZERO,
+            }
+            for bucket, row in buckets.items()
+        ]
+        
+        return {
+            'sales_data': {
+                'total_sales': total,
+                'total_orders': count,
+                'total_units': units,
+                'average_order_value': (total / count).quantize(Decimal('0.01')) if count else 0,
+            },
+            'top_products': sorted(products.values(), key=lambda row: row['total_quantity'], reverse=True)[:10],
+            'time_series': time_series,
+        }
+
+
+product_report = ProductReport()
+customer_report = CustomerReport()
+sales_report = SalesReport()
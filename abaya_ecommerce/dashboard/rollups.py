@@ -0,0 +1,223 @@
+# dashboard/rollups.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import ProductView
+from users.models import User
+
+from .models import ProductSalesRollup, SalesRollup
+
+# Order statuses that count as a sale
+SALES_STATUSES = ('COMPLETED', 'DELIVERED', 'SHIPPED')
+# Hours of today's rollups to recount on every run, to pick up late analytics writes and signups
+LOOKBACK_HOURS = getattr(settings, 'SALES_ROLLUP_LOOKBACK_HOURS', 3)
+
+ZERO = Decimal('0.00')
+
+
+def floor_hour(value):
+    """Start of the local hour containing value (the buckets follow TIME_ZONE)."""
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value):
+    """Start of the local day containing value."""
+    return timezone.localtime(value).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_day(day):
+    return floor_day(day + timedelta(hours=36))
+
+
+def _count_sales(start, end):
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+    sold = Q(status__in=SALES_STATUSES)
+    values = orders.aggregate(
+        order_count=Count('id'),
+        sales_count=Count('id', filter=sold),
+        revenue=Sum('total', filter=sold),
+    )
+    values['revenue'] = values['revenue'] or ZERO
+    
+    products = OrderItem.objects.filter(
+        order__created_at__gte=start, order__created_at__lt=end, order__status__in=SALES_STATUSES
+    ).values('product_id').annotate(quantity=Sum('quantity'), revenue=Sum('total')).order_by()
+    products = list(products)
+    values['units_sold'] = sum(row['quantity'] for row in products)
+    return values, products
+
+
+def _count_traffic(start, end):
+    return {
+        'new_customers': User.objects.filter(created_at__gte=start, created_at__lt=end).count(),
+        'product_views': ProductView.objects.filter(created_at__gte=start, created_at__lt=end).count(),
+    }
+
+
+def _write(period, start, values, products):
+    SalesRollup.objects.update_or_create(period=period, period_start=start, defaults=values)
+    ProductSalesRollup.objects.filter(period=period, period_start=start).delete()
+    ProductSalesRollup.objects.bulk_create([
+        ProductSalesRollup(
+            product_id=row['product_id'], period=period, period_start=start,
+            quantity=row['quantity'], revenue=row['revenue'] or ZERO,
+        )
+        for row in products
+    ], batch_size=500)
+
+
+@transaction.atomic
+def refresh_hour(hour, traffic=True):
+    """
+    Recount the hourly rollup of the hour containing the given time.
+    
+    Args:
+        hour: Any time within the hour
+        traffic: Also recount signups and product views; order changes only
+            need the sales figures
+    """
+    start = floor_hour(hour)
+    end = start + timedelta(hours=1)
+    values, products = _count_sales(start, end)
+    if traffic:
+        values.update(_count_traffic(start, end))
+    _write('HOUR', start, values, products)
+
+
+@transaction.atomic
+def refresh_day(day):
+    """
+    Recount the daily rollup of the day containing the given time and drop
+    its hourly rollups, which the daily one replaces.
+    """
+    start = floor_day(day)
+    end = _next_day(start)
+    values, products = _count_sales(start, end)
+    values.update(_count_traffic(start, end))
+    _write('DAY', start, values, products)
+    
+    SalesRollup.objects.filter(period='HOUR', period_start__gte=start, period_start__lt=end).delete()
+    ProductSalesRollup.objects.filter(period='HOUR', period_start__gte=start, period_start__lt=end).delete()
+
+
+def refresh_for_order(created_at):
+    """
+    Recount the rollup an order placed at created_at counts towards, after
+    the order was placed, changed status or was deleted.
+    """
+    today = floor_day(timezone.now())
+    if created_at >= today:
+        refresh_hour(created_at, traffic=False)
+    else:
+        refresh_day(created_at)
+
+
+def compact_rollups(since=None):
+    """
+    Bring the rollups up to date: recount the last LOOKBACK_HOURS of today
+    by the hour and replace the hourly rollups of every earlier day with a
+    daily one. Without rollups yet, everything since the first order,
+    signup or product view is counted.
+    
+    Args:
+        since: Also recount every day from this time on
+    
+    Returns:
+        (hours, days) numbers of hourly and daily rollups written
+    """
+    now = timezone.now()
+    today = floor_day(now)
+    
+    days = set()
+    if since is None and not SalesRollup.objects.exists():
+        # Signups and product views are rolled up too, and can predate the first order
+        firsts = [
+            model.objects.aggregate(first=Min('created_at'))['first'] for model in (Order, User, ProductView)
+        ]
+        since = min((first for first in firsts if first is not None), default=None)
+    if since is not None:
+        day = floor_day(since)
+        while day < today:
+            days.add(day)
+            day = _next_day(day)
+    
+    # Closed days that still have hourly rollups
+    for hour in SalesRollup.objects.filter(period='HOUR', period_start__lt=today).values_list('period_start', flat=True):
+        days.add(floor_day(hour))
+    
+    for day in sorted(days):
+        refresh_day(day)
+    
+    hours = 0
+    hour = max(floor_hour(now - timedelta(hours=LOOKBACK_HOURS)), today)
+    if since is not None:
+        hour = today
+    while hour <= now:
+        refresh_hour(hour)
+        hour += timedelta(hours=1)
+        hours += 1
+    
+    return hours, len(days)
+
+
+def get_window(days):
+    """Rollup rows covering the last `days` days, from the start of the first day up to now."""
+    start = floor_day(timezone.now() - timedelta(days=days))
+    return SalesRollup.objects.filter(period_start__gte=start), ProductSalesRollup.objects.filter(period_start__gte=start)
+
+
+def get_sales_summary(days):
+    """
+    Totals of the last `days` days from the rollups.
+    
+    Returns:
+        dict with order_count, sales_count, revenue, units_sold,
+        average_order_value, new_customers and product_views
+    """
+    rollups, _ = get_window(days)
+    summary = rollups.aggregate(
+        order_count=Sum('order_count'),
+        sales_count=Sum('sales_count'),
+        revenue=Sum('revenue'),
+        units_sold=Sum('units_sold'),
+        new_customers=Sum('new_customers'),
+        product_views=Sum('product_views'),
+    )
+    summary = {key: value or 0 for key, value in summary.items()}
+    summary['revenue'] = (summary['revenue'] or ZERO).quantize(Decimal('0.01'))
+    summary['average_order_value'] = (
+        (summary['revenue'] / summary['sales_count']).quantize(Decimal('0.01')) if summary['sales_count'] else ZERO
+    )
+    return summary
+
+
+def get_daily_trend(days):
+    """Revenue and number of sales per day of the last `days` days, for the dashboard chart, with days without sales as zero."""
+    from .timeseries import group_by_period, zero_fill
+    
+    rollups, _ = get_window(days)
+    trend = group_by_period(
+        rollups, 'period_start', 'daily',
+        revenue=Sum('revenue'),
+        count=Sum('sales_count'),
+    )
+    today = timezone.localdate()
+    trend = zero_fill(trend, today - timedelta(days=days), today, 'daily', lambda: {'revenue': ZERO, 'count': 0})
+    return [{'day': day, 'revenue': row['revenue'], 'count': row['count']} for day, row in trend.items()]
+
+
+def get_top_products(days, limit=5):
+    """Best selling products of the last `days` days by units sold."""
+    _, products = get_window(days)
+    return products.values(
+        'product_id', 'product__name', 'product__sku'
+    ).annotate(
+        quantity=Sum('quantity'),
+        revenue=Sum('revenue')
+    ).order_by('-quantity')[:limit]
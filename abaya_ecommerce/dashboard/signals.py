@@ -0,0 +1,28 @@
+# dashboard/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from orders.models import Order
+
+from .reports import invalidate_day
+from .rollups import refresh_for_order
+
+# Order fields the sales rollups and reports are counted from
+ROLLUP_FIELDS = {'status', 'total', 'created_at'}
+
+@receiver(post_save, sender=Order)
+def refresh_sales_rollup(sender, instance, created, update_fields=None, **kwargs):
+    """Recount the order's sales rollup and drop its day's cached reports once the change is committed."""
+    if created or update_fields is None or ROLLUP_FIELDS & set(update_fields):
+        created_at = instance.created_at
+        transaction.on_commit(lambda: invalidate_day(created_at))
+        # A failed recount is redone by the next compact_sales_rollups run
+        transaction.on_commit(lambda: refresh_for_order(created_at), robust=True)
+
+@receiver(post_delete, sender=Order)
+def refresh_sales_rollup_on_delete(sender, instance, **kwargs):
+    """Recount the sales rollup a deleted order was counted in."""
+    created_at = instance.created_at
+    transaction.on_commit(lambda: invalidate_day(created_at))
+    transaction.on_commit(lambda: refresh_for_order(created_at), robust=True)
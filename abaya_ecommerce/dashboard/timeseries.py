@@ -0,0 +1,136 @@
+# dashboard/timeseries.py
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+
+from .rollups import SALES_STATUSES
+
+# Bucket sizes of a time series, and the database function that truncates a time to its bucket
+PERIODS = {
+    'daily': TruncDay,
+    'weekly': TruncWeek,
+    'monthly': TruncMonth,
+    'yearly': TruncYear,
+}
+# Key of the bucket start in report rows, per period
+PERIOD_KEYS = {
+    'daily': 'date',
+    'weekly': 'week',
+    'monthly': 'month',
+    'yearly': 'year',
+}
+
+ZERO = Decimal('0.00')
+
+
+def get_period(value, default='daily'):
+    """A period name from a request parameter, falling back to default."""
+    return value if value in PERIODS else default
+
+
+def bucket_start(day, period):
+    """
+    First day of the bucket containing a date, the same as the Trunc
+    functions compute in the database (weeks start on Monday).
+    """
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if period == 'monthly':
+        return day.replace(day=1)
+    if period == 'yearly':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def iter_buckets(first_day, last_day, period):
+    """Start dates of every bucket from the one containing first_day to the one containing last_day."""
+    bucket = bucket_start(first_day, period)
+    while bucket <= last_day:
+        yield bucket
+        if period == 'weekly':
+            bucket += timedelta(days=7)
+        elif period == 'monthly':
+            bucket = date(bucket.year + bucket.month // 12, bucket.month % 12 + 1, 1)
+        elif period == 'yearly':
+            bucket = date(bucket.year + 1, 1, 1)
+        else:
+            bucket += timedelta(days=1)
+
+
+def group_by_period(queryset, field, period, **aggregates):
+    """
+    One grouped query of aggregates per bucket of a date/time field, in
+    the current time zone. Works on every database backend.
+    
+    Returns:
+        values() queryset of dicts with 'bucket' (an aware datetime for
+        datetime fields) and the aggregates, in time order
+    """
+    trunc = PERIODS[get_period(period)]
+    return queryset.annotate(
+        bucket=trunc(field, tzinfo=timezone.get_current_timezone())
+    ).values('bucket').annotate(**aggregates).order_by('bucket')
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def zero_fill(rows, first_day, last_day, period, empty):
+    """
+    Rows keyed by bucket start for every bucket of a date range, with
+    empty() for buckets without data.
+    
+    Args:
+        rows: Iterable of dicts with a 'bucket' date or datetime
+        empty: Callable returning the values of a bucket without data
+    
+    Returns:
+        {date: row} in date order; each row has its bucket as a date
+    """
+    rows = {_as_date(row['bucket']): row for row in rows}
+    filled = {}
+    for bucket in iter_buckets(first_day, last_day, period):
+        row = rows.get(bucket) or empty()
+        row['bucket'] = bucket
+        filled[bucket] = row
+    return filled
+
+
+def empty_sales():
+    return {'revenue': ZERO, 'count': 0, 'average_order_value': ZERO, 'units': 0}
+
+
+def get_sales_series(start, end, period='daily'):
+    """
+    Revenue, number of sales, average order value and units sold per
+    bucket of the sales placed from start up to end, in one grouped query.
+    Buckets without sales are left out; see zero_fill().
+    """
+    # Units per order as a subquery, so joining the items doesn't multiply the order totals
+    units = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+        units=Sum('quantity')
+    ).values('units')
+    
+    rows = group_by_period(
+        Order.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end,
+            status__in=SALES_STATUSES
+        ).annotate(order_units=Coalesce(Subquery(units), 0)),
+        'created_at', period,
+        revenue=Coalesce(Sum('total'), ZERO, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        count=Count('id'),
+        units=Sum('order_units'),
+    )
+    for row in rows:
+        row['revenue'] = row['revenue'].quantize(Decimal('0.01'))
+        row['average_order_value'] = (row['revenue'] / row['count']).quantize(Decimal('0.01'))
+        yield row
@@ -49,6 +49,7 @@ urlpatterns = [
     
     # Order Management
     path('orders/', views.order_list, name='order_list'),
+    path('orders/export/', views.order_export, name='order_export'),
     path('orders/<str:order_number>/', views.order_detail, name='order_detail'),
     path('orders/<str:order_number>/update-status/', views.order_update_status, name='order_update_status'),
     
@@ -60,6 +61,7 @@ urlpatterns = [
     
     # User Management
     path('users/', views.user_list, name='user_list'),
+    path('users/export/', views.user_export, name='user_export'),
     path('users/<uuid:uuid>/', views.user_detail, name='user_detail'),
     path('users/<uuid:uuid>/orders/', views.user_orders, name='user_orders'),
     
@@ -67,6 +69,10 @@ urlpatterns = [
     path('reports/sales/', views.sales_report, name='sales_report'),
     path('reports/products/', views.product_report, name='product_report'),
     path('reports/customers/', views.customer_report, name='customer_report'),
+    path('reports/sales/export/', views.sales_report_export, name='sales_report_export'),
+    path('reports/products/export/', views.product_report_export, name='product_report_export'),
+    path('reports/customers/export/', views.customer_report_export, name='customer_report_export'),
+    path('reports/status/<str:job_id>/', views.report_status, name='report_status'),
     
     # Activity Logs
     path('activity-logs/', views.activity_logs, name='activity_logs'),
@@ -61,7 +61,9 @@ from .order_views import (
     order_list,
     order_detail,
     order_update_status,
+    order_export,
     sales_report,
+    sales_report_export,
 )
 
 # Coupon management views
@@ -77,12 +79,16 @@ from .user_views import (
     user_list,
     user_detail,
     user_orders,
+    user_export,
 )
 
 # Report views
 from .report_views import (
     product_report,
     customer_report,
+    product_report_export,
+    customer_report_export,
+    report_status,
 )
 
 # Activity logs and settings views
@@ -98,7 +98,7 @@ def coupon_create(request):
     
     # Get categories and popular products for selection
     categories = Category.objects.filter(is_active=True)
-    popular_products = Product.objects.filter(is_active=True).order_by('-views')[:20]
+    popular_products = Product.objects.filter(is_active=True).order_by('-popularity_score')[:20]
     
     return render(request, 'dashboard/coupons/form.html', {
         'form': form,
@@ -161,7 +161,7 @@ def coupon_edit(request, uuid):
     
     # Get categories and popular products for selection
     categories = Category.objects.filter(is_active=True)
-    popular_products = Product.objects.filter(is_active=True).order_by('-views')[:20]
+    popular_products = Product.objects.filter(is_active=True).order_by('-popularity_score')[:20]
     
     # Get current selections
     selected_categories = CouponCategory.objects.filter(coupon=coupon).values_list('category_id', flat=True)
@@ -1,62 +1,49 @@
 # dashboard/views/dashboard_views.py
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.shortcuts import render
-from django.db.models import Count, Sum, Avg
-from django.db.models.functions import TruncDay
 from django.utils import timezone
 
 from orders.models import Order
-from products.models import Product, ProductView
+from products.models import Product
 from users.models import User
+from dashboard.rollups import floor_day, get_daily_trend, get_sales_summary, get_top_products
 from dashboard.utils import staff_member_required, log_admin_activity
 
+VISIT_LOG_INTERVAL = getattr(settings, 'DASHBOARD_VISIT_LOG_INTERVAL', 30 * 60)  # seconds
+
 @staff_member_required
 def dashboard_home(request):
     """Display the main dashboard with key metrics and charts."""
     # Get date range for filtering (default to last 30 days)
     days = int(request.GET.get('days', 30))
     end_date = timezone.now()
-    start_date = end_date - timezone.timedelta(days=days)
+    start_date = floor_day(end_date - timezone.timedelta(days=days))
+    
+    # Sales, customer and traffic totals come from the hourly/daily rollups (see dashboard.rollups)
+    summary = get_sales_summary(days)
     
     # Sales metrics
     sales_metrics = {
-        'total_revenue': Order.objects.filter(
-            created_at__gte=start_date,
-            status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-        ).aggregate(total=Sum('total'))['total'] or 0,
-        
-        'order_count': Order.objects.filter(
-            created_at__gte=start_date
-        ).count(),
-        
-        'average_order_value': Order.objects.filter(
-            created_at__gte=start_date,
-            status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-        ).aggregate(avg=Avg('total'))['avg'] or 0,
-        
+        'total_revenue': summary['revenue'],
+        'order_count': summary['order_count'],
+        'average_order_value': summary['average_order_value'],
         'pending_orders': Order.objects.filter(
             status='PENDING'
         ).count(),
     }
     
-    # Sales trend (daily)
-    sales_trend = Order.objects.filter(
-        created_at__gte=start_date,
-        status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-    ).annotate(
-        day=TruncDay('created_at')
-    ).values('day').annotate(
-        revenue=Sum('total'),
-        count=Count('id')
-    ).order_by('day')
+    # Sales trend (daily, days without sales as zero)
+    sales_trend = get_daily_trend(days)
     
     # Customer metrics
     customer_metrics = {
         'total_customers': User.objects.count(),
-        
-        'new_customers': User.objects.filter(
-            created_at__gte=start_date
-        ).count(),
-        
+        'new_customers': summary['new_customers'],
+        # Distinct customers cannot be summed across days, so they are counted from the (indexed) orders
         'active_customers': Order.objects.filter(
             created_at__gte=start_date
         ).values('user_id').distinct().count(),
@@ -70,42 +57,31 @@ def dashboard_home(request):
         
         'out_of_stock': 0,  # Would normally count products with inventory = 0
         
-        'product_views': ProductView.objects.filter(
-            created_at__gte=start_date
-        ).count(),
+        'product_views': summary['product_views'],
     }
     
     # Recent orders
     recent_orders = Order.objects.order_by('-created_at')[:10]
     
     # Top selling products
-    top_products = Order.objects.filter(
-        created_at__gte=start_date,
-        status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-    ).values(
-        'items__product__id',
-        'items__product__name',
-        'items__product__sku'
-    ).annotate(
-        quantity=Sum('items__quantity'),
-        revenue=Sum('items__total')
-    ).order_by('-quantity')[:5]
+    top_products = get_top_products(days)
     
-    # Log admin visit to dashboard
-    log_admin_activity(
-        request.user,
-        'OTHER',
-        'Dashboard',
-        None,
-        "Viewed admin dashboard",
-        request
-    )
+    # Log admin visit to dashboard, once per VISIT_LOG_INTERVAL rather than on every load
+    if cache.add(f'dashboard_home_visit:{request.user.pk}', True, VISIT_LOG_INTERVAL):
+        log_admin_activity(
+            request.user,
+            'OTHER',
+            'Dashboard',
+            None,
+            "Viewed admin dashboard",
+            request
+        )
     
     return render(request, 'dashboard/home.html', {
         'sales_metrics': sales_metrics,
         'customer_metrics': customer_metrics,
         'product_metrics': product_metrics,
-        'sales_trend': list(sales_trend),
+        'sales_trend': json.dumps(sales_trend, cls=DjangoJSONEncoder),
         'recent_orders': recent_orders,
         'top_products': top_products,
         'days': days,
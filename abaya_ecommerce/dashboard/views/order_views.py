@@ -1,7 +1,7 @@
 # dashboard/views/order_views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q, Sum, Count, F
+from django.db.models import Q
 from django.core.paginator import Paginator
 from django.http import HttpResponseRedirect, JsonResponse
 from django.urls import reverse
@@ -9,12 +9,17 @@ from django.db import transaction
 from django.utils import timezone
 
 from orders.models import Order, OrderItem, OrderStatusLog, Payment, Shipment, ShipmentLog
+from dashboard.exports import (
+    ORDER_LINE_COLUMNS, export_response, get_export_format, iter_order_lines, iter_orders,
+    iter_sales_report,
+)
 from dashboard.forms import OrderStatusForm, OrderFilterForm
+from dashboard.reports import get_date_range, sales_report as sales_report_cache
+from dashboard.timeseries import get_period
 from dashboard.utils import staff_member_required, log_admin_activity, paginate_queryset
 
-@staff_member_required
-def order_list(request):
-    """Display a list of orders with search and filter options."""
+def _filter_orders(request):
+    """Orders matching the filters of the order list, newest first, and the filter form."""
     # Initialize filter form
     filter_form = OrderFilterForm(request.GET)
     
@@ -51,6 +56,13 @@ def order_list(request):
         if date_to:
             orders = orders.filter(created_at__date__lte=date_to)
     
+    return filter_form, orders
+
+@staff_member_required
+def order_list(request):
+    """Display a list of orders with search and filter options."""
+    filter_form, orders = _filter_orders(request)
+    
     # Paginate results
     orders = paginate_queryset(request, orders, 20)
     
@@ -59,6 +71,18 @@ def order_list(request):
         'filter_form': filter_form,
     })
 
+@staff_member_required
+def order_export(request):
+    """Download the filtered orders with their line items as CSV (one row per item) or NDJSON."""
+    _, orders = _filter_orders(request)
+    export_format = get_export_format(request)
+    
+    rows = iter_orders(orders)
+    if export_format == 'csv':
+        rows = iter_order_lines(rows)
+    
+    return export_response(rows, ORDER_LINE_COLUMNS, export_format, f'orders-{timezone.localdate():%Y-%m-%d}')
+
 @staff_member_required
 def order_detail(request, order_number):
     """Display detailed information about an order."""
@@ -152,80 +176,28 @@ def order_update_status(request, order_number):
 def sales_report(request):
     """Generate and display sales reports."""
     # Get date range filters
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    
-    # Get period filter (daily, weekly, monthly)
-    period = request.GET.get('period', 'daily')
-    
-    # Default to last 30 days if no dates provided
-    if not start_date:
-        start_date = (timezone.now() - timezone.timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = timezone.now().strftime('%Y-%m-%d')
-    
-    # Convert string dates to datetime objects
-    try:
-        start_datetime = timezone.datetime.strptime(start_date, '%Y-%m-%d')
-        start_datetime = timezone.make_aware(start_datetime)
-        end_datetime = timezone.datetime.strptime(end_date, '%Y-%m-%d')
-        end_datetime = timezone.make_aware(end_datetime.replace(hour=23, minute=59, second=59))
-    except (ValueError, TypeError):
-        # Handle invalid dates
-        start_datetime = timezone.now() - timezone.timedelta(days=30)
-        end_datetime = timezone.now()
-    
-    # Query completed orders in the date range
-    orders = Order.objects.filter(
-        created_at__gte=start_datetime,
-        created_at__lte=end_datetime,
-        status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-    )
-    
-    # Calculate total sales and order count
-    sales_data = {
-        'total_sales': orders.aggregate(total=Sum('total'))['total'] or 0,
-        'total_orders': orders.count(),
-        'average_order_value': orders.aggregate(avg=Sum('total') / Count('id'))['avg'] or 0,
-    }
-    
-    # Get top selling products
-    top_products = OrderItem.objects.filter(
-        order__in=orders
-    ).values(
-        'product__name'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_value=Sum(F('quantity') * F('price'))
-    ).order_by('-total_quantity')[:10]
-    
-    # Generate time-series data based on selected period
-    if period == 'daily':
-        time_series = orders.values('created_at__date').annotate(
-            date=F('created_at__date'),
-            total=Sum('total'),
-            count=Count('id')
-        ).order_by('date')
-    elif period == 'weekly':
-        time_series = orders.extra(
-            select={'week': "EXTRACT(WEEK FROM created_at)"}
-        ).values('week').annotate(
-            total=Sum('total'),
-            count=Count('id')
-        ).order_by('week')
-    else:  # monthly
-        time_series = orders.extra(
-            select={'month': "EXTRACT(MONTH FROM created_at)"}
-        ).values('month').annotate(
-            total=Sum('total'),
-            count=Count('id')
-        ).order_by('month')
+    start_date, end_date, first_day, last_day = get_date_range(request)
+    
+    # Get period filter (daily, weekly, monthly, yearly)
+    period = get_period(request.GET.get('period'))
+    
+    # Closed days come from the report cache (see dashboard.reports)
+    report, job_id = sales_report_cache.get(first_day, last_day, period=period)
     
     return render(request, 'dashboard/reports/sales.html', {
-        'sales_data': sales_data,
-        'top_products': top_products,
-        'time_series': list(time_series),
+        **(report or {}),
+        'report_job': job_id,
         'start_date': start_date,
         'end_date': end_date,
         'period': period,
-    })
\ No newline at end of file
+    })
+
+@staff_member_required
+def sales_report_export(request):
+    """Download the sales totals per period of the sales report as CSV or NDJSON."""
+    start_date, end_date, first_day, last_day = get_date_range(request)
+    period = get_period(request.GET.get('period'))
+    
+    rows = iter_sales_report(first_day, last_day, period)
+    columns = ['period_start', 'revenue', 'count', 'average_order_value', 'units']
+    return export_response(rows, columns, get_export_format(request), f'sales-{period}-{start_date}-{end_date}')
@@ -55,9 +55,8 @@ def product_list(request):
         if price_max is not None:
             products = products.filter(price__lte=price_max)
     
-    # Add default image to each product
-    for product in products:
-        product.default_image = product.get_default_image()
+    # Default images are prefetched for the current page only
+    products = products.with_default_image()
     
     # Paginate results
     products = paginate_queryset(request, products, 10)
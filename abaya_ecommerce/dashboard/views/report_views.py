@@ -1,99 +1,37 @@
 # dashboard/views/report_views.py
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.db.models import Q, Count, Sum, Avg, F
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from django.utils import timezone
 from django.http import JsonResponse
 
-from orders.models import Order, OrderItem
-from products.models import Product, Category, ProductView
+from products.models import Category
 from users.models import User
+from dashboard.exports import export_response, get_export_format, iter_customer_report, iter_product_report
+from dashboard.reports import (
+    customer_report as customer_report_cache, day_start, get_date_range, get_job_status,
+    product_report as product_report_cache,
+)
+from dashboard.timeseries import get_period
 from dashboard.utils import staff_member_required
 
 @staff_member_required
 def product_report(request):
     """Generate and display product performance reports."""
     # Get date range filters
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    
-    # Default to last 30 days if no dates provided
-    if not start_date:
-        start_date = (timezone.now() - timezone.timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = timezone.now().strftime('%Y-%m-%d')
-    
-    # Convert string dates to datetime objects
-    try:
-        start_datetime = timezone.datetime.strptime(start_date, '%Y-%m-%d')
-        start_datetime = timezone.make_aware(start_datetime)
-        end_datetime = timezone.datetime.strptime(end_date, '%Y-%m-%d')
-        end_datetime = timezone.make_aware(end_datetime.replace(hour=23, minute=59, second=59))
-    except (ValueError, TypeError):
-        # Handle invalid dates
-        start_datetime = timezone.now() - timezone.timedelta(days=30)
-        end_datetime = timezone.now()
+    start_date, end_date, first_day, last_day = get_date_range(request)
     
     # Get category filter
     category_id = request.GET.get('category')
     
-    # Base query for order items in the date range
-    order_items = OrderItem.objects.filter(
-        order__created_at__gte=start_datetime,
-        order__created_at__lte=end_datetime,
-        order__status__in=['COMPLETED', 'DELIVERED', 'SHIPPED']
-    )
-    
-    # Apply category filter if provided
-    if category_id:
-        order_items = order_items.filter(product__categories__id=category_id)
-    
-    # Get top selling products
-    top_selling_products = order_items.values(
-        'product_id', 'product__name', 'product__sku'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price')),
-        order_count=Count('order', distinct=True)
-    ).order_by('-total_quantity')[:20]
-    
-    # Get products with the highest revenue
-    highest_revenue_products = order_items.values(
-        'product_id', 'product__name', 'product__sku'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price')),
-        order_count=Count('order', distinct=True)
-    ).order_by('-total_revenue')[:20]
-    
-    # Get most viewed products
-    most_viewed_products = ProductView.objects.filter(
-        created_at__gte=start_datetime,
-        created_at__lte=end_datetime
-    ).values(
-        'product_id', 'product__name', 'product__sku'
-    ).annotate(
-        view_count=Count('id')
-    ).order_by('-view_count')[:20]
-    
-    # Get categories data
-    categories_data = order_items.values(
-        'product__categories__id', 'product__categories__name'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price')),
-        product_count=Count('product_id', distinct=True)
-    ).order_by('-total_revenue')
+    # Closed days come from the report cache (see dashboard.reports)
+    report, job_id = product_report_cache.get(first_day, last_day, filters={'category': category_id})
     
     # Get all categories for filter dropdown
     all_categories = Category.objects.filter(is_active=True)
     
     return render(request, 'dashboard/reports/products.html', {
-        'top_selling_products': top_selling_products,
-        'highest_revenue_products': highest_revenue_products,
-        'most_viewed_products': most_viewed_products,
-        'categories_data': categories_data,
+        **(report or {}),
+        'report_job': job_id,
         'all_categories': all_categories,
         'start_date': start_date,
         'end_date': end_date,
@@ -104,91 +42,45 @@ def product_report(request):
 def customer_report(request):
     """Generate and display customer reports."""
     # Get date range filters
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    
-    # Default to last 30 days if no dates provided
-    if not start_date:
-        start_date = (timezone.now() - timezone.timedelta(days=30)).strftime('%Y-%m-%d')
-    if not end_date:
-        end_date = timezone.now().strftime('%Y-%m-%d')
-    
-    # Convert string dates to datetime objects
-    try:
-        start_datetime = timezone.datetime.strptime(start_date, '%Y-%m-%d')
-        start_datetime = timezone.make_aware(start_datetime)
-        end_datetime = timezone.datetime.strptime(end_date, '%Y-%m-%d')
-        end_datetime = timezone.make_aware(end_datetime.replace(hour=23, minute=59, second=59))
-    except (ValueError, TypeError):
-        # Handle invalid dates
-        start_datetime = timezone.now() - timezone.timedelta(days=30)
-        end_datetime = timezone.now()
-    
-    # Get orders in the date range
-    orders = Order.objects.filter(
-        created_at__gte=start_datetime,
-        created_at__lte=end_datetime
-    )
-    
-    # Get top customers by order count
-    top_customers_by_orders = orders.values(
-        'user_id', 'user__email', 'user__name'
-    ).annotate(
-        order_count=Count('id'),
-        total_spend=Sum('total')
-    ).order_by('-order_count')[:20]
+    start_date, end_date, first_day, last_day = get_date_range(request)
+    period = get_period(request.GET.get('period'))
     
-    # Get top customers by total spend
-    top_customers_by_spend = orders.values(
-        'user_id', 'user__email', 'user__name'
-    ).annotate(
-        order_count=Count('id'),
-        total_spend=Sum('total')
-    ).order_by('-total_spend')[:20]
+    # Closed days come from the report cache (see dashboard.reports)
+    report, job_id = customer_report_cache.get(first_day, last_day, period=period)
     
-    # Get new customers trend
-    if request.GET.get('period') == 'monthly':
-        new_customers_trend = User.objects.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime
-        ).annotate(
-            month=TruncMonth('created_at')
-        ).values('month').annotate(
-            count=Count('id')
-        ).order_by('month')
-    elif request.GET.get('period') == 'weekly':
-        new_customers_trend = User.objects.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime
-        ).annotate(
-            week=TruncWeek('created_at')
-        ).values('week').annotate(
-            count=Count('id')
-        ).order_by('week')
-    else:  # daily
-        new_customers_trend = User.objects.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime
-        ).annotate(
-            day=TruncDay('created_at')
-        ).values('day').annotate(
-            count=Count('id')
-        ).order_by('day')
-    
-    # Calculate overall statistics
-    stats = {
-        'total_customers': User.objects.filter(created_at__lte=end_datetime).count(),
-        'new_customers': User.objects.filter(created_at__gte=start_datetime, created_at__lte=end_datetime).count(),
-        'active_customers': orders.values('user_id').distinct().count(),
-        'average_order_value': orders.aggregate(avg=Avg('total'))['avg'] or 0,
-    }
+    if report:
+        report['stats']['total_customers'] = User.objects.filter(
+            created_at__lt=day_start(last_day + timezone.timedelta(days=1))
+        ).count()
     
     return render(request, 'dashboard/reports/customers.html', {
-        'top_customers_by_orders': top_customers_by_orders,
-        'top_customers_by_spend': top_customers_by_spend,
-        'new_customers_trend': list(new_customers_trend),
-        'stats': stats,
+        **(report or {}),
+        'report_job': job_id,
         'start_date': start_date,
         'end_date': end_date,
-        'period': request.GET.get('period', 'daily'),
-    })
\ No newline at end of file
+        'period': period,
+    })
+
+@staff_member_required
+def product_report_export(request):
+    """Download the sales and views of every product in the report's range as CSV or NDJSON."""
+    start_date, end_date, first_day, last_day = get_date_range(request)
+    category_id = request.GET.get('category')
+    
+    rows = iter_product_report(first_day, last_day, category_id)
+    columns = ['id', 'sku', 'name', 'total_quantity', 'total_revenue', 'order_count', 'view_count']
+    return export_response(rows, columns, get_export_format(request), f'products-{start_date}-{end_date}')
+
+@staff_member_required
+def customer_report_export(request):
+    """Download the orders and spend of every customer in the report's range as CSV or NDJSON."""
+    start_date, end_date, first_day, last_day = get_date_range(request)
+    
+    rows = iter_customer_report(first_day, last_day)
+    columns = ['user_id', 'user__email', 'user__name', 'order_count', 'total_spend', 'first_order_at', 'last_order_at']
+    return export_response(rows, columns, get_export_format(request), f'customers-{start_date}-{end_date}')
+
+@staff_member_required
+def report_status(request, job_id):
+    """Poll the status of a report generated in the background (running, done, failed)."""
+    return JsonResponse({'status': get_job_status(job_id)})
@@ -5,15 +5,16 @@ from django.db.models import Q, Count, Sum
 from django.core.paginator import Paginator
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from django.utils import timezone
 
 from users.models import User, Address
 from orders.models import Order
+from dashboard.exports import CUSTOMER_FIELDS, export_response, get_export_format, iter_customers
 from dashboard.forms import UserFilterForm
 from dashboard.utils import staff_member_required, log_admin_activity, paginate_queryset
 
-@staff_member_required
-def user_list(request):
-    """Display a list of users with search and filter options."""
+def _filter_users(request):
+    """Users matching the filters of the user list, newest first, and the filter form."""
     # Initialize filter form
     filter_form = UserFilterForm(request.GET)
     
@@ -53,6 +54,13 @@ def user_list(request):
         if date_joined_to:
             users = users.filter(created_at__date__lte=date_joined_to)
     
+    return filter_form, users
+
+@staff_member_required
+def user_list(request):
+    """Display a list of users with search and filter options."""
+    filter_form, users = _filter_users(request)
+    
     # Annotate with order count and total spend
     users = users.annotate(
         order_count=Count('orders', distinct=True),
@@ -67,6 +75,13 @@ def user_list(request):
         'filter_form': filter_form,
     })
 
+@staff_member_required
+def user_export(request):
+    """Download the filtered users with their lifetime order statistics as CSV or NDJSON."""
+    _, users = _filter_users(request)
+    
+    return export_response(iter_customers(users), CUSTOMER_FIELDS, get_export_format(request), f'customers-{timezone.localdate():%Y-%m-%d}')
+
 @staff_member_required
 def user_detail(request, uuid):
     """Display detailed information about a user."""
@@ -59,6 +59,13 @@ class OrderAdmin(admin.ModelAdmin):
     )
     inlines = [OrderItemInline, OrderStatusLogInline, PaymentInline, ShipmentInline]
     
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Recompute the totals once, after all inline items are saved, and only if they can have changed
+        amounts_changed = any(field in form.changed_data for field in ('shipping_amount', 'tax_amount', 'discount_amount'))
+        if amounts_changed or any(formset.has_changed() for formset in formsets):
+            form.instance.update_totals()
+    
     def save_model(self, request, obj, form, change):
         """Add status log when order status is changed."""
         if change and 'status' in form.changed_data:
@@ -11,6 +11,38 @@ from products.models import Product, Currency, Size, Color, Fabric
 
 User = get_user_model()
 
+class OrderQuerySet(models.QuerySet):
+    def create_with_items(self, items, **fields):
+        """
+        Create an order together with its items in a fixed number of queries,
+        however many items there are.
+        
+        The items are unsaved OrderItem instances; they are inserted with one
+        bulk_create and the order row is written once, with its subtotal and
+        total computed from the items unless given.
+        
+        Returns:
+            The created Order
+        """
+        items = list(items)
+        for item in items:
+            item.total = item.quantity * item.price
+        
+        if 'subtotal' not in fields:
+            fields['subtotal'] = sum((item.total for item in items), Decimal('0.00'))
+        if 'total' not in fields:
+            fields['total'] = (
+                fields['subtotal'] + fields.get('shipping_amount', 0)
+                + fields.get('tax_amount', 0) - fields.get('discount_amount', 0)
+            )
+        
+        order = self.create(**fields)
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+        return order
+
+
 class Order(models.Model):
     ORDER_STATUS_CHOICES = (
         ('PENDING', 'Pending'),
@@ -48,12 +80,14 @@ class Order(models.Model):
     coupon = models.ForeignKey('Coupon', on_delete=models.SET_NULL, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
     
-    status = models.CharField(max_length=20, choices=ORDER_STATUS_CHOICES, default='PENDING')
+    status = models.CharField(max_length=20, choices=ORDER_STATUS_CHOICES, default='PENDING', db_index=True)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='PENDING')
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
@@ -84,7 +118,7 @@ class Order(models.Model):
     
     def calculate_subtotal(self):
         """Calculate order subtotal from order items."""
-        return sum(item.total for item in self.items.all())
+        return self.items.aggregate(subtotal=models.Sum('total'))['subtotal'] or Decimal('0.00')
     
     def calculate_total(self):
         """Calculate order total including tax, shipping, and discounts."""
@@ -96,6 +130,50 @@ class Order(models.Model):
         self.total = self.calculate_total()
         self.save(update_fields=['subtotal', 'total'])
 
+    def get_subtotal_display(self):
+        """Get the formatted subtotal with currency symbol."""
+        from core.currency_utils import get_current_pricing
+        
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.subtotal)
+
+    def get_shipping_display(self):
+        """Get the formatted shipping cost with currency symbol."""
+        if not self.shipping_amount:
+            return "Free"
+            
+        from core.currency_utils import get_current_pricing
+        
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.shipping_amount)
+
+    def get_tax_display(self):
+        """Get the formatted tax amount with currency symbol."""
+        if not self.tax_amount:
+            return "-"
+            
+        from core.currency_utils import get_current_pricing
+        
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.tax_amount)
+
+    def get_discount_display(self):
+        """Get the formatted discount amount with currency symbol."""
+        if not self.discount_amount:
+            return "-"
+            
+        from core.currency_utils import get_current_pricing
+        
+        # Convert and format in the selected currency
+        return "- " + get_current_pricing().display(self.discount_amount)
+
+    def get_total_display(self):
+        """Get the formatted total amount with currency symbol."""
+        from core.currency_utils import get_current_pricing
+        
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.total)
+
 
 class OrderItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -125,15 +203,19 @@ class OrderItem(models.Model):
         variant_str = f" ({', '.join(variant_info)})" if variant_info else ""
         return f"{self.quantity} x {self.product.name}{variant_str} in order {self.order.order_number}"
     
-    def save(self, *args, **kwargs):
+    def save(self, *args, update_totals=False, **kwargs):
+        """
+        Save the item. Pass update_totals=True to also recompute and save the
+        order's totals; when changing several items, call
+        order.update_totals() once afterwards instead.
+        """
         # Update total before saving
         self.total = self.quantity * self.price
         super().save(*args, **kwargs)
         
         # Update order totals
-        self.order.update_totals()
-
-        # Add these methods to the OrderItem model in orders/models.py
+        if update_totals:
+            self.order.update_totals()
 
     def get_variant_display(self):
         """Get a display string for the product variant (size, color, fabric)"""
@@ -152,254 +234,17 @@ class OrderItem(models.Model):
 
     def get_unit_price_display(self):
         """Get the formatted unit price with currency symbol."""
-        from core.currency_utils import convert_price, format_price, get_selected_currency_from_request
-        
-        # Get default currency and selected currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            selected_currency = get_selected_currency_from_request()
-        except:
-            selected_currency = default_currency
+        from core.currency_utils import get_current_pricing
         
-        # Convert price if needed
-        price = self.price
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            price = convert_price(price, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(price, selected_currency)
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.price)
 
     def get_total_display(self):
         """Get the formatted total price with currency symbol."""
-        from core.currency_utils import convert_price, format_price, get_selected_currency_from_request
-        
-        # Get default currency and selected currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            selected_currency = get_selected_currency_from_request()
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        total = self.total
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            total = convert_price(total, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(total, selected_currency)
-
-    # Add these methods to the Order model in orders/models.py
-
-    def get_subtotal_display(self):
-        """Get the formatted subtotal with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        subtotal = self.subtotal
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            subtotal = convert_price(subtotal, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(subtotal, selected_currency)
-
-    def get_shipping_display(self):
-        """Get the formatted shipping cost with currency symbol."""
-        if not self.shipping_cost:
-            return "Free"
-            
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        shipping = self.shipping_cost
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            shipping = convert_price(shipping, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(shipping, selected_currency)
-
-    def get_tax_display(self):
-        """Get the formatted tax amount with currency symbol."""
-        if not self.tax:
-            return "-"
-            
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        tax = self.tax
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            tax = convert_price(tax, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return format_price(tax, selected_currency)
-
-    def get_discount_display(self):
-        """Get the formatted discount amount with currency symbol."""
-        if not self.discount:
-            return "-"
-            
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        discount = self.discount
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            discount = convert_price(discount, default_currency, selected_currency)
-        
-        # Format with currency symbol
-        return "- " + format_price(discount, selected_currency)
-
-    def get_total_display(self):
-        """Get the formatted total amount with currency symbol."""
-        # Get the default currency and the selected currency
-        from products.models import Currency
-        from core.middleware import get_current_request
-        from core.currency_utils import convert_price, format_price
-        
-        # Get default currency
-        try:
-            default_currency = Currency.objects.get(is_default=True)
-        except Currency.DoesNotExist:
-            default_currency = None
-        
-        # Try to get the selected currency
-        selected_currency = None
-        try:
-            request = get_current_request()
-            if request and request.session.get('currency_code'):
-                try:
-                    selected_currency = Currency.objects.get(
-                        code=request.session['currency_code'],
-                        is_active=True
-                    )
-                except Currency.DoesNotExist:
-                    selected_currency = default_currency
-            else:
-                selected_currency = default_currency
-        except:
-            selected_currency = default_currency
-        
-        # Convert price if needed
-        total = self.total
-        if default_currency and selected_currency and default_currency.id != selected_currency.id:
-            total = convert_price(total, default_currency, selected_currency)
+        from core.currency_utils import get_current_pricing
         
-        # Format with currency symbol
-        return format_price(total, selected_currency)
+        # Convert and format in the selected currency
+        return get_current_pricing().display(self.total)
 
 
 class OrderStatusLog(models.Model):
@@ -2,9 +2,8 @@
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
+
+from core.outbox import queue_email
 
 from .models import (
     Order, OrderItem, OrderStatusLog, Payment, Shipment,
@@ -194,16 +193,13 @@ def send_order_shipped_email(order):
         'user': order.user,
         'shipments': order.shipments.all()
     }
-    html_message = render_to_string('orders/emails/order_shipped.html', context)
-    plain_message = render_to_string('orders/emails/order_shipped_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        order.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/order_shipped.html',
+        text_template='orders/emails/order_shipped_plain.html',
+        context=context,
+        user=order.user
     )
 
 def send_order_delivered_email(order):
@@ -213,16 +209,13 @@ def send_order_delivered_email(order):
         'order': order,
         'user': order.user
     }
-    html_message = render_to_string('orders/emails/order_delivered.html', context)
-    plain_message = render_to_string('orders/emails/order_delivered_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        order.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/order_delivered.html',
+        text_template='orders/emails/order_delivered_plain.html',
+        context=context,
+        user=order.user
     )
 
 def send_return_approved_email(return_request):
@@ -233,16 +226,13 @@ def send_return_approved_email(return_request):
         'user': return_request.user,
         'order': return_request.order
     }
-    html_message = render_to_string('orders/emails/return_approved.html', context)
-    plain_message = render_to_string('orders/emails/return_approved_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        return_request.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [return_request.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/return_approved.html',
+        text_template='orders/emails/return_approved_plain.html',
+        context=context,
+        user=return_request.user
     )
 
 def send_return_rejected_email(return_request):
@@ -253,16 +243,13 @@ def send_return_rejected_email(return_request):
         'user': return_request.user,
         'order': return_request.order
     }
-    html_message = render_to_string('orders/emails/return_rejected.html', context)
-    plain_message = render_to_string('orders/emails/return_rejected_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        return_request.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [return_request.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/return_rejected.html',
+        text_template='orders/emails/return_rejected_plain.html',
+        context=context,
+        user=return_request.user
     )
 
 def send_return_completed_email(return_request):
@@ -273,14 +260,11 @@ def send_return_completed_email(return_request):
         'user': return_request.user,
         'order': return_request.order
     }
-    html_message = render_to_string('orders/emails/return_completed.html', context)
-    plain_message = render_to_string('orders/emails/return_completed_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        return_request.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [return_request.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/return_completed.html',
+        text_template='orders/emails/return_completed_plain.html',
+        context=context,
+        user=return_request.user
     )
\ No newline at end of file
@@ -1,7 +1,6 @@
 # orders/views.py
 import uuid
 import datetime
-from decimal import Decimal
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -11,9 +10,6 @@ from django.db import transaction
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.utils.crypto import get_random_string
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
 from django.urls import reverse
 
 from .models import (
@@ -24,8 +20,10 @@ from .forms import (
     CheckoutForm, CouponForm, ReturnForm, ReturnItemForm, OrderFilterForm
 )
 from carts.models import Cart, CartItem, GuestCart, GuestCartItem
+from carts.pricing import price_cart
 from products.models import Product, Currency, Size, Color, Fabric, FabricColor
 from users.models import User, Address
+from core.outbox import queue_email
 
 def generate_order_number():
     """Generate a unique order number."""
@@ -62,75 +60,15 @@ def get_or_create_user_address(user, form_data, address_type):
         address.save()
         return address
 
-def apply_coupon(request, code, cart_total):
-    """Apply a coupon to the cart total."""
-    try:
-        coupon = Coupon.objects.get(code__iexact=code, is_active=True)
-        now = timezone.now()
-        
-        # Check validity
-        if not coupon.is_valid:
-            messages.error(request, 'This coupon is no longer valid.')
-            return None, cart_total
-        
-        # Check minimum order amount
-        if coupon.min_order_amount and cart_total < coupon.min_order_amount:
-            messages.error(
-                request, 
-                f'Your order total must be at least {coupon.min_order_amount} to use this coupon.'
-            )
-            return None, cart_total
-        
-        # Calculate discount
-        discount = coupon.calculate_discount(cart_total)
-        
-        if discount <= 0:
-            messages.error(request, 'This coupon cannot be applied to your order.')
-            return None, cart_total
-        
+def report_coupon(request, coupon, discount, error):
+    """Tell the customer whether their coupon was applied."""
+    if error:
+        messages.error(request, error)
+    elif coupon:
         messages.success(
             request, 
             f'Coupon {coupon.code} applied! You saved {discount} on your order.'
         )
-        return coupon, cart_total - discount
-    
-    except Coupon.DoesNotExist:
-        messages.error(request, 'Invalid coupon code.')
-        return None, cart_total
-
-def calculate_tax(cart_total, shipping_address):
-    """Calculate tax based on shipping address."""
-    # In a real-world scenario, this would include tax calculation logic
-    # based on shipping location, product types, etc.
-    # For now, we'll use a simple percentage
-    tax_rate = Decimal('0.18')  # 18% GST in India
-    
-    # You might have different tax rates for different states in India
-    if shipping_address.state.upper() in ['KARNATAKA', 'DELHI', 'MAHARASHTRA']:
-        tax_rate = Decimal('0.18')
-    elif shipping_address.state.upper() in ['GUJARAT', 'TAMIL NADU']:
-        tax_rate = Decimal('0.15')
-    
-    return (cart_total * tax_rate).quantize(Decimal('0.01'))
-
-def calculate_shipping(cart_total, shipping_address):
-    """Calculate shipping fee based on cart total and shipping address."""
-    # In a real-world scenario, this would include complex shipping calculation
-    # based on weight, dimensions, distance, and shipping carrier rates
-    # For now, we'll use a simple logic
-    
-    if cart_total >= Decimal('2000.00'):
-        return Decimal('0.00')  # Free shipping for orders above 2000
-    
-    base_shipping = Decimal('100.00')
-    
-    # Additional shipping for remote areas
-    remote_states = ['ASSAM', 'ARUNACHAL PRADESH', 'MANIPUR', 'MEGHALAYA', 
-                    'MIZORAM', 'NAGALAND', 'SIKKIM', 'TRIPURA', 'ANDAMAN AND NICOBAR']
-    if shipping_address.state.upper() in remote_states:
-        base_shipping += Decimal('50.00')
-    
-    return base_shipping
 
 @login_required
 def checkout(request):
@@ -138,37 +76,31 @@ def checkout(request):
     user = request.user
     cart, created = Cart.objects.get_or_create(user=user)
     
+    # Get the pricing context resolved for this request
+    from core.currency_utils import get_pricing_context
+    pricing = get_pricing_context(request)
+    selected_currency = pricing.currency
+    
+    # Estimate shipping and tax with the customer's default address
+    shipping_address = user.addresses.filter(is_default=True, address_type__in=['SHIPPING', 'BOTH']).first()
+    if not shipping_address:
+        shipping_address = user.addresses.first()
+    
+    # Price the cart once, with the coupon in the session; every amount below comes from here
+    priced_cart = price_cart(
+        cart,
+        pricing=pricing,
+        coupon_code=request.session.get('coupon_code'),
+        shipping_address=shipping_address,
+        checkout=True,
+    )
+    
     # Redirect to cart if empty
-    if cart.items.count() == 0:
+    if priced_cart.is_empty:
         messages.error(request, 'Your cart is empty. Please add items before checkout.')
         return redirect('cart_detail')
     
-    # Get selected currency
-    from core.currency_utils import get_selected_currency
-    selected_currency = get_selected_currency(request)
-    
-    # Get default currency
-    default_currency = Currency.objects.filter(is_default=True).first()
-    if not default_currency:
-        default_currency = Currency.objects.create(
-            code='INR',
-            name='Indian Rupee',
-            symbol='₹',
-            exchange_rate=Decimal('1.0'),
-            is_default=True
-        )
-    
-    # Initialize amounts in default currency
-    cart_total = cart.get_total_price()
-    discount = Decimal('0.00')
-    coupon = None
-    
-    # Check for applied coupon in session
-    coupon_code = request.session.get('coupon_code')
-    if coupon_code:
-        coupon, cart_total = apply_coupon(request, coupon_code, cart_total)
-        if coupon:
-            discount = cart.get_total_price() - cart_total
+    report_coupon(request, priced_cart.coupon, priced_cart.discount, priced_cart.coupon_error)
     
     # Handle form submission
     if request.method == 'POST':
@@ -210,55 +142,45 @@ def checkout(request):
                         }
                         billing_address = get_or_create_user_address(user, billing_data, 'BILLING')
                     
-                    # Calculate final amounts
-                    shipping_amount = calculate_shipping(cart_total, shipping_address)
-                    tax_amount = calculate_tax(cart_total, shipping_address)
-                    total_amount = cart_total + shipping_amount + tax_amount
+                    # Final amounts for the address the order ships to
+                    order_pricing = priced_cart.for_address(shipping_address)
                     
-                    # Create the order with the selected currency
-                    order = Order.objects.create(
+                    # Create the order and all its items in one go, with the selected currency;
+                    # the 'Order created' status log is added by the post_save signal
+                    order = Order.objects.create_with_items(
+                        [
+                            OrderItem(
+                                product=line.product,
+                                size=line.item.size,
+                                color=line.item.color,
+                                fabric=line.item.fabric,
+                                quantity=line.quantity,
+                                price=line.unit_price,
+                            )
+                            for line in order_pricing.lines
+                        ],
                         user=user,
                         order_number=generate_order_number(),
                         currency=selected_currency,  # Store the selected currency
                         shipping_address=shipping_address,
                         billing_address=billing_address,
-                        subtotal=cart.get_total_price(),
-                        shipping_amount=shipping_amount,
-                        tax_amount=tax_amount,
-                        discount_amount=discount,
-                        total=total_amount,
-                        coupon=coupon,
+                        subtotal=order_pricing.subtotal,
+                        shipping_amount=order_pricing.shipping,
+                        tax_amount=order_pricing.tax,
+                        discount_amount=order_pricing.discount,
+                        total=order_pricing.total,
+                        coupon=order_pricing.coupon,
                         notes=form.cleaned_data['notes'],
                         status='PENDING',
                         payment_status='PENDING'
                     )
                     
-                    # Add order status log
-                    OrderStatusLog.objects.create(
-                        order=order,
-                        status='PENDING',
-                        notes='Order created'
-                    )
-                    
-                    # Add order items
-                    for cart_item in cart.items.all():
-                        OrderItem.objects.create(
-                            order=order,
-                            product=cart_item.product,
-                            size=cart_item.size,
-                            color=cart_item.color,
-                            fabric=cart_item.fabric,
-                            quantity=cart_item.quantity,
-                            price=cart_item.product.get_active_price(),
-                            total=cart_item.get_total_price()
-                        )
-                    
                     # Create payment record
                     payment_method = form.cleaned_data['payment_method']
                     Payment.objects.create(
                         order=order,
                         payment_method=payment_method,
-                        amount=total_amount,
+                        amount=order_pricing.total,
                         currency=selected_currency.code,
                         status='PENDING'
                     )
@@ -271,9 +193,9 @@ def checkout(request):
                         del request.session['coupon_code']
                     
                     # Update coupon usage if used
-                    if coupon:
-                        coupon.usage_count += 1
-                        coupon.save()
+                    if order_pricing.coupon:
+                        order_pricing.coupon.usage_count += 1
+                        order_pricing.coupon.save()
                     
                     # Send order confirmation email
                     send_order_confirmation_email(order)
@@ -286,47 +208,18 @@ def checkout(request):
     else:
         form = CheckoutForm(user=user)
     
-    # Calculate totals for display in current currency
-    from core.currency_utils import convert_price
-    
-    # Convert amounts to selected currency if needed
-    if selected_currency.id != default_currency.id:
-        cart_total_display = convert_price(cart_total, default_currency, selected_currency)
-        discount_display = convert_price(discount, default_currency, selected_currency)
-    else:
-        cart_total_display = cart_total
-        discount_display = discount
-    
-    # Calculate shipping and tax estimates in the selected currency
-    shipping_address = user.addresses.filter(is_default=True, address_type__in=['SHIPPING', 'BOTH']).first()
-    if not shipping_address and user.addresses.exists():
-        shipping_address = user.addresses.first()
-    
-    if shipping_address:
-        shipping_estimate = calculate_shipping(cart_total, shipping_address)
-        tax_estimate = calculate_tax(cart_total, shipping_address)
-    else:
-        shipping_estimate = Decimal('100.00')  # Default shipping
-        tax_estimate = cart_total * Decimal('0.18')  # Default tax (18%)
-    
-    # Convert shipping and tax estimates to selected currency
-    if selected_currency.id != default_currency.id:
-        shipping_estimate = convert_price(shipping_estimate, default_currency, selected_currency)
-        tax_estimate = convert_price(tax_estimate, default_currency, selected_currency)
-    
-    # Calculate total estimate in selected currency
-    total_estimate = cart_total_display + shipping_estimate + tax_estimate - discount_display
-    
     return render(request, 'orders/checkout.html', {
         'form': form,
         'cart': cart,
-        'cart_total': cart_total_display,
-        'discount': discount_display,
-        'shipping_estimate': shipping_estimate,
-        'tax_estimate': tax_estimate,
-        'total_estimate': total_estimate,
+        'priced_cart': priced_cart,
+        # Amounts in the selected currency
+        'cart_total': priced_cart.converted['subtotal'] - priced_cart.converted['discount'],
+        'discount': priced_cart.converted['discount'],
+        'shipping_estimate': priced_cart.converted['shipping'],
+        'tax_estimate': priced_cart.converted['tax'],
+        'total_estimate': priced_cart.converted['total'],
         'coupon_form': CouponForm(),
-        'applied_coupon': coupon,
+        'applied_coupon': priced_cart.coupon,
         'selected_currency': selected_currency
     })
 
@@ -671,16 +564,13 @@ def send_order_confirmation_email(order):
         'order': order,
         'user': order.user
     }
-    html_message = render_to_string('orders/emails/order_confirmation.html', context)
-    plain_message = render_to_string('orders/emails/order_confirmation_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        order.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/order_confirmation.html',
+        text_template='orders/emails/order_confirmation_plain.html',
+        context=context,
+        user=order.user
     )
 
 def send_order_cancellation_email(order):
@@ -690,16 +580,13 @@ def send_order_cancellation_email(order):
         'order': order,
         'user': order.user
     }
-    html_message = render_to_string('orders/emails/order_cancellation.html', context)
-    plain_message = render_to_string('orders/emails/order_cancellation_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        order.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [order.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/order_cancellation.html',
+        text_template='orders/emails/order_cancellation_plain.html',
+        context=context,
+        user=order.user
     )
 
 def send_return_request_email(return_request):
@@ -710,14 +597,11 @@ def send_return_request_email(return_request):
         'user': return_request.user,
         'order': return_request.order
     }
-    html_message = render_to_string('orders/emails/return_request.html', context)
-    plain_message = render_to_string('orders/emails/return_request_plain.html', context)
-    
-    send_mail(
+    queue_email(
+        return_request.user.email,
         subject,
-        plain_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [return_request.user.email],
-        html_message=html_message,
-        fail_silently=False
+        html_template='orders/emails/return_request.html',
+        text_template='orders/emails/return_request_plain.html',
+        context=context,
+        user=return_request.user
     )
\ No newline at end of file
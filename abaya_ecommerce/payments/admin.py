@@ -3,6 +3,7 @@ from django.contrib import admin
 # Register your models here.
 # payments/admin.py
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
@@ -115,10 +116,10 @@ class TransactionAdmin(admin.ModelAdmin):
 
 @admin.register(WebhookEvent)
 class WebhookEventAdmin(admin.ModelAdmin):
-    list_display = ('event_id', 'gateway', 'event_type', 'is_test', 'processed', 'created_at')
-    list_filter = ('gateway', 'event_type', 'is_test', 'processed', 'created_at')
+    list_display = ('event_id', 'gateway', 'event_type', 'is_test', 'processed', 'failed_at', 'attempts', 'created_at')
+    list_filter = ('gateway', 'event_type', 'is_test', 'processed', 'failed_at', 'created_at')
     search_fields = ('event_id', 'payload')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('attempts', 'next_attempt_at', 'processed_at', 'failed_at', 'created_at')
     fieldsets = (
         (None, {
             'fields': ('gateway', 'event_type', 'event_id', 'is_test', 'processed', 'transaction')
@@ -127,11 +128,23 @@ class WebhookEventAdmin(admin.ModelAdmin):
             'fields': ('payload', 'error_message'),
             'classes': ('collapse',),
         }),
+        (_('Processing'), {
+            'fields': ('attempts', 'next_attempt_at', 'processed_at', 'failed_at'),
+            'classes': ('collapse',),
+        }),
         (_('Dates'), {
             'fields': ('created_at',),
             'classes': ('collapse',),
         }),
     )
+    actions = ['process_again']
+    
+    def process_again(self, request, queryset):
+        updated = queryset.update(
+            processed=False, processed_at=None, failed_at=None, attempts=0, error_message=None, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} webhook events will be processed by the next worker run.")
+    process_again.short_description = 'Process again'
 
 
 @admin.register(Refund)
@@ -42,7 +42,8 @@ class BasePaymentGateway(ABC):
     @abstractmethod
     def process_webhook(self, request):
         """
-        Process webhook events from the payment gateway.
+        Verify a webhook request from the payment gateway and store its event
+        with payments.webhooks.ingest_webhook, without processing it.
         
         Args:
             request: The HTTP request with webhook data
@@ -52,6 +53,17 @@ class BasePaymentGateway(ABC):
         """
         pass
     
+    @abstractmethod
+    def handle_webhook_event(self, webhook_event):
+        """
+        Process a stored webhook event; called by the webhook worker.
+        Exceptions are retried, so the handler must be safe to run again.
+        
+        Args:
+            webhook_event: The WebhookEvent to process
+        """
+        pass
+    
     @abstractmethod
     def create_refund(self, transaction, amount, reason):
         """
@@ -1,7 +1,91 @@
 # payments/gateways/factory.py
 from django.conf import settings
+
+from core.registry import VersionedRegistry
 from ..models import PaymentGatewaySettings
 
+
+def _create_gateway(gateway_settings):
+    gateway_name = gateway_settings.gateway
+    
+    if gateway_name == 'STRIPE':
+        from .stripe import StripeGateway
+        return StripeGateway(gateway_settings)
+    
+    elif gateway_name == 'RAZORPAY':
+        from .razorpay import RazorpayGateway
+        return RazorpayGateway(gateway_settings)
+    
+    elif gateway_name == 'PAYPAL':
+        from .paypal import PayPalGateway
+        return PayPalGateway(gateway_settings)
+    
+    elif gateway_name == 'PAYU':
+        from .payu import PayUGateway
+        return PayUGateway(gateway_settings)
+    
+    else:
+        raise ValueError(f"Unsupported payment gateway: {gateway_name}")
+
+
+class GatewayRegistry(VersionedRegistry):
+    """
+    Active payment gateway settings, and the gateway instances built from
+    them, shared by all requests of a process.
+    
+    Instances keep their API clients and HTTP connections, so payment calls
+    skip the setup. They are kept per gateway and updated_at, so editing one
+    gateway's settings only rebuilds that gateway. Saving or deleting
+    PaymentGatewaySettings invalidates the registry (see payments.signals).
+    """
+    
+    VERSION_CACHE_KEY = 'payment_gateway_registry_version'
+    CHECK_INTERVAL = getattr(settings, 'PAYMENT_GATEWAY_REGISTRY_CHECK_INTERVAL', 5)  # seconds
+
+    def __init__(self):
+        super().__init__()
+        self._instances = {}
+
+    def _load(self):
+        active = list(PaymentGatewaySettings.objects.filter(is_active=True).order_by('pk'))
+        
+        # Drop instances built from settings that were edited or deactivated
+        current = {(gateway_settings.gateway, gateway_settings.updated_at) for gateway_settings in active}
+        self._instances = {key: gateway for key, gateway in self._instances.items() if key in current}
+        return active
+
+    def get_active_settings(self):
+        """Settings of the active gateways."""
+        return self._get_snapshot()
+
+    def get(self, gateway_name=None):
+        """
+        Get the gateway instance by name, or the default (first active) one.
+        
+        Raises:
+            ValueError: If the gateway is not active or not supported
+        """
+        active = self._get_snapshot()
+        
+        if not gateway_name:
+            if not active:
+                raise ValueError("No active payment gateway configured")
+            gateway_settings = active[0]
+        else:
+            gateway_settings = next((s for s in active if s.gateway == gateway_name), None)
+            if gateway_settings is None:
+                raise ValueError(f"Payment gateway {gateway_name} is not active")
+        
+        key = (gateway_settings.gateway, gateway_settings.updated_at)
+        gateway = self._instances.get(key)
+        if gateway is None:
+            gateway = self._instances[key] = _create_gateway(gateway_settings)
+        return gateway
+
+
+gateway_registry = GatewayRegistry()
+
+
 class PaymentGatewayFactory:
     """Factory class to create payment gateway instances."""
     
@@ -10,52 +94,17 @@ class PaymentGatewayFactory:
         """
         Get a payment gateway instance by name.
         If no name is provided, returns the default gateway.
-        """
-        if not gateway_name:
-            # Get default gateway
-            gateway_setting = PaymentGatewaySettings.objects.filter(
-                is_active=True
-            ).first()
-            
-            if not gateway_setting:
-                raise ValueError("No active payment gateway configured")
-            
-            gateway_name = gateway_setting.gateway
-        
-        # Ensure gateway is active
-        if not PaymentGatewaySettings.objects.filter(
-            gateway=gateway_name,
-            is_active=True
-        ).exists():
-            raise ValueError(f"Payment gateway {gateway_name} is not active")
-        
-        # Create and return gateway instance
-        if gateway_name == 'STRIPE':
-            from .stripe import StripeGateway
-            return StripeGateway()
-        
-        elif gateway_name == 'RAZORPAY':
-            from .razorpay import RazorpayGateway
-            return RazorpayGateway()
         
-        elif gateway_name == 'PAYPAL':
-            from .paypal import PayPalGateway
-            return PayPalGateway()
-        
-        elif gateway_name == 'PAYU':
-            from .payu import PayUGateway
-            return PayUGateway()
-        
-        else:
-            raise ValueError(f"Unsupported payment gateway: {gateway_name}")
+        Instances are cached per process (see GatewayRegistry).
+        """
+        return gateway_registry.get(gateway_name)
     
     @staticmethod
     def get_available_gateways():
         """Get all available active payment gateways."""
         gateways = []
-        gateway_settings = PaymentGatewaySettings.objects.filter(is_active=True)
         
-        for setting in gateway_settings:
+        for setting in gateway_registry.get_active_settings():
             gateways.append({
                 'id': setting.gateway,
                 'name': setting.display_name,
@@ -63,4 +112,4 @@ class PaymentGatewayFactory:
                 'payment_methods': setting.payment_methods
             })
         
-        return gateways
\ No newline at end of file
+        return gateways
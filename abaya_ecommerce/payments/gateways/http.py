@@ -0,0 +1,29 @@
+# payments/gateways/http.py
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = getattr(settings, 'PAYMENT_GATEWAY_CONNECT_TIMEOUT', 5)  # seconds
+READ_TIMEOUT = getattr(settings, 'PAYMENT_GATEWAY_READ_TIMEOUT', 30)  # seconds
+POOL_SIZE = getattr(settings, 'PAYMENT_GATEWAY_POOL_SIZE', 10)  # kept-alive connections per host
+
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+
+class GatewaySession(requests.Session):
+    """
+    requests session for talking to a payment gateway API: connections are
+    pooled and kept alive between calls, and every request gets the connect
+    and read timeouts unless it passes its own.
+    """
+
+    def __init__(self, timeout=TIMEOUT, pool_size=POOL_SIZE):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
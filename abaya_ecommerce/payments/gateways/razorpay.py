@@ -2,18 +2,25 @@
 import razorpay
 import hmac
 import hashlib
+import json
 from decimal import Decimal
 from django.conf import settings
 from django.http import HttpResponse
 
 from ..models import PaymentGatewaySettings, Transaction
+from .http import GatewaySession
 
 class RazorpayGateway:
     """Razorpay payment gateway integration."""
     
-    def __init__(self):
-        """Initialize Razorpay API with settings from database."""
-        self.gateway_settings = PaymentGatewaySettings.objects.filter(
+    def __init__(self, gateway_settings=None):
+        """
+        Initialize Razorpay API with settings from database.
+        
+        Instances are cached per process by the gateway registry (see
+        payments.gateways.factory), which passes in the gateway settings.
+        """
+        self.gateway_settings = gateway_settings or PaymentGatewaySettings.objects.filter(
             gateway='RAZORPAY', 
             is_active=True
         ).first()
@@ -21,9 +28,17 @@ class RazorpayGateway:
         if not self.gateway_settings:
             raise ValueError("Razorpay gateway is not configured or not active")
         
-        # Initialize Razorpay client
+        # Initialize Razorpay client over a pooled keep-alive session with timeouts;
+        # api_base points it at another server, e.g. a test one
+        options = {}
+        additional_settings = self.gateway_settings.additional_settings or {}
+        if additional_settings.get('api_base'):
+            options['base_url'] = additional_settings['api_base']
+        
         self.client = razorpay.Client(
-            auth=(self.gateway_settings.api_key, self.gateway_settings.api_secret)
+            session=GatewaySession(),
+            auth=(self.gateway_settings.api_key, self.gateway_settings.api_secret),
+            **options
         )
         self.is_test = self.gateway_settings.test_mode
     
@@ -148,7 +163,10 @@ class RazorpayGateway:
             }
     
     def process_webhook(self, request):
-        """Process Razorpay webhook events."""
+        """
+        Verify and store a Razorpay webhook event and acknowledge it right away;
+        the webhook worker runs handle_webhook_event for it later.
+        """
         payload = request.body.decode('utf-8')
         signature = request.META.get('HTTP_X_RAZORPAY_SIGNATURE')
         
@@ -157,35 +175,39 @@ class RazorpayGateway:
             return HttpResponse(status=400)
         
         try:
-            import json
             event_data = json.loads(payload)
-            event_type = event_data.get('event')
-            
-            # Create webhook event record
-            from ..models import WebhookEvent
-            webhook_event = WebhookEvent.objects.create(
-                gateway='RAZORPAY',
-                event_type=self._map_event_type(event_type),
-                event_id=event_data.get('id', ''),
-                is_test=self.is_test,
-                payload=event_data
-            )
-            
-            # Process the event
-            if event_type == 'payment.captured':
-                return self._handle_payment_success(event_data, webhook_event)
-            elif event_type == 'payment.failed':
-                return self._handle_payment_failure(event_data, webhook_event)
-            elif event_type == 'refund.processed':
-                return self._handle_refund(event_data, webhook_event)
-            else:
-                # Mark as processed but no specific handling
-                webhook_event.processed = True
-                webhook_event.save()
-                return HttpResponse(status=200)
+        except ValueError:
+            return HttpResponse(status=400)
         
-        except Exception as e:
-            return HttpResponse(content=str(e), status=500)
+        # Razorpay sends the event id as a header and the same id on every retry
+        event_id = request.META.get('HTTP_X_RAZORPAY_EVENT_ID') or hashlib.sha256(payload.encode()).hexdigest()
+        
+        # Deliveries of an event that is already stored are acknowledged without queueing it again
+        from ..webhooks import ingest_webhook
+        ingest_webhook(
+            gateway='RAZORPAY',
+            event_id=event_id,
+            event_type=self._map_event_type(event_data.get('event')),
+            payload=event_data,
+            is_test=self.is_test,
+        )
+        return HttpResponse(status=200)
+    
+    def handle_webhook_event(self, webhook_event):
+        """Process a stored Razorpay webhook event (see payments.webhooks)."""
+        event_data = webhook_event.payload
+        event_type = event_data.get('event')
+        
+        if event_type == 'payment.captured':
+            self._handle_payment_success(event_data, webhook_event)
+        elif event_type == 'payment.failed':
+            self._handle_payment_failure(event_data, webhook_event)
+        elif event_type == 'refund.processed':
+            self._handle_refund(event_data, webhook_event)
+        else:
+            # Mark as processed but no specific handling
+            webhook_event.processed = True
+            webhook_event.save()
     
     def _verify_webhook_signature(self, payload, signature):
         """Verify Razorpay webhook signature."""
@@ -259,14 +281,11 @@ class RazorpayGateway:
                 payment_obj.status = 'PAID'
                 payment_obj.transaction_id = payment_id
                 payment_obj.save()
-            
-            return HttpResponse(status=200)
         
         except Transaction.DoesNotExist:
             webhook_event.error_message = f"Transaction not found for order: {order_id}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=400)
     
     def _handle_payment_failure(self, event_data, webhook_event):
         """Handle failed payment event."""
@@ -299,14 +318,11 @@ class RazorpayGateway:
             if payment_obj:
                 payment_obj.status = 'FAILED'
                 payment_obj.save()
-            
-            return HttpResponse(status=200)
         
         except Transaction.DoesNotExist:
             webhook_event.error_message = f"Transaction not found for order: {order_id}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=400)
     
     def _handle_refund(self, event_data, webhook_event):
         """Handle refund event."""
@@ -361,14 +377,11 @@ class RazorpayGateway:
                 else:
                     payment_obj.status = 'PARTIALLY_REFUNDED'
                 payment_obj.save()
-            
-            return HttpResponse(status=200)
         
         except Transaction.DoesNotExist:
             webhook_event.error_message = f"Transaction not found for payment: {payment_id}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=400)
     
     def create_refund(self, transaction, amount, reason):
         """Create a refund for a transaction."""
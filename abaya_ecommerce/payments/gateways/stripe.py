@@ -1,4 +1,5 @@
 # payments/gateways/stripe.py
+import json
 import stripe
 from decimal import Decimal
 from django.conf import settings
@@ -6,13 +7,19 @@ from django.urls import reverse
 from django.http import HttpResponse
 
 from ..models import PaymentGatewaySettings, Transaction
+from .http import TIMEOUT
 
 class StripeGateway:
     """Stripe payment gateway integration."""
     
-    def __init__(self):
-        """Initialize Stripe API with settings from database."""
-        self.gateway_settings = PaymentGatewaySettings.objects.filter(
+    def __init__(self, gateway_settings=None):
+        """
+        Initialize Stripe API with settings from database.
+        
+        Instances are cached per process by the gateway registry (see
+        payments.gateways.factory), which passes in the gateway settings.
+        """
+        self.gateway_settings = gateway_settings or PaymentGatewaySettings.objects.filter(
             gateway='STRIPE', 
             is_active=True
         ).first()
@@ -23,6 +30,11 @@ class StripeGateway:
         # Initialize Stripe with API key
         stripe.api_key = self.gateway_settings.api_secret
         self.is_test = self.gateway_settings.test_mode
+        
+        # Reuse kept-alive connections with explicit timeouts; api_base points Stripe at another server, e.g. a test one
+        stripe.default_http_client = stripe.RequestsClient(timeout=TIMEOUT)
+        additional_settings = self.gateway_settings.additional_settings or {}
+        stripe.api_base = additional_settings.get('api_base', stripe.DEFAULT_API_BASE)
     
     def create_payment_intent(self, order, return_url=None):
         """Create a payment intent for an order."""
@@ -172,7 +184,10 @@ class StripeGateway:
             }
     
     def process_webhook(self, request):
-        """Process Stripe webhook events."""
+        """
+        Verify and store a Stripe webhook event and acknowledge it right away;
+        the webhook worker runs handle_webhook_event for it later.
+        """
         webhook_secret = self.gateway_settings.webhook_secret
         payload = request.body.decode('utf-8')
         sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
@@ -181,36 +196,36 @@ class StripeGateway:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, webhook_secret
             )
-            
-            # Create webhook event record
-            from ..models import WebhookEvent
-            webhook_event = WebhookEvent.objects.create(
-                gateway='STRIPE',
-                event_type=self._map_event_type(event['type']),
-                event_id=event['id'],
-                is_test='livemode' not in event or not event['livemode'],
-                payload=event
-            )
-            
-            # Process the event
-            if event['type'] == 'payment_intent.succeeded':
-                return self._handle_payment_success(event, webhook_event)
-            elif event['type'] == 'payment_intent.payment_failed':
-                return self._handle_payment_failure(event, webhook_event)
-            elif event['type'] == 'charge.refunded':
-                return self._handle_refund(event, webhook_event)
-            else:
-                # Mark as processed but no specific handling
-                webhook_event.processed = True
-                webhook_event.save()
-                return HttpResponse(status=200)
-        
         except ValueError as e:
             return HttpResponse(status=400)
         except stripe.error.SignatureVerificationError as e:
             return HttpResponse(status=400)
-        except Exception as e:
-            return HttpResponse(content=str(e), status=500)
+        
+        # Deliveries of an event that is already stored are acknowledged without queueing it again
+        from ..webhooks import ingest_webhook
+        ingest_webhook(
+            gateway='STRIPE',
+            event_id=event['id'],
+            event_type=self._map_event_type(event['type']),
+            payload=json.loads(payload),
+            is_test='livemode' not in event or not event['livemode'],
+        )
+        return HttpResponse(status=200)
+    
+    def handle_webhook_event(self, webhook_event):
+        """Process a stored Stripe webhook event (see payments.webhooks)."""
+        event = webhook_event.payload
+        
+        if event['type'] == 'payment_intent.succeeded':
+            self._handle_payment_success(event, webhook_event)
+        elif event['type'] == 'payment_intent.payment_failed':
+            self._handle_payment_failure(event, webhook_event)
+        elif event['type'] == 'charge.refunded':
+            self._handle_refund(event, webhook_event)
+        else:
+            # Mark as processed but no specific handling
+            webhook_event.processed = True
+            webhook_event.save()
     
     def _map_event_type(self, stripe_event_type):
         """Map Stripe event type to internal event type."""
@@ -252,8 +267,6 @@ class StripeGateway:
                 payment.status = 'PAID'
                 payment.transaction_id = payment_intent['id']
                 payment.save()
-            
-            return HttpResponse(status=200)
         
         except Transaction.DoesNotExist:
             # If we can't find the transaction, check if it's from checkout session
@@ -290,19 +303,15 @@ class StripeGateway:
                     webhook_event.transaction = transaction
                     webhook_event.processed = True
                     webhook_event.save()
-                    
-                    return HttpResponse(status=200)
                 
                 except Order.DoesNotExist:
                     webhook_event.error_message = f"Order not found: {order_id}"
                     webhook_event.processed = True
                     webhook_event.save()
-                    return HttpResponse(status=400)
             
             webhook_event.error_message = f"Transaction not found for payment intent: {payment_intent['id']}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=400)
     
     def _handle_payment_failure(self, event, webhook_event):
         """Handle failed payment event."""
@@ -332,78 +341,66 @@ class StripeGateway:
             if payment:
                 payment.status = 'FAILED'
                 payment.save()
-            
-            return HttpResponse(status=200)
         
         except Transaction.DoesNotExist:
             webhook_event.error_message = f"Transaction not found for payment intent: {payment_intent['id']}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=400)
     
     def _handle_refund(self, event, webhook_event):
         """Handle refund event."""
         charge = event['data']['object']
         
-        try:
-            # Find transaction by charge ID
-            transaction = Transaction.objects.filter(
-                gateway='STRIPE',
-                gateway_response__contains=charge['id']
-            ).first()
-            
-            if not transaction:
-                webhook_event.error_message = f"Transaction not found for charge: {charge['id']}"
-                webhook_event.processed = True
-                webhook_event.save()
-                return HttpResponse(status=400)
-            
-            # Calculate refund amount
-            refund_amount = Decimal(charge['amount_refunded']) / 100  # Convert cents to dollars
-            
-            # Update transaction
-            if refund_amount >= Decimal(charge['amount']) / 100:
-                transaction.status = 'REFUNDED'
-            else:
-                transaction.status = 'PARTIALLY_REFUNDED'
-            
-            transaction.refund_amount = refund_amount
-            transaction.gateway_response = charge
-            transaction.save()
-            
-            # Create refund record
-            from ..models import Refund
-            refund = Refund.objects.create(
-                transaction=transaction,
-                amount=refund_amount,
-                reason='Refund processed through Stripe',
-                status='COMPLETED',
-                gateway_refund_id=charge['refunds']['data'][0]['id'] if charge['refunds']['data'] else None,
-                gateway_response=charge['refunds']['data'][0] if charge['refunds']['data'] else None
-            )
-            
-            # Link webhook event to transaction
-            webhook_event.transaction = transaction
-            webhook_event.processed = True
-            webhook_event.save()
-            
-            # Update order payment
-            from orders.models import Payment
-            payment = transaction.payment
-            if payment:
-                if refund_amount >= Decimal(charge['amount']) / 100:
-                    payment.status = 'REFUNDED'
-                else:
-                    payment.status = 'PARTIALLY_REFUNDED'
-                payment.save()
-            
-            return HttpResponse(status=200)
+        # Find transaction by charge ID
+        transaction = Transaction.objects.filter(
+            gateway='STRIPE',
+            gateway_response__contains=charge['id']
+        ).first()
         
-        except Exception as e:
-            webhook_event.error_message = str(e)
+        if not transaction:
+            webhook_event.error_message = f"Transaction not found for charge: {charge['id']}"
             webhook_event.processed = True
             webhook_event.save()
-            return HttpResponse(status=500)
+            return
+        
+        # Calculate refund amount
+        refund_amount = Decimal(charge['amount_refunded']) / 100  # Convert cents to dollars
+        
+        # Update transaction
+        if refund_amount >= Decimal(charge['amount']) / 100:
+            transaction.status = 'REFUNDED'
+        else:
+            transaction.status = 'PARTIALLY_REFUNDED'
+        
+        transaction.refund_amount = refund_amount
+        transaction.gateway_response = charge
+        transaction.save()
+        
+        # Create refund record
+        from ..models import Refund
+        refund = Refund.objects.create(
+            transaction=transaction,
+            amount=refund_amount,
+            reason='Refund processed through Stripe',
+            status='COMPLETED',
+            gateway_refund_id=charge['refunds']['data'][0]['id'] if charge['refunds']['data'] else None,
+            gateway_response=charge['refunds']['data'][0] if charge['refunds']['data'] else None
+        )
+        
+        # Link webhook event to transaction
+        webhook_event.transaction = transaction
+        webhook_event.processed = True
+        webhook_event.save()
+        
+        # Update order payment
+        from orders.models import Payment
+        payment = transaction.payment
+        if payment:
+            if refund_amount >= Decimal(charge['amount']) / 100:
+                payment.status = 'REFUNDED'
+            else:
+                payment.status = 'PARTIALLY_REFUNDED'
+            payment.save()
     
     def create_refund(self, transaction, amount, reason):
         """Create a refund for a transaction."""
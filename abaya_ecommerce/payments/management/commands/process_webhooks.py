@@ -0,0 +1,31 @@
+# payments/management/commands/process_webhooks.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.webhooks import BATCH_SIZE, process_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Process the payment webhook events received from the gateways'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and process new events as they arrive')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds to wait when there are no events with --loop')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Events claimed at a time')
+
+    def handle(self, *args, **options):
+        while True:
+            total_processed = total_failed = 0
+            while True:
+                processed, failed = process_webhook_events(options['batch_size'])
+                total_processed += processed
+                total_failed += failed
+                if not processed and not failed:
+                    break
+
+            if total_processed or total_failed or not options['loop']:
+                self.stdout.write(f"Processed {total_processed} webhook events, {total_failed} failed.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
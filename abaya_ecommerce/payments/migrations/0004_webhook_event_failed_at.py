@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_webhook_event_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.db import models
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
@@ -153,10 +154,15 @@ class WebhookEvent(models.Model):
     event_id = models.CharField(max_length=255)
     is_test = models.BooleanField(default=True)
     payload = models.JSONField()
-    processed = models.BooleanField(default=False)
+    processed = models.BooleanField(default=False, db_index=True)
     transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhook_events')
     error_message = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    # Set when the event is given up on after its last attempt; processed stays False
+    failed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
         verbose_name = 'Webhook Event'
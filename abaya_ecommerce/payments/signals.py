@@ -1,11 +1,12 @@
 # payments/signals.py
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
 
-from .models import Transaction, Refund
+from core.outbox import queue_email
+
+from .gateways.factory import gateway_registry
+from .models import PaymentGatewaySettings, Transaction, Refund
 
 @receiver(post_save, sender=Transaction)
 def send_transaction_notification(sender, instance, created, **kwargs):
@@ -19,16 +20,13 @@ def send_transaction_notification(sender, instance, created, **kwargs):
                 'order': instance.order,
                 'user': instance.order.user
             }
-            html_message = render_to_string('payments/emails/transaction_initiated.html', context)
-            plain_message = render_to_string('payments/emails/transaction_initiated_plain.html', context)
-            
-            send_mail(
+            queue_email(
+                instance.order.user.email,
                 subject,
-                plain_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [instance.order.user.email],
-                html_message=html_message,
-                fail_silently=True
+                html_template='payments/emails/transaction_initiated.html',
+                text_template='payments/emails/transaction_initiated_plain.html',
+                context=context,
+                user=instance.order.user
             )
     else:
         # Check if status has changed
@@ -45,16 +43,13 @@ def send_transaction_notification(sender, instance, created, **kwargs):
                         'old_status': old_instance.status,
                         'new_status': instance.status
                     }
-                    html_message = render_to_string('payments/emails/transaction_update.html', context)
-                    plain_message = render_to_string('payments/emails/transaction_update_plain.html', context)
-                    
-                    send_mail(
+                    queue_email(
+                        instance.order.user.email,
                         subject,
-                        plain_message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [instance.order.user.email],
-                        html_message=html_message,
-                        fail_silently=True
+                        html_template='payments/emails/transaction_update.html',
+                        text_template='payments/emails/transaction_update_plain.html',
+                        context=context,
+                        user=instance.order.user
                     )
         except Transaction.DoesNotExist:
             pass
@@ -72,16 +67,13 @@ def send_refund_notification(sender, instance, created, **kwargs):
                 'order': instance.transaction.order,
                 'user': instance.transaction.order.user
             }
-            html_message = render_to_string('payments/emails/refund_initiated.html', context)
-            plain_message = render_to_string('payments/emails/refund_initiated_plain.html', context)
-            
-            send_mail(
+            queue_email(
+                instance.transaction.order.user.email,
                 subject,
-                plain_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [instance.transaction.order.user.email],
-                html_message=html_message,
-                fail_silently=True
+                html_template='payments/emails/refund_initiated.html',
+                text_template='payments/emails/refund_initiated_plain.html',
+                context=context,
+                user=instance.transaction.order.user
             )
     else:
         # Check if status has changed
@@ -99,16 +91,19 @@ def send_refund_notification(sender, instance, created, **kwargs):
                         'old_status': old_instance.status,
                         'new_status': instance.status
                     }
-                    html_message = render_to_string('payments/emails/refund_update.html', context)
-                    plain_message = render_to_string('payments/emails/refund_update_plain.html', context)
-                    
-                    send_mail(
+                    queue_email(
+                        instance.transaction.order.user.email,
                         subject,
-                        plain_message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [instance.transaction.order.user.email],
-                        html_message=html_message,
-                        fail_silently=True
+                        html_template='payments/emails/refund_update.html',
+                        text_template='payments/emails/refund_update_plain.html',
+                        context=context,
+                        user=instance.transaction.order.user
                     )
         except Refund.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
+
+@receiver(post_save, sender=PaymentGatewaySettings)
+@receiver(post_delete, sender=PaymentGatewaySettings)
+def invalidate_gateway_registry(sender, instance, **kwargs):
+    """Rebuild the gateway in every worker once the change is committed."""
+    transaction.on_commit(gateway_registry.invalidate)
\ No newline at end of file
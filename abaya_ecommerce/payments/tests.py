@@ -1,3 +1,83 @@
+# payments/tests.py
+from unittest import mock
+
+import stripe
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .gateways.factory import PaymentGatewayFactory, gateway_registry
+from .models import PaymentGatewaySettings
+
+FAKE_API_BASE = 'http://localhost:12111'
+
+
+class GatewayRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # The registry outlives each test's database rollback
+        gateway_registry.invalidate()
+        self.addCleanup(gateway_registry.invalidate)
+        self.addCleanup(setattr, stripe, 'api_base', stripe.api_base)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stripe_settings = PaymentGatewaySettings.objects.create(
+                gateway='STRIPE', is_active=True, display_name='Card', api_key='pk_test', api_secret='sk_test_1',
+                additional_settings={'api_base': FAKE_API_BASE},
+            )
+            self.razorpay_settings = PaymentGatewaySettings.objects.create(
+                gateway='RAZORPAY', is_active=True, display_name='UPI', api_key='rzp_test', api_secret='secret',
+                additional_settings={'api_base': FAKE_API_BASE},
+            )
+
+    def save(self, gateway_settings):
+        with self.captureOnCommitCallbacks(execute=True):
+            gateway_settings.save()
+
+    def test_gateway_instances_are_reused(self):
+        gateway = PaymentGatewayFactory.get_gateway('STRIPE')
+        
+        with self.assertNumQueries(0):
+            self.assertIs(PaymentGatewayFactory.get_gateway('STRIPE'), gateway)
+
+    def test_saving_settings_rebuilds_only_that_gateway(self):
+        stripe_gateway = PaymentGatewayFactory.get_gateway('STRIPE')
+        razorpay_gateway = PaymentGatewayFactory.get_gateway('RAZORPAY')
+        
+        self.stripe_settings.api_secret = 'sk_test_2'
+        self.save(self.stripe_settings)
+        
+        rebuilt = PaymentGatewayFactory.get_gateway('STRIPE')
+        self.assertIsNot(rebuilt, stripe_gateway)
+        self.assertEqual(rebuilt.gateway_settings.api_secret, 'sk_test_2')
+        self.assertEqual(stripe.api_key, 'sk_test_2')
+        self.assertIs(PaymentGatewayFactory.get_gateway('RAZORPAY'), razorpay_gateway)
+
+    def test_deactivated_gateway_is_unavailable(self):
+        PaymentGatewayFactory.get_gateway('RAZORPAY')
+        
+        self.razorpay_settings.is_active = False
+        self.save(self.razorpay_settings)
+        
+        with self.assertRaisesMessage(ValueError, 'Payment gateway RAZORPAY is not active'):
+            PaymentGatewayFactory.get_gateway('RAZORPAY')
+        self.assertEqual([gateway['id'] for gateway in PaymentGatewayFactory.get_available_gateways()], ['STRIPE'])
+
+    def test_stripe_calls_go_to_api_base(self):
+        PaymentGatewayFactory.get_gateway('STRIPE')
+        self.assertEqual(stripe.api_base, FAKE_API_BASE)
+        
+        self.stripe_settings.additional_settings = {}
+        self.save(self.stripe_settings)
+        PaymentGatewayFactory.get_gateway('STRIPE')
+        self.assertEqual(stripe.api_base, stripe.DEFAULT_API_BASE)
+
+    def test_razorpay_calls_go_to_api_base(self):
+        gateway = PaymentGatewayFactory.get_gateway('RAZORPAY')
+        response = mock.Mock(status_code=200, **{'json.return_value': {'id': 'order_1'}})
+        
+        with mock.patch.object(gateway.client.session, 'request', return_value=response) as request:
+            self.assertEqual(gateway.client.order.fetch('order_1'), {'id': 'order_1'})
+        
+        method, url = request.call_args.args[:2]
+        self.assertEqual(method, 'GET')
+        self.assertTrue(url.startswith(FAKE_API_BASE), url)
@@ -0,0 +1,110 @@
+# payments/webhooks.py
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'WEBHOOK_BATCH_SIZE', 50)
+MAX_ATTEMPTS = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'WEBHOOK_RETRY_DELAY', 30)  # seconds, doubled after every failed attempt
+MAX_RETRY_DELAY = getattr(settings, 'WEBHOOK_MAX_RETRY_DELAY', 60 * 60)  # seconds
+# How long a worker holds the events it claimed; if it dies they are retried after this
+LEASE = getattr(settings, 'WEBHOOK_LEASE', 5 * 60)  # seconds
+
+def ingest_webhook(gateway, event_id, event_type, payload, is_test):
+    """
+    Store a verified webhook event for the webhook worker
+    (manage.py process_webhooks).
+    
+    Events are unique per gateway and event_id, so a gateway retrying a
+    delivery does not queue the work twice.
+    
+    Returns:
+        (webhook_event, created)
+    """
+    return WebhookEvent.objects.get_or_create(
+        gateway=gateway,
+        event_id=event_id,
+        defaults={
+            'event_type': event_type,
+            'payload': payload,
+            'is_test': is_test,
+        },
+    )
+
+def claim_events(batch_size=BATCH_SIZE):
+    """
+    Claim up to batch_size due events that are neither processed nor failed,
+    oldest first, by pushing
+    their next attempt past the lease, so concurrent workers skip them.
+    """
+    now = timezone.now()
+    due = WebhookEvent.objects.filter(processed=False, failed_at__isnull=True, next_attempt_at__lte=now)
+    ids = list(due.order_by('created_at').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    
+    lease_until = now + timedelta(seconds=LEASE)
+    due.filter(pk__in=ids).update(next_attempt_at=lease_until)
+    return list(WebhookEvent.objects.filter(pk__in=ids, next_attempt_at=lease_until).order_by('created_at'))
+
+def _mark_failed(event, error):
+    attempts = event.attempts + 1
+    if attempts < MAX_ATTEMPTS:
+        delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        WebhookEvent.objects.filter(pk=event.pk).update(
+            attempts=attempts, next_attempt_at=timezone.now() + timedelta(seconds=delay), error_message=error
+        )
+        logger.warning(f"{event.gateway} webhook {event.event_id} failed (attempt {attempts}), retrying in {delay}s: {error}")
+        return
+    
+    WebhookEvent.objects.filter(pk=event.pk).update(
+        failed_at=timezone.now(), attempts=attempts, error_message=error
+    )
+    logger.error(f"Giving up on {event.gateway} webhook {event.event_id} after {attempts} attempts: {error}")
+
+def process_webhook_events(batch_size=BATCH_SIZE):
+    """
+    Run the gateway handlers for one batch of due webhook events, in the
+    order they were received.
+    
+    Each event is handled in its own transaction, so a failed attempt leaves
+    no partial updates behind before it is retried.
+    
+    Returns:
+        (processed, failed) counts; failed events are retried with backoff
+        and marked failed_at after MAX_ATTEMPTS
+    """
+    from .gateways.factory import PaymentGatewayFactory
+    
+    events = claim_events(batch_size)
+    if not events:
+        return 0, 0
+    
+    processed = failed = 0
+    gateways = {}
+    for event in events:
+        try:
+            gateway = gateways.get(event.gateway)
+            if gateway is None:
+                gateway = gateways[event.gateway] = PaymentGatewayFactory.get_gateway(event.gateway)
+            
+            with transaction.atomic():
+                gateway.handle_webhook_event(event)
+                WebhookEvent.objects.filter(pk=event.pk).update(
+                    processed=True, processed_at=timezone.now(), attempts=event.attempts + 1
+                )
+        except Exception as e:
+            _mark_failed(event, str(e))
+            failed += 1
+            continue
+        
+        processed += 1
+    
+    return processed, failed
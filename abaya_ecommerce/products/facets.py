@@ -0,0 +1,199 @@
+# products/facets.py
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+
+from core.registry import VersionedRegistry
+
+ATTRIBUTE_FACETS = ('size', 'fabric', 'color')
+
+# Sort key per listing order, from a product's (id, price, average_rating, review_count,
+# popularity_score); 'newest' is the index order and 'relevance' the search results' order
+SORT_KEYS = {
+    'price_low': lambda product: product[1],
+    'price_high': lambda product: -product[1],
+    'rating': lambda product: (-product[2], -product[3]),
+    'popularity': lambda product: -product[4],
+}
+
+
+def get_selected_ids(request, name):
+    """
+    Get the ids selected for a facet from the query string, accepting both
+    ?size=<id> and the sidebar's ?size_id=<id>, repeated for several values.
+    """
+    selected = set()
+    for value in request.GET.getlist(name) + request.GET.getlist(f'{name}_id'):
+        try:
+            selected.add(uuid.UUID(value))
+        except ValueError:
+            continue
+    return selected
+
+
+def _iter_positions(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class FacetResult:
+    """Products matching a facet search, with per-value counts for every facet."""
+
+    def __init__(self, product_ids, counts):
+        self.product_ids = product_ids  # In the requested sort order
+        self.count = len(product_ids)
+        self.counts = counts  # {'size': {size_id: count}, 'fabric': {...}, 'color': {...}}
+
+    def label_choices(self, facet, objects, selected=()):
+        """
+        Set facet_count and facet_selected on Size/Fabric/Color objects for the sidebar.
+        Returns the objects as a list.
+        """
+        counts = self.counts[facet]
+        objects = list(objects)
+        for obj in objects:
+            obj.facet_count = counts.get(obj.id, 0)
+            obj.facet_selected = obj.id in selected
+        return objects
+
+
+class FacetIndex(VersionedRegistry):
+    """
+    In-memory inverted index of active products by size, fabric, color and
+    category, with their prices and sort orders.
+
+    Each product gets a bit position and each attribute value an int bitmask
+    of the products that have it, so filter combinations are resolved with
+    bitwise AND/OR and counted with int.bit_count(). Catalog changes
+    invalidate the index (see products.signals).
+    """
+
+    VERSION_CACHE_KEY = 'product_facet_index_version'
+    CHECK_INTERVAL = getattr(settings, 'FACET_INDEX_CHECK_INTERVAL', 5)  # seconds
+
+    def _load(self):
+        from .models import CategoryClosure, FabricColor, Product, ProductCategory, ProductFabric, ProductSize
+
+        # Positions follow the default listing order, newest first
+        products = list(Product.objects.filter(is_active=True).order_by('-created_at').values_list(
+            'id', 'price', 'average_rating', 'review_count', 'popularity_score'
+        ))
+        ids = [product[0] for product in products]
+        prices = [product[1] for product in products]
+        positions = {product_id: position for position, product_id in enumerate(ids)}
+
+        def build(pairs):
+            masks = defaultdict(int)
+            for product_id, value in pairs:
+                position = positions.get(product_id)
+                if position is not None:
+                    masks[value] |= 1 << position
+            return dict(masks)
+
+        sizes = build(ProductSize.objects.values_list('product_id', 'size_id'))
+        fabrics = build(ProductFabric.objects.values_list('product_id', 'fabric_id'))
+
+        # A product comes in every color available for one of its fabrics
+        colors = defaultdict(int)
+        for fabric_id, color_id in FabricColor.objects.values_list('fabric_id', 'color_id'):
+            colors[color_id] |= fabrics.get(fabric_id, 0)
+
+        # A category contains the products of its subtree, read from the closure table
+        direct = build(ProductCategory.objects.values_list('product_id', 'category_id'))
+        categories = {}
+        for category_id, subtree in CategoryClosure.get_subtrees().items():
+            mask = 0
+            for descendant_id in subtree:
+                mask |= direct.get(descendant_id, 0)
+            categories[category_id] = mask
+
+        # Rank of every position per sort order; sorting is stable, so ties stay newest first
+        sort_ranks = {}
+        for sort, key in SORT_KEYS.items():
+            ranks = [0] * len(products)
+            for rank, position in enumerate(sorted(range(len(products)), key=lambda position: key(products[position]))):
+                ranks[position] = rank
+            sort_ranks[sort] = ranks
+
+        return {
+            'ids': ids,
+            'positions': positions,
+            'prices': prices,
+            'all': (1 << len(ids)) - 1,
+            'size': sizes,
+            'fabric': fabrics,
+            'color': dict(colors),
+            'category': categories,
+            'sort_ranks': sort_ranks,
+        }
+
+    def search(self, category=None, sizes=(), fabrics=(), colors=(), min_price=None, max_price=None,
+               product_ids=None, sort=None, with_counts=True):
+        """
+        Find the active products matching all given filters (any of the values
+        within a facet) and count, for every facet value, how many products would
+        match if it were selected together with the other facets' filters.
+
+        Args:
+            category: Category id; includes subcategories
+            sizes, fabrics, colors: Selected ids per facet
+            min_price, max_price: Price range
+            product_ids: Restrict to these products (e.g. search results)
+            sort: One of SORT_KEYS, or 'relevance' for the order of product_ids;
+                newest first otherwise
+            with_counts: Count the facet values (skip when no sidebar shows them)
+
+        Returns:
+            FacetResult
+        """
+        index = self._get_snapshot()
+
+        base = index['all']
+        if category:
+            base &= index['category'].get(category, 0)
+        if product_ids is not None:
+            base &= sum(1 << index['positions'][pk] for pk in set(product_ids) if pk in index['positions'])
+
+        price_mask = index['all']
+        if min_price is not None or max_price is not None:
+            price_mask = 0
+            for position, price in enumerate(index['prices']):
+                if (min_price is None or price >= min_price) and (max_price is None or price <= max_price):
+                    price_mask |= 1 << position
+
+        selections = {}
+        for facet, selected in zip(ATTRIBUTE_FACETS, (sizes, fabrics, colors)):
+            if selected:
+                mask = 0
+                for value in selected:
+                    mask |= index[facet].get(value, 0)
+                selections[facet] = mask
+
+        def apply(mask, skip=None):
+            for facet, selection in selections.items():
+                if facet != skip:
+                    mask &= selection
+            return mask
+
+        result = apply(base & price_mask)
+
+        counts = {}
+        if with_counts:
+            for facet in ATTRIBUTE_FACETS:
+                others = apply(base & price_mask, skip=facet)
+                counts[facet] = {value: (mask & others).bit_count() for value, mask in index[facet].items()}
+
+        ids = index['ids']
+        positions = list(_iter_positions(result))
+        if sort in index['sort_ranks']:
+            positions.sort(key=index['sort_ranks'][sort].__getitem__)
+        elif sort == 'relevance' and product_ids is not None:
+            order = {pk: position for position, pk in enumerate(product_ids)}
+            positions.sort(key=lambda position: order[ids[position]])
+        return FacetResult([ids[position] for position in positions], counts)
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,15 @@
+# products/management/commands/rebuild_category_tree.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.models import CategoryClosure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category closure table from the category parent links'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = CategoryClosure.rebuild()
+        
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt category tree with {count} ancestor links."))
@@ -0,0 +1,20 @@
+# products/management/commands/rebuild_rating_aggregates.py
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the stored rating aggregates of products from their published reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Only rebuild the products with these slugs')
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['slugs']:
+            products = products.filter(slug__in=options['slugs'])
+        
+        products.rebuild_rating_aggregates()
+        
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {products.count()} products."))
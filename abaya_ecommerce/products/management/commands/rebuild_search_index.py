@@ -0,0 +1,14 @@
+# products/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product search index from the database'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products with {type(backend).__name__}."))
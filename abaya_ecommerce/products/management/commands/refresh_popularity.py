@@ -0,0 +1,26 @@
+# products/management/commands/refresh_popularity.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.popularity import refresh_popularity_scores, refresh_view_rollups
+
+
+class Command(BaseCommand):
+    help = 'Roll up new product views into hourly/daily counts and refresh product popularity scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Recount the views of the last N days instead of only new ones')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days']:
+            since = timezone.now() - timedelta(days=options['days'])
+        
+        rollups = refresh_view_rollups(since)
+        products = refresh_popularity_scores()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {rollups} hourly view rollups and updated {products} popularity scores."
+        ))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('products', 'Review')
+    
+    histograms = {}
+    rows = Review.objects.filter(is_published=True).values('product_id', 'rating').annotate(n=models.Count('id')).order_by()
+    for row in rows:
+        histograms.setdefault(row['product_id'], {})[row['rating']] = row['n']
+    
+    for product_id, histogram in histograms.items():
+        count = sum(histogram.values())
+        total = sum(rating * n for rating, n in histogram.items())
+        fields = {f'rating_{rating}_count': histogram.get(rating, 0) for rating in range(1, 6)}
+        Product.objects.filter(pk=product_id).update(
+            review_count=count,
+            average_rating=round(total / count, 2),
+            **fields
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_fix_migration_issue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
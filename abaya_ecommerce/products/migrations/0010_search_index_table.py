@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+TABLE = 'products_search_index'
+
+
+def _has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any('FTS5' in row[0] for row in cursor.fetchall())
+
+
+def create_search_index(apps, schema_editor):
+    """Create and fill the FTS5 table of products.search.sqlite_fts; other databases have no such table."""
+    connection = schema_editor.connection
+    if not _has_fts5(connection):
+        return
+    
+    Product = apps.get_model('products', 'Product')
+    SearchIndexEntry = apps.get_model('products', 'SearchIndexEntry')
+    
+    products = list(Product.objects.filter(is_active=True).prefetch_related('categories'))
+    entries = SearchIndexEntry.objects.bulk_create(
+        [SearchIndexEntry(product_id=product.id) for product in products], batch_size=500
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+            f"name, sku, categories, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.executemany(f"INSERT INTO {TABLE}(rowid, name, sku, categories, description) VALUES (%s, %s, %s, %s, %s)", [
+            (
+                entry.id,
+                product.name,
+                product.sku,
+                ' '.join(category.name for category in product.categories.all()),
+                product.description or '',
+            )
+            for product, entry in zip(products, entries)
+        ])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_category_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_id', models.UUIDField(unique=True)),
+            ],
+            options={
+                'verbose_name': 'Search Index Entry',
+                'verbose_name_plural': 'Search Index Entries',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
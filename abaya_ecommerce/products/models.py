@@ -2,10 +2,13 @@ from django.db import models
 
 # products/models.py
 import uuid
+from collections import defaultdict
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class Size(models.Model):
@@ -102,12 +105,164 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('category_detail', kwargs={'slug': self.slug})
     
+    def get_subtree(self):
+        """
+        Get this category and its subcategories from the category closure table,
+        leaving out inactive subcategories and everything below them.
+        """
+        links = CategoryClosure.objects.filter(ancestor=self)
+        hidden = CategoryClosure.objects.filter(
+            ancestor__in=links.filter(depth__gt=0, descendant__is_active=False).values('descendant')
+        ).values('descendant')
+        return Category.objects.filter(pk__in=links.exclude(descendant__in=hidden).values('descendant'))
+    
     def get_all_products(self):
-        """Get all products in this category and its subcategories."""
-        products = self.products.filter(is_active=True)
-        for child in self.children.filter(is_active=True):
-            products |= child.get_all_products()
-        return products
+        """Get all active products in this category and its subcategories, in one query."""
+        return Product.objects.filter(is_active=True).in_category(self)
+
+
+class CategoryClosure(models.Model):
+    """
+    Every ancestor/descendant pair of the category tree, including each
+    category paired with itself at depth 0. Maintained by products.signals.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+    
+    class Meta:
+        verbose_name = 'Category Closure'
+        verbose_name_plural = 'Category Closures'
+        unique_together = ('ancestor', 'descendant')
+    
+    def __str__(self):
+        return f"{self.ancestor.name} > {self.descendant.name} ({self.depth})"
+    
+    @classmethod
+    def link(cls, category):
+        """Add the rows of a new category: itself and every ancestor of its parent."""
+        rows = [cls(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+        if category.parent_id:
+            for ancestor_id, depth in cls.objects.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth'):
+                rows.append(cls(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1))
+        cls.objects.bulk_create(rows)
+    
+    @classmethod
+    def detach(cls, category):
+        """Remove the rows linking a category's subtree to the category's ancestors."""
+        subtree = cls.objects.filter(ancestor_id=category.pk).values('descendant_id')
+        ancestors = cls.objects.filter(descendant_id=category.pk, depth__gt=0).values('ancestor_id')
+        cls.objects.filter(descendant_id__in=subtree, ancestor_id__in=ancestors).delete()
+    
+    @classmethod
+    def attach(cls, category):
+        """Link a category's subtree below the ancestors of its (new) parent."""
+        if not category.parent_id:
+            return
+        ancestors = list(cls.objects.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth'))
+        subtree = list(cls.objects.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth'))
+        cls.objects.bulk_create([
+            cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + descendant_depth + 1)
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree
+        ])
+    
+    @classmethod
+    def get_subtrees(cls):
+        """
+        Every category's subtree as {category_id: set of category ids}, in one
+        query, with the same rule as Category.get_subtree(): inactive
+        subcategories and everything below them are left out.
+        """
+        subtrees = defaultdict(set)
+        inactive = set()
+        for ancestor_id, descendant_id, is_active in cls.objects.values_list('ancestor_id', 'descendant_id', 'descendant__is_active'):
+            subtrees[ancestor_id].add(descendant_id)
+            if not is_active:
+                inactive.add(descendant_id)
+        
+        result = {}
+        for category_id, descendants in subtrees.items():
+            hidden = set()
+            for descendant_id in descendants & inactive:
+                if descendant_id != category_id:
+                    hidden |= subtrees[descendant_id]
+            result[category_id] = descendants - hidden
+        return result
+    
+    @classmethod
+    def rebuild(cls):
+        """Recreate the whole table from Category.parent. Returns the number of rows."""
+        parents = dict(Category.objects.values_list('id', 'parent_id'))
+        rows = []
+        for category_id in parents:
+            ancestor_id, depth, seen = category_id, 0, set()
+            # Walk up to the root; the seen set guards against parent cycles
+            while ancestor_id is not None and ancestor_id not in seen:
+                seen.add(ancestor_id)
+                rows.append(cls(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+        cls.objects.all().delete()
+        cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+
+class ProductQuerySet(models.QuerySet):
+    def in_category(self, category):
+        """
+        Restrict to products in the category (a Category or its id) or any of
+        its active subcategories, without joins or distinct().
+        """
+        if not isinstance(category, Category):
+            category = Category(pk=category)
+        return self.filter(
+            pk__in=ProductCategory.objects.filter(category__in=category.get_subtree()).values('product_id')
+        )
+    
+    def with_default_image(self):
+        """
+        Prefetch image media for every product in the queryset with a single query,
+        ordered so that the default image (or the first image) comes first.
+        """
+        return self.prefetch_related(
+            models.Prefetch(
+                'media',
+                queryset=ProductMedia.objects.filter(type='IMAGE').order_by('-is_default', 'sort_order', 'created_at'),
+                to_attr='prefetched_images',
+            )
+        )
+
+    def adjust_rating(self, rating, delta):
+        """
+        Add (delta=1) or remove (delta=-1) one published review with the given
+        star rating from the stored rating aggregates of the products.
+        """
+        field = f'rating_{rating}_count'
+        self.update(**{
+            field: models.F(field) + delta,
+            'review_count': models.F('review_count') + delta,
+        })
+        self.update(average_rating=Product.average_rating_expression())
+
+    def rebuild_rating_aggregates(self):
+        """Recalculate the stored rating aggregates of the products from their published reviews."""
+        from django.db.models.functions import Coalesce
+        
+        published = Review.objects.filter(product=models.OuterRef('pk'), is_published=True).order_by()
+        
+        def count(reviews):
+            return Coalesce(
+                models.Subquery(reviews.values('product').annotate(c=models.Count('pk')).values('c')),
+                0,
+            )
+        
+        aggregates = {'review_count': count(published)}
+        for rating in range(1, 6):
+            aggregates[f'rating_{rating}_count'] = count(published.filter(rating=rating))
+        
+        self.update(**aggregates)
+        self.update(average_rating=Product.average_rating_expression())
 
 
 class Product(models.Model):
@@ -127,9 +282,21 @@ class Product(models.Model):
     # New fields for the simplified attribute model
     fabrics = models.ManyToManyField(Fabric, through='ProductFabric', related_name='products')
     sizes = models.ManyToManyField(Size, through='ProductSize', related_name='products')
+    # Aggregates of published reviews, maintained by the Review signals
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, db_index=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    # Time-decayed view score, refreshed from ProductViewRollup by products.popularity
+    popularity_score = models.FloatField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
@@ -155,23 +322,51 @@ class Product(models.Model):
     def get_active_price(self):
         return self.sale_price if self.sale_price else self.price
     
+    @staticmethod
+    def average_rating_expression():
+        """Expression computing the average rating from the stored star histogram."""
+        from django.db.models.functions import Cast
+        
+        total = sum(
+            (models.F(f'rating_{rating}_count') * rating for rating in range(2, 6)),
+            models.F('rating_1_count'),
+        )
+        return models.Case(
+            models.When(review_count=0, then=models.Value(0)),
+            default=Cast(total, models.FloatField()) / models.F('review_count'),
+            output_field=models.FloatField(),
+        )
+
     def get_rating(self):
-        reviews = self.reviews.filter(is_published=True)
-        if reviews.exists():
-            return round(sum(review.rating for review in reviews) / reviews.count(), 1)
+        if self.review_count:
+            return round(float(self.average_rating), 1)
         return 0
     
     def get_review_count(self):
-        return self.reviews.filter(is_published=True).count()
+        return self.review_count
+
+    def get_rating_stats(self):
+        """Get the average rating, review count and star histogram for display."""
+        stats = {
+            'avg_rating': self.average_rating if self.review_count else 0,
+            'count': self.review_count,
+        }
+        for rating in range(1, 6):
+            stats[f'rating_{rating}'] = getattr(self, f'rating_{rating}_count')
+        return stats
 
     def get_default_image(self):
         """Get the default image for this product, with fallback mechanisms."""
-        # Try to get the default image first
-        default_image = self.media.filter(is_default=True, type='IMAGE').first()
-        
-        # If no default image is found, try to get the first image
-        if not default_image:
-            default_image = self.media.filter(type='IMAGE').first()
+        # Use the images loaded by Product.objects.with_default_image() if available
+        if hasattr(self, 'prefetched_images'):
+            default_image = self.prefetched_images[0] if self.prefetched_images else None
+        else:
+            # Try to get the default image first
+            default_image = self.media.filter(is_default=True, type='IMAGE').first()
+            
+            # If no default image is found, try to get the first image
+            if not default_image:
+                default_image = self.media.filter(type='IMAGE').first()
         
         # If we found an image, return the file
         if default_image and default_image.file:
@@ -180,50 +375,31 @@ class Product(models.Model):
         # If no image is found, return None
         return None
 
+    @cached_property
+    def default_image(self):
+        """Default image resolved once per instance, for use in templates."""
+        return self.get_default_image()
+
     def get_price_display(self, currency=None):
         """
         Get formatted display price with currency symbol.
         Uses the current price if sale_price is not available.
         """
-        from core.currency_utils import convert_price, format_price, get_selected_currency_from_request
-        
-        # Get default currency and selected currency
-        default_currency = Currency.objects.get(is_default=True)
-        
-        # If no currency provided, use selected currency
-        if currency is None:
-            currency = get_selected_currency_from_request()
+        from core.currency_utils import get_current_pricing
         
         # Determine which price to use (sale price or regular price)
         price = self.sale_price if self.sale_price else self.price
         
-        # Convert price if needed
-        if default_currency and currency and default_currency.id != currency.id:
-            price = convert_price(price, default_currency, currency)
-        
-        # Format with currency symbol and return
-        return format_price(price, currency)
+        # Convert and format in the selected (or given) currency
+        return get_current_pricing(currency).display(price)
 
     def get_regular_price_display(self, currency=None):
         """
         Get formatted regular price with currency symbol.
         """
-        from core.currency_utils import convert_price, format_price, get_selected_currency_from_request
-        
-        # Get default currency and selected currency
-        default_currency = Currency.objects.get(is_default=True)
+        from core.currency_utils import get_current_pricing
         
-        # If no currency provided, use selected currency
-        if currency is None:
-            currency = get_selected_currency_from_request()
-        
-        # Convert price if needed
-        price = self.price
-        if default_currency and currency and default_currency.id != currency.id:
-            price = convert_price(price, default_currency, currency)
-        
-        # Format with currency symbol and return
-        return format_price(price, currency)
+        return get_current_pricing(currency).display(self.price)
 
     def get_available_colors(self):
         """Get all available colors for this product based on assigned fabrics."""
@@ -437,7 +613,7 @@ class PageView(models.Model):
     user_agent = models.TextField(blank=True, null=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     device_type = models.CharField(max_length=50, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # Event time; rows are written later in batches
     
     class Meta:
         verbose_name = 'Page View'
@@ -456,7 +632,7 @@ class ProductView(models.Model):
     user_agent = models.TextField(blank=True, null=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     device_type = models.CharField(max_length=50, blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)  # Event time; rows are written later in batches
     
     class Meta:
         verbose_name = 'Product View'
@@ -467,13 +643,35 @@ class ProductView(models.Model):
         return f"View of {self.product.name} at {self.created_at}"
 
 
+class ProductViewRollup(models.Model):
+    PERIOD_CHOICES = (
+        ('HOUR', 'Hour'),
+        ('DAY', 'Day'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='view_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField(db_index=True)
+    view_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Product View Rollup'
+        verbose_name_plural = 'Product View Rollups'
+        unique_together = ('product', 'period', 'period_start')
+        ordering = ['-period_start']
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.view_count} views ({self.get_period_display()} of {self.period_start})"
+
+
 class SearchQuery(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     query = models.CharField(max_length=255)
     user = models.ForeignKey('users.User', on_delete=models.SET_NULL, blank=True, null=True)
     session_id = models.CharField(max_length=255)
     results_count = models.IntegerField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)  # Event time; rows are written later in batches
     
     class Meta:
         verbose_name = 'Search Query'
@@ -484,6 +682,23 @@ class SearchQuery(models.Model):
         return f"Search for '{self.query}' with {self.results_count} results"
 
 
+
+class SearchIndexEntry(models.Model):
+    """
+    A product's row in the SQLite FTS5 search index (products.search.sqlite_fts).
+    The id is the row's rowid, so index rows are found without scanning the index.
+    """
+    id = models.BigAutoField(primary_key=True)
+    # Not a foreign key: the row must outlive a deleted product until it is removed from the index
+    product_id = models.UUIDField(unique=True)
+    
+    class Meta:
+        verbose_name = 'Search Index Entry'
+        verbose_name_plural = 'Search Index Entries'
+    
+    def __str__(self):
+        return f"Search index row {self.id} of product {self.product_id}"
+
 class Page(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
@@ -0,0 +1,120 @@
+# products/popularity.py
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import Product, ProductView, ProductViewRollup
+
+# Hours of already rolled-up views to recount, to pick up late analytics writes
+LOOKBACK_HOURS = getattr(settings, 'VIEW_ROLLUP_LOOKBACK_HOURS', 3)
+# Days of daily rollups that count towards the popularity score
+POPULARITY_WINDOW_DAYS = getattr(settings, 'POPULARITY_WINDOW_DAYS', 30)
+# A view loses half of its weight every POPULARITY_HALF_LIFE_DAYS
+POPULARITY_HALF_LIFE_DAYS = getattr(settings, 'POPULARITY_HALF_LIFE_DAYS', 7)
+
+
+def floor_hour(value):
+    """Start of the local hour containing value (the buckets follow TIME_ZONE)."""
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _get_refresh_start():
+    """Start of the first hour that needs to be (re)counted."""
+    now = timezone.now()
+    last_hour = ProductViewRollup.objects.filter(period='HOUR').aggregate(last=Max('period_start'))['last']
+    if last_hour is None:
+        # First run: count everything
+        last_hour = ProductView.objects.aggregate(first=Min('created_at'))['first']
+        if last_hour is None:
+            return None
+    else:
+        last_hour = min(last_hour, now - timedelta(hours=LOOKBACK_HOURS))
+    return floor_hour(last_hour)
+
+
+@transaction.atomic
+def refresh_view_rollups(since=None):
+    """
+    Recount hourly and daily per-product view rollups from ProductView rows
+    created since the given time (by default since the last rolled-up hour,
+    minus LOOKBACK_HOURS).
+
+    Returns:
+        Number of hourly rollup rows written
+    """
+    start = floor_hour(since) if since else _get_refresh_start()
+    if start is None:
+        return 0
+    
+    tz = timezone.get_current_timezone()
+    
+    # Hourly rollups
+    hours = ProductView.objects.filter(created_at__gte=start).annotate(
+        bucket=TruncHour('created_at', tzinfo=tz)
+    ).values('product_id', 'bucket').annotate(views=Count('id')).order_by()
+    
+    ProductViewRollup.objects.filter(period='HOUR', period_start__gte=start).delete()
+    rollups = ProductViewRollup.objects.bulk_create([
+        ProductViewRollup(product_id=row['product_id'], period='HOUR', period_start=row['bucket'], view_count=row['views'])
+        for row in hours
+    ], batch_size=500)
+    
+    # Daily rollups are summed from the hourly ones for every day touched
+    day_start = timezone.localtime(start, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    days = ProductViewRollup.objects.filter(period='HOUR', period_start__gte=day_start).annotate(
+        bucket=TruncDay('period_start', tzinfo=tz)
+    ).values('product_id', 'bucket').annotate(views=Sum('view_count')).order_by()
+    
+    ProductViewRollup.objects.filter(period='DAY', period_start__gte=day_start).delete()
+    ProductViewRollup.objects.bulk_create([
+        ProductViewRollup(product_id=row['product_id'], period='DAY', period_start=row['bucket'], view_count=row['views'])
+        for row in days
+    ], batch_size=500)
+    
+    return len(rollups)
+
+
+@transaction.atomic
+def refresh_popularity_scores():
+    """
+    Recalculate Product.popularity_score as the sum of daily views over the last
+    POPULARITY_WINDOW_DAYS, each day weighted by exponential decay.
+
+    Returns:
+        Number of products whose score changed
+    """
+    now = timezone.now()
+    window_start = now - timedelta(days=POPULARITY_WINDOW_DAYS)
+    
+    scores = {}
+    days = ProductViewRollup.objects.filter(period='DAY', period_start__gte=window_start).values_list(
+        'product_id', 'period_start', 'view_count'
+    )
+    for product_id, period_start, view_count in days:
+        age_days = max((now - period_start).total_seconds(), 0) / 86400
+        weight = math.pow(0.5, age_days / POPULARITY_HALF_LIFE_DAYS)
+        scores[product_id] = scores.get(product_id, 0) + view_count * weight
+    
+    changed = []
+    for product in Product.objects.filter(pk__in=scores.keys()).only('id', 'popularity_score'):
+        score = round(scores[product.id], 4)
+        if product.popularity_score != score:
+            product.popularity_score = score
+            changed.append(product)
+    Product.objects.bulk_update(changed, ['popularity_score'], batch_size=500)
+    
+    # Products without views in the window drop to zero
+    reset = Product.objects.exclude(pk__in=scores.keys()).exclude(popularity_score=0).update(popularity_score=0)
+    
+    # The facet index sorts by popularity from its own copy of the scores
+    if changed or reset:
+        from .facets import facet_index
+        
+        transaction.on_commit(facet_index.invalidate)
+    
+    return len(changed) + reset
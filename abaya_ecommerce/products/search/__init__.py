@@ -0,0 +1,50 @@
+# products/search/__init__.py
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+_backend = None
+
+def get_search_backend():
+    """
+    Get the product search backend.
+    Uses settings.PRODUCT_SEARCH_BACKEND if set, otherwise SQLite FTS5 when
+    available and plain database lookups elsewhere.
+    """
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+        if backend_path:
+            _backend = import_string(backend_path)()
+        else:
+            from .sqlite_fts import SQLiteFTSBackend
+            if SQLiteFTSBackend.is_available():
+                _backend = SQLiteFTSBackend()
+            else:
+                from .database import DatabaseSearchBackend
+                _backend = DatabaseSearchBackend()
+    return _backend
+
+def preserve_order(queryset, product_ids):
+    """Order a product queryset like the given list of ids."""
+    return queryset.annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(product_ids)],
+            output_field=IntegerField()
+        )
+    ).order_by('search_rank')
+
+def search_products(queryset, query, ordered=True):
+    """
+    Restrict a product queryset to the products matching the search query.
+    
+    Args:
+        queryset: Product queryset to filter
+        query: Text entered by the user
+        ordered: Order by relevance (pass False to keep the queryset's ordering)
+    """
+    product_ids = get_search_backend().search(query)
+    queryset = queryset.filter(pk__in=product_ids)
+    if ordered and product_ids:
+        queryset = preserve_order(queryset, product_ids)
+    return queryset
@@ -0,0 +1,65 @@
+# products/search/base.py
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+
+# Upper bound on the number of ranked ids a search returns. Searches are
+# answered with the MAX_RESULTS best matches only: result pages and counts
+# (product_list, search) end there, and the search views say so.
+MAX_RESULTS = getattr(settings, 'PRODUCT_SEARCH_MAX_RESULTS', 500)
+
+def tokenize(query):
+    """Split a user query into lower-case word tokens."""
+    return re.findall(r'\w+', (query or '').lower())
+
+class BaseSearchBackend(ABC):
+    """
+    Abstract base class for product search backends.
+    All search backend classes should implement these methods.
+    """
+    
+    @abstractmethod
+    def search(self, query, limit=None):
+        """
+        Search active products.
+        
+        Args:
+            query: Text entered by the user
+            limit: Maximum number of results (defaults to MAX_RESULTS)
+            
+        Returns:
+            list: Product ids, best match first; at most limit of them, so
+            len() is a count of all matches only below the limit
+        """
+        pass
+    
+    @abstractmethod
+    def autocomplete(self, query, limit=10):
+        """
+        Match product names and SKUs starting with the words typed so far.
+        
+        Returns:
+            list: Product ids, best match first
+        """
+        pass
+    
+    @abstractmethod
+    def index_products(self, product_ids):
+        """Add, refresh or remove the index entries of the given products."""
+        pass
+    
+    @abstractmethod
+    def remove_products(self, product_ids):
+        """Remove the given products from the index."""
+        pass
+    
+    @abstractmethod
+    def rebuild(self):
+        """
+        Rebuild the whole index from the database.
+        
+        Returns:
+            int: Number of products indexed
+        """
+        pass
@@ -0,0 +1,41 @@
+# products/search/database.py
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from ..models import Product
+from .base import BaseSearchBackend, MAX_RESULTS
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend for databases without a full-text index.
+    Uses icontains lookups; products whose name matches come first.
+    """
+    
+    def search(self, query, limit=None):
+        products = Product.objects.filter(
+            Q(name__icontains=query) | 
+            Q(description__icontains=query) |
+            Q(sku__icontains=query) |
+            Q(categories__name__icontains=query)
+        ).filter(is_active=True).annotate(
+            name_match=Case(When(name__icontains=query, then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by('name_match', 'name').distinct()
+        
+        return list(products.values_list('id', flat=True)[:limit or MAX_RESULTS])
+    
+    def autocomplete(self, query, limit=10):
+        products = Product.objects.filter(
+            Q(name__icontains=query) | 
+            Q(sku__icontains=query)
+        ).filter(is_active=True).order_by('name')
+        
+        return list(products.values_list('id', flat=True)[:limit])
+    
+    # The database is the index; nothing to maintain
+    def index_products(self, product_ids):
+        pass
+    
+    def remove_products(self, product_ids):
+        pass
+    
+    def rebuild(self):
+        return 0
@@ -0,0 +1,127 @@
+# products/search/sqlite_fts.py
+import uuid
+
+from django.db import connection, transaction
+
+from ..models import Product, SearchIndexEntry
+from .base import BaseSearchBackend, MAX_RESULTS, tokenize
+
+# Created by the products 0010 migration; its rowids are SearchIndexEntry ids
+TABLE = 'products_search_index'
+
+# Indexed columns, with their bm25 weights
+COLUMNS = (
+    ('name', 10.0),
+    ('sku', 8.0),
+    ('categories', 4.0),
+    ('description', 1.0),
+)
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Search backend using an SQLite FTS5 virtual table (see the products
+    0010 migration). Index rows are found by rowid through SearchIndexEntry.
+    """
+    
+    @staticmethod
+    def is_available():
+        """Check whether the SQLite library was compiled with FTS5."""
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            return any('FTS5' in row[0] for row in cursor.fetchall())
+    
+    def _match_expression(self, query, prefix_all=False, columns=None):
+        """
+        Build an FTS5 query that requires every word; the last word (or every
+        word with prefix_all) also matches as a prefix.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        
+        terms = []
+        for i, token in enumerate(tokens):
+            term = f'"{token}"'
+            if prefix_all or i == len(tokens) - 1:
+                term += '*'
+            terms.append(term)
+        
+        expression = ' '.join(terms)
+        if columns:
+            expression = '{' + ' '.join(columns) + '} : (' + expression + ')'
+        return expression
+    
+    def _query(self, match, limit):
+        if not match:
+            return []
+        
+        weights = ', '.join(str(weight) for name, weight in COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT entry.product_id FROM {TABLE} "
+                f"JOIN {SearchIndexEntry._meta.db_table} entry ON entry.id = {TABLE}.rowid "
+                f"WHERE {TABLE} MATCH %s ORDER BY bm25({TABLE}, {weights}) LIMIT %s",
+                [match, limit]
+            )
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+    
+    def search(self, query, limit=None):
+        return self._query(self._match_expression(query), limit or MAX_RESULTS)
+    
+    def autocomplete(self, query, limit=10):
+        return self._query(self._match_expression(query, prefix_all=True, columns=('name', 'sku')), limit)
+    
+    def _get_rows(self, products):
+        rows = []
+        for product in products.prefetch_related('categories').iterator(chunk_size=500):
+            rows.append((
+                product.id,
+                product.name,
+                product.sku,
+                ' '.join(category.name for category in product.categories.all()),
+                product.description or '',
+            ))
+        return rows
+    
+    def _insert(self, cursor, rows):
+        # Rows are (product_id, *COLUMNS); each product gets a new rowid
+        entries = SearchIndexEntry.objects.bulk_create(
+            [SearchIndexEntry(product_id=row[0]) for row in rows], batch_size=500
+        )
+        columns = ', '.join(name for name, weight in COLUMNS)
+        placeholders = ', '.join(['%s'] * (len(COLUMNS) + 1))
+        cursor.executemany(
+            f"INSERT INTO {TABLE}(rowid, {columns}) VALUES ({placeholders})",
+            [(entry.id, *row[1:]) for entry, row in zip(entries, rows)]
+        )
+    
+    def _delete(self, cursor, product_ids):
+        entries = SearchIndexEntry.objects.filter(product_id__in=product_ids)
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(rowid,) for rowid in entries.values_list('id', flat=True)])
+        entries.delete()
+    
+    def index_products(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        
+        rows = self._get_rows(Product.objects.filter(pk__in=product_ids, is_active=True))
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._delete(cursor, product_ids)
+            self._insert(cursor, rows)
+    
+    def remove_products(self, product_ids):
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._delete(cursor, list(product_ids))
+    
+    def rebuild(self):
+        rows = self._get_rows(Product.objects.filter(is_active=True))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            SearchIndexEntry.objects.all().delete()
+            self._insert(cursor, rows)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+        return len(rows)
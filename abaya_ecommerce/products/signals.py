@@ -1,11 +1,16 @@
 # Update the signals.py file in products app
 
 # products/signals.py
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
-from .models import Category, Product, ProductMedia, SEO, FabricColor, Size, ProductSize
+from .models import (
+    Category, CategoryClosure, Color, Fabric, Product, ProductCategory, ProductFabric, ProductMedia,
+    SEO, FabricColor, Size, ProductSize, Review, ReviewImage
+)
 
 @receiver(pre_save, sender=Category)
 def ensure_category_slug(sender, instance, **kwargs):
@@ -107,4 +112,172 @@ def associate_size_with_all_products(sender, instance, created, **kwargs):
             ProductSize.objects.get_or_create(
                 product=product,
                 size=instance
-            )
\ No newline at end of file
+            )
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    """Remember the stored rating of a review so its product's aggregates can be adjusted."""
+    instance._previous_rating = None
+    if not raw and not instance._state.adding:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'rating', 'is_published'
+        ).first()
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, raw=False, **kwargs):
+    """
+    Keep the product rating aggregates in step when a review is created, edited,
+    published or unpublished.
+    """
+    if raw:
+        return
+    
+    previous = getattr(instance, '_previous_rating', None)
+    if previous == (instance.product_id, instance.rating, instance.is_published):
+        return
+    
+    if previous and previous[2]:
+        Product.objects.filter(pk=previous[0]).adjust_rating(previous[1], -1)
+    if instance.is_published:
+        Product.objects.filter(pk=instance.product_id).adjust_rating(instance.rating, 1)
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """Remove a deleted published review from the product rating aggregates."""
+    if instance.is_published:
+        Product.objects.filter(pk=instance.product_id).adjust_rating(instance.rating, -1)
+
+def reindex_products(product_ids):
+    """Refresh the search index entries of the given products once the transaction commits."""
+    from .search import get_search_backend
+    
+    product_ids = list(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: get_search_backend().index_products(product_ids))
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    """Keep the search index in sync with product changes."""
+    if not raw:
+        reindex_products([instance.pk])
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """Remove deleted products from the search index."""
+    from .search import get_search_backend
+    
+    product_id = instance.pk
+    transaction.on_commit(lambda: get_search_backend().remove_products([product_id]))
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    """Category names are indexed with their products; refresh them on rename."""
+    if not created and not raw:
+        reindex_products(instance.products.values_list('id', flat=True))
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def reindex_product_categories(sender, instance, raw=False, **kwargs):
+    """Refresh a product's index entry when it is added to or removed from a category."""
+    if not raw:
+        reindex_products([instance.product_id])
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductFabric)
+@receiver(post_delete, sender=ProductFabric)
+@receiver(post_save, sender=ProductSize)
+@receiver(post_delete, sender=ProductSize)
+@receiver(post_save, sender=FabricColor)
+@receiver(post_delete, sender=FabricColor)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_facet_index(sender, **kwargs):
+    """Reload the facet index (and its rating sort order) after catalog changes are committed."""
+    from .facets import facet_index
+    
+    transaction.on_commit(facet_index.invalidate)
+
+@receiver(pre_save, sender=Category)
+def remember_category_parent(sender, instance, raw=False, **kwargs):
+    """Remember the stored parent of a category so a move can be detected."""
+    instance._previous_parent_id = None
+    if not raw and not instance._state.adding:
+        instance._previous_parent_id = Category.objects.filter(pk=instance.pk).values_list('parent_id', flat=True).first()
+
+@receiver(post_save, sender=Category)
+def update_category_closure(sender, instance, created, raw=False, **kwargs):
+    """Keep the category closure table in step with new and moved categories."""
+    if raw:
+        return
+    
+    if created:
+        CategoryClosure.link(instance)
+    elif instance.parent_id != getattr(instance, '_previous_parent_id', None):
+        CategoryClosure.detach(instance)
+        CategoryClosure.attach(instance)
+
+@receiver(pre_delete, sender=Category)
+def detach_category_closure(sender, instance, **kwargs):
+    """
+    Subcategories of a deleted category become top-level categories
+    (parent is SET_NULL), so unlink them from its ancestors.
+    """
+    CategoryClosure.detach(instance)
+
+@receiver(post_save, sender=ProductMedia)
+@receiver(post_delete, sender=ProductMedia)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def touch_product(sender, instance, raw=False, **kwargs):
+    """
+    Bump the product's updated_at when its images or categories change, so
+    its cached cards (keyed by updated_at, see core.fragment_cache) are
+    rendered again.
+    """
+    if not raw:
+        Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_product_cards(sender, raw=False, **kwargs):
+    """Cards show their product's category name; re-render them all after category changes."""
+    from core.fragment_cache import invalidate_product_cards
+    
+    if not raw:
+        transaction.on_commit(invalidate_product_cards)
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductMedia)
+@receiver(post_delete, sender=ProductMedia)
+@receiver(post_save, sender=ProductFabric)
+@receiver(post_delete, sender=ProductFabric)
+@receiver(post_save, sender=ProductSize)
+@receiver(post_delete, sender=ProductSize)
+@receiver(post_save, sender=Fabric)
+@receiver(post_delete, sender=Fabric)
+@receiver(post_save, sender=Color)
+@receiver(post_delete, sender=Color)
+@receiver(post_save, sender=FabricColor)
+@receiver(post_delete, sender=FabricColor)
+@receiver(post_save, sender=Size)
+@receiver(post_delete, sender=Size)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def invalidate_catalog_pages(sender, raw=False, **kwargs):
+    """Serve the cached catalog pages (see core.page_cache) fresh once catalog changes are committed."""
+    from core.page_cache import invalidate_page_cache
+    
+    if not raw:
+        transaction.on_commit(lambda: invalidate_page_cache('catalog'))
@@ -1,3 +1,100 @@
-from django.test import TestCase
+# products/tests.py
+import re
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from carts.models import GuestCart, GuestCartItem
+from core import page_cache
+
+from .models import Currency, Product, ProductView
+
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+# Analytics events are written in the request, not by the background thread
+@override_settings(ANALYTICS_MODE='sync')
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # PAGE_CACHE_ENABLED is read once at import, like the other page cache settings
+        patcher = mock.patch.object(page_cache, 'ENABLED', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        Currency.objects.create(code='INR', name='Indian Rupee', symbol='₹', exchange_rate=1, is_default=True)
+        self.product = Product.objects.create(name='Black Abaya', slug='black-abaya', sku='BA-1', price=Decimal('2500'))
+        self.url = reverse('product_detail', args=[self.product.slug])
+
+    def get(self, client, url=None):
+        response = client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def is_hit(self, response):
+        return getattr(response.wsgi_request, 'page_cache_hit', False)
+
+    def test_anonymous_page_is_cached(self):
+        client = Client()
+        first = self.get(client)
+        second = self.get(client)
+        
+        self.assertFalse(self.is_hit(first))
+        self.assertTrue(self.is_hit(second))
+        self.assertContains(second, 'Black Abaya')
+
+    def test_cached_page_gets_visitors_csrf_token(self):
+        self.get(Client())
+        
+        client = Client(enforce_csrf_checks=True)
+        response = self.get(client)
+        self.assertTrue(self.is_hit(response))
+        self.assertNotContains(response, page_cache.CSRF_PLACEHOLDER)
+        
+        token = CSRF_INPUT.search(response.content).group(1).decode()
+        response = client.post(reverse('change_currency'), {
+            'currency_code': 'INR', 'next': '/', 'csrfmiddlewaretoken': token,
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_logged_in_user_bypasses_cache(self):
+        client = Client()
+        client.force_login(get_user_model().objects.create_user(email='customer@example.com', password='secret'))
+        self.get(client)
+        
+        self.assertFalse(self.is_hit(self.get(client)))
+
+    def test_guest_with_cart_bypasses_cache(self):
+        client = Client()
+        self.get(client)
+        session = client.session
+        session.save()
+        cart = GuestCart.objects.create(session_key=session.session_key)
+        with self.captureOnCommitCallbacks(execute=True):
+            GuestCartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        
+        self.assertFalse(self.is_hit(self.get(client)))
+
+    def test_catalog_change_invalidates_page(self):
+        client = Client()
+        self.get(client)
+        
+        self.product.name = 'Navy Abaya'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        
+        response = self.get(client)
+        self.assertFalse(self.is_hit(response))
+        self.assertContains(response, 'Navy Abaya')
+        self.assertTrue(self.is_hit(self.get(client)))
+
+    def test_product_view_is_recorded_on_hit(self):
+        client = Client()
+        self.get(client)
+        self.assertTrue(self.is_hit(self.get(client)))
+        
+        self.assertEqual(ProductView.objects.filter(product=self.product).count(), 2)
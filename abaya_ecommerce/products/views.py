@@ -1,11 +1,11 @@
 # products/views.py
 import uuid
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q, Avg, Count
 from django.utils import timezone
 
 from .models import (
@@ -14,6 +14,11 @@ from .models import (
     FabricColor, ProductFabric, ProductSize
 )
 from .forms import ReviewForm, ProductFilterForm, ProductVariantForm
+from .facets import facet_index, get_selected_ids
+from .search import get_search_backend, preserve_order, search_products
+from .search.base import MAX_RESULTS
+from core.analytics import record_event
+from core.page_cache import cache_anonymous_page, replay_on_hit
 
 def get_client_ip(request):
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -24,30 +29,51 @@ def get_client_ip(request):
     return ip
 
 def get_session_id(request):
+    # Pages served from the page cache don't start a session just to log a view
+    if getattr(request, 'page_cache_hit', False):
+        return request.session.session_key or ''
     if not request.session.session_key:
         request.session.save()
     return request.session.session_key
 
+def record_product_view(request, product_id):
+    """Log a product view (written in batches by core.analytics)."""
+    record_event(ProductView(
+        product_id=product_id,
+        user=request.user if request.user.is_authenticated else None,
+        session_id=get_session_id(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        ip_address=get_client_ip(request),
+        device_type=request.META.get('HTTP_USER_AGENT', '').lower()
+    ))
+
+def record_search_query(request, query, results_count):
+    """Log a search query (written in batches by core.analytics)."""
+    record_event(SearchQuery(
+        query=query,
+        user=request.user if request.user.is_authenticated else None,
+        session_id=get_session_id(request),
+        results_count=results_count
+    ))
+
+def load_page_products(page):
+    """Replace the product ids of a page with the products, in the same order and with their default images."""
+    products = Product.objects.with_default_image().in_bulk(page.object_list)
+    page.object_list = [products[pk] for pk in page.object_list if pk in products]
+
 def home(request):
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:8]
-    new_arrivals = Product.objects.filter(is_active=True).order_by('-created_at')[:8]
+    featured_products = Product.objects.filter(is_active=True, is_featured=True).with_default_image()[:8]
+    new_arrivals = Product.objects.filter(is_active=True).order_by('-created_at').with_default_image()[:8]
     top_categories = Category.objects.filter(is_active=True)[:6]
     
-    # Add default images to products
-    for product in featured_products:
-        product.default_image = product.get_default_image()
-    
-    for product in new_arrivals:
-        product.default_image = product.get_default_image()
-    
     return render(request, 'products/home.html', {
         'featured_products': featured_products,
         'new_arrivals': new_arrivals,
         'top_categories': top_categories,
     })
 
+@cache_anonymous_page
 def product_list(request):
-    products = Product.objects.filter(is_active=True)
     categories = Category.objects.filter(is_active=True)
     sizes = Size.objects.filter(is_active=True)
     fabrics = Fabric.objects.filter(is_active=True)
@@ -55,75 +81,50 @@ def product_list(request):
     
     # Filtering
     form = ProductFilterForm(request.GET)
+    category_id = min_price = max_price = sort_option = None
     if form.is_valid():
         # Category filter
         category_id = form.cleaned_data.get('category')
         if category_id:
-            category = get_object_or_404(Category, id=category_id)
-            products = category.get_all_products()
+            get_object_or_404(Category, id=category_id)
         
         # Price range filter
-        min_price = form.cleaned_data.get('min_price')
-        max_price = form.cleaned_data.get('max_price')
-        if min_price:
-            products = products.filter(price__gte=min_price)
-        if max_price:
-            products = products.filter(price__lte=max_price)
-        
-        # Size filter
-        size = form.cleaned_data.get('size')
-        if size:
-            products = products.filter(sizes=size)
-        
-        # Fabric filter
-        fabric = form.cleaned_data.get('fabric')
-        if fabric:
-            products = products.filter(fabrics=fabric)
-        
-        # Color filter
-        color = form.cleaned_data.get('color')
-        if color:
-            # Get products that have this color available via their fabrics
-            fabric_ids = FabricColor.objects.filter(color=color).values_list('fabric_id', flat=True)
-            products = products.filter(product_fabrics__fabric_id__in=fabric_ids).distinct()
+        min_price = form.cleaned_data.get('min_price') or None
+        max_price = form.cleaned_data.get('max_price') or None
         
         # Sort options
         sort_option = request.GET.get('sort') or form.cleaned_data.get('sort')
-        if sort_option == 'price_low':
-            products = products.order_by('price')
-        elif sort_option == 'price_high':
-            products = products.order_by('-price')
-        elif sort_option == 'newest':
-            products = products.order_by('-created_at')
-        elif sort_option == 'rating':
-            products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-        elif sort_option == 'popularity':
-            products = products.annotate(view_count=Count('views')).order_by('-view_count')
     
     # Search
     query = request.GET.get('q')
-    if query:
-        products = products.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(sku__icontains=query) |
-            Q(categories__name__icontains=query)
-        ).distinct()
-        
-        # Log search query
-        SearchQuery.objects.create(
-            query=query,
-            user=request.user if request.user.is_authenticated else None,
-            session_id=get_session_id(request),
-            results_count=products.count()
-        )
-    
-    # IMPORTANT: Add default images to all products AFTER all filtering and sorting
-    for product in products:
-        product.default_image = product.get_default_image()
+    search_ids = get_search_backend().search(query) if query else None
+    
+    # Rank search results by relevance unless the user picked a sort order
+    if search_ids and not request.GET.get('sort'):
+        sort_option = 'relevance'
+    
+    # Size, fabric and color filters (several values allowed per facet),
+    # resolved and sorted together with the facet counts for the sidebar
+    selected_sizes = get_selected_ids(request, 'size')
+    selected_fabrics = get_selected_ids(request, 'fabric')
+    selected_colors = get_selected_ids(request, 'color')
+    facets = facet_index.search(
+        category=category_id,
+        sizes=selected_sizes,
+        fabrics=selected_fabrics,
+        colors=selected_colors,
+        min_price=min_price,
+        max_price=max_price,
+        product_ids=search_ids,
+        sort=sort_option,
+    )
     
-    # Pagination
-    paginator = Paginator(products, 12)  # Show 12 products per page
+    sizes = facets.label_choices('size', sizes, selected_sizes)
+    fabrics = facets.label_choices('fabric', fabrics, selected_fabrics)
+    colors = facets.label_choices('color', colors, selected_colors)
+    
+    # Pagination over the matching ids; only the current page's products are loaded
+    paginator = Paginator(facets.product_ids, 12)  # Show 12 products per page
     page = request.GET.get('page')
     try:
         products = paginator.page(page)
@@ -131,6 +132,11 @@ def product_list(request):
         products = paginator.page(1)
     except EmptyPage:
         products = paginator.page(paginator.num_pages)
+    load_page_products(products)
+    
+    # Log search query, reusing the paginator's count (also when the page is served from the cache)
+    if query:
+        replay_on_hit(request, record_search_query, query, paginator.count)
     
     # Get any query parameters for passing to pagination links
     query_params = request.GET.copy()
@@ -145,143 +151,19 @@ def product_list(request):
         'colors': colors,
         'form': form,
         'query': query,
+        # Searches return the MAX_RESULTS best matches only
+        'results_capped': search_ids is not None and len(search_ids) >= MAX_RESULTS,
         'query_params': query_params.urlencode(),
         'current_sorting': request.GET.get('sort', '')
     })
 
-<<<<<<< HEAD
-=======
-# def product_detail(request, slug):
-#     product = get_object_or_404(Product, slug=slug, is_active=True)
-#     related_products = Product.objects.filter(
-#         categories__in=product.categories.all()
-#     ).exclude(id=product.id).distinct()[:4]
-    
-#     # Get all attributes and their values for this product
-#     product_attributes = product.attributes.all().select_related('attribute', 'attribute_value')
-#     product.get_default_image = product.media.filter(is_default=True).first()
-#     # Group attributes by attribute name
-#     grouped_attributes = {}
-#     for pa in product_attributes:
-#         attr_name = pa.attribute.name
-#         if attr_name not in grouped_attributes:
-#             grouped_attributes[attr_name] = []
-#         grouped_attributes[attr_name].append(pa.attribute_value)
-    
-#     # Get reviews
-#     reviews = product.reviews.filter(is_published=True).select_related('user').prefetch_related('images')
-    
-#     # Get review statistics
-#     review_stats = {
-#         'avg_rating': reviews.aggregate(Avg('rating'))['rating__avg'] or 0,
-#         'count': reviews.count(),
-#         'rating_5': reviews.filter(rating=5).count(),
-#         'rating_4': reviews.filter(rating=4).count(),
-#         'rating_3': reviews.filter(rating=3).count(),
-#         'rating_2': reviews.filter(rating=2).count(),
-#         'rating_1': reviews.filter(rating=1).count(),
-#     }
-    
-#     # Log product view
-#     ProductView.objects.create(
-#         product=product,
-#         user=request.user if request.user.is_authenticated else None,
-#         session_id=get_session_id(request),
-#         user_agent=request.META.get('HTTP_USER_AGENT', ''),
-#         ip_address=get_client_ip(request),
-#         device_type=request.META.get('HTTP_USER_AGENT', '').lower()
-#     )
-    
-#     # Review form
-#     form = ReviewForm()
-    
-#     return render(request, 'products/product_detail.html', {
-#         'product': product,
-#         'related_products': related_products,
-#         'grouped_attributes': grouped_attributes,
-#         'reviews': reviews,
-#         'review_stats': review_stats,
-#         'form': form,
-#     })
-
-# def product_detail(request, slug):
-#     product = get_object_or_404(Product, slug=slug, is_active=True)
-    
-#     related_products = Product.objects.filter(
-#         categories__in=product.categories.all()
-#     ).exclude(id=product.id).distinct()[:4]
-    
-#     # Process related products to add default images
-#     for related_product in related_products:
-#         related_product.default_image = related_product.get_default_image()
-    
-#     # Get all attributes and their values for this product
-#     product_attributes = product.attributes.all().select_related('attribute', 'attribute_value')
-    
-#     # Set the default image properly using the model's method
-#     product.default_image = product.get_default_image()
-    
-#     # Get all product images for gallery
-#     product.all_images = product.media.filter(type='IMAGE').order_by('sort_order')
-    
-#     # Group attributes by attribute name
-#     grouped_attributes = {}
-#     for pa in product_attributes:
-#         attr_name = pa.attribute.name
-#         if attr_name not in grouped_attributes:
-#             grouped_attributes[attr_name] = []
-#         grouped_attributes[attr_name].append(pa.attribute_value)
-    
-#     # Get reviews
-#     reviews = product.reviews.filter(is_published=True).select_related('user').prefetch_related('images')
-    
-#     # Get review statistics
-#     review_stats = {
-#         'avg_rating': reviews.aggregate(Avg('rating'))['rating__avg'] or 0,
-#         'count': reviews.count(),
-#         'rating_5': reviews.filter(rating=5).count(),
-#         'rating_4': reviews.filter(rating=4).count(),
-#         'rating_3': reviews.filter(rating=3).count(),
-#         'rating_2': reviews.filter(rating=2).count(),
-#         'rating_1': reviews.filter(rating=1).count(),
-#     }
-    
-#     # Log product view
-#     ProductView.objects.create(
-#         product=product,
-#         user=request.user if request.user.is_authenticated else None,
-#         session_id=get_session_id(request),
-#         user_agent=request.META.get('HTTP_USER_AGENT', ''),
-#         ip_address=get_client_ip(request),
-#         device_type=request.META.get('HTTP_USER_AGENT', '').lower()
-#     )
-    
-#     # Review form
-#     form = ReviewForm()
-    
-#     return render(request, 'products/product_detail.html', {
-#         'product': product,
-#         'related_products': related_products,
-#         'grouped_attributes': grouped_attributes,
-#         'reviews': reviews,
-#         'review_stats': review_stats,
-#         'form': form,
-#     })
-
->>>>>>> e1c1ea02af98e92313d7ae50b4b89a0278a88dc3
+@cache_anonymous_page
 def product_detail(request, slug):
     product = get_object_or_404(Product, slug=slug, is_active=True)
     
     related_products = Product.objects.filter(
         categories__in=product.categories.all()
-    ).exclude(id=product.id).distinct()[:4]
-    
-    # Process related products to add default images
-    for related_product in related_products:
-        related_product.default_image = related_product.get_default_image()
-    
-    # Set the default image properly using the model's method
-    product.default_image = product.get_default_image()
+    ).exclude(id=product.id).distinct().with_default_image()[:4]
     
     # Get all product media (both images and videos)
     product.all_media = product.media.all().order_by('sort_order')
@@ -309,26 +191,11 @@ def product_detail(request, slug):
     # Get reviews
     reviews = product.reviews.filter(is_published=True).select_related('user').prefetch_related('images')
     
-    # Get review statistics
-    review_stats = {
-        'avg_rating': reviews.aggregate(Avg('rating'))['rating__avg'] or 0,
-        'count': reviews.count(),
-        'rating_5': reviews.filter(rating=5).count(),
-        'rating_4': reviews.filter(rating=4).count(),
-        'rating_3': reviews.filter(rating=3).count(),
-        'rating_2': reviews.filter(rating=2).count(),
-        'rating_1': reviews.filter(rating=1).count(),
-    }
-    
-    # Log product view
-    ProductView.objects.create(
-        product=product,
-        user=request.user if request.user.is_authenticated else None,
-        session_id=get_session_id(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        ip_address=get_client_ip(request),
-        device_type=request.META.get('HTTP_USER_AGENT', '').lower()
-    )
+    # Get review statistics (stored on the product)
+    review_stats = product.get_rating_stats()
+    
+    # Log product view, also when the page is served from the cache
+    replay_on_hit(request, record_product_view, product.pk)
     
     # Review form
     form = ReviewForm()
@@ -377,52 +244,35 @@ def get_colors_for_fabric(request, fabric_id):
             'error': str(e)
         }, status=400)
 
+@cache_anonymous_page
 def category_detail(request, slug):
     category = get_object_or_404(Category, slug=slug, is_active=True)
-    products_list = category.get_all_products()
-    
-    # Set default image for each product
-    for product in products_list:
-        product.default_image = product.get_default_image()
     
     # Filtering
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
     sort = request.GET.get('sort')
-    size_id = request.GET.get('size')
-    fabric_id = request.GET.get('fabric')
-    color_id = request.GET.get('color')
-    
-    if min_price:
-        products_list = products_list.filter(price__gte=min_price)
-    
-    if max_price:
-        products_list = products_list.filter(price__lte=max_price)
-    
-    if size_id:
-        products_list = products_list.filter(sizes__id=size_id)
-    
-    if fabric_id:
-        products_list = products_list.filter(fabrics__id=fabric_id)
-    
-    if color_id:
-        # Get products that have this color available via their fabrics
-        fabric_ids = FabricColor.objects.filter(color_id=color_id).values_list('fabric_id', flat=True)
-        products_list = products_list.filter(product_fabrics__fabric_id__in=fabric_ids).distinct()
-    
-    # Sorting
-    if sort:
-        if sort == 'price_low':
-            products_list = products_list.order_by('price')
-        elif sort == 'price_high':
-            products_list = products_list.order_by('-price')
-        elif sort == 'newest':
-            products_list = products_list.order_by('-created_at')
-        elif sort == 'popularity':
-            products_list = products_list.annotate(view_count=Count('views')).order_by('-view_count')
+    min_price = max_price = None
+    try:
+        if request.GET.get('min_price'):
+            min_price = Decimal(request.GET['min_price'])
+        if request.GET.get('max_price'):
+            max_price = Decimal(request.GET['max_price'])
+    except InvalidOperation:
+        pass
+    
+    # Size, fabric and color filters and the sort order, resolved by the facet index
+    facets = facet_index.search(
+        category=category.id,
+        sizes=get_selected_ids(request, 'size'),
+        fabrics=get_selected_ids(request, 'fabric'),
+        colors=get_selected_ids(request, 'color'),
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort,
+        with_counts=False,
+    )
     
-    # Pagination
-    paginator = Paginator(products_list, 12)  # Show 12 products per page
+    # Pagination over the matching ids; only the current page's products are loaded
+    paginator = Paginator(facets.product_ids, 12)  # Show 12 products per page
     page = request.GET.get('page')
     
     try:
@@ -431,6 +281,7 @@ def category_detail(request, slug):
         products = paginator.page(1)
     except EmptyPage:
         products = paginator.page(paginator.num_pages)
+    load_page_products(products)
     
     # Get all categories for sidebar
     categories = Category.objects.filter(is_active=True)
@@ -448,9 +299,9 @@ def category_detail(request, slug):
         'fabrics': fabrics,
         'colors': colors,
         'all_products_count': Product.objects.filter(is_active=True).count(),
-        'selected_size': size_id,
-        'selected_fabric': fabric_id,
-        'selected_color': color_id,
+        'selected_size': request.GET.get('size'),
+        'selected_fabric': request.GET.get('fabric'),
+        'selected_color': request.GET.get('color'),
     })
 
 @login_required
@@ -495,25 +346,8 @@ def search(request):
     query = request.GET.get('q', '')
     
     if query:
-        # Search for products that match the query in name, description, or SKU
-        products = Product.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query) |
-            Q(sku__icontains=query) |
-            Q(categories__name__icontains=query)
-        ).filter(is_active=True).distinct()
-        
-        # Add default images to search results
-        for product in products:
-            product.default_image = product.get_default_image()
-        
-        # Log search query
-        SearchQuery.objects.create(
-            query=query,
-            user=request.user if request.user.is_authenticated else None,
-            session_id=get_session_id(request),
-            results_count=products.count()
-        )
+        # Search for products that match the query in name, SKU, categories or description
+        products = search_products(Product.objects.filter(is_active=True), query).with_default_image()
     else:
         products = Product.objects.none()
     
@@ -527,10 +361,16 @@ def search(request):
     except EmptyPage:
         products = paginator.page(paginator.num_pages)
     
+    # Log search query, reusing the paginator's count
+    if query:
+        record_search_query(request, query, paginator.count)
+    
     return render(request, 'products/search_results.html', {
         'products': products,
         'query': query,
         'count': paginator.count,
+        # Searches return the MAX_RESULTS best matches only
+        'results_capped': paginator.count >= MAX_RESULTS,
     })
 
 # API Endpoints
@@ -539,10 +379,11 @@ def product_search_api(request):
     if not query or len(query) < 2:
         return JsonResponse({'results': []})
     
-    products = Product.objects.filter(
-        Q(name__icontains=query) | 
-        Q(sku__icontains=query)
-    ).values('id', 'name', 'slug', 'price')[:10]
+    # Prefix match on name and SKU from the search index
+    product_ids = get_search_backend().autocomplete(query, limit=10)
+    products = preserve_order(
+        Product.objects.filter(pk__in=product_ids, is_active=True), product_ids
+    ).values('id', 'name', 'slug', 'price')
     
     return JsonResponse({'results': list(products)})
 
@@ -12,14 +12,12 @@ from django.utils import timezone
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.urls import reverse
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.db import transaction
 
 from orders.models import Order
 from carts.models import Wishlist
+from core.outbox import queue_email
 
 from .models import User, Address, NotificationPreference, Session
 from .forms import (
@@ -384,39 +382,37 @@ def end_all_sessions(request):
 def send_verification_email(request, user):
     current_site = get_current_site(request)
     subject = 'Verify Your Email Address'
-    message = render_to_string('users/emails/email_verification.html', {
-        'user': user,
-        'protocol': 'https' if request.is_secure() else 'http',
-        'domain': current_site.domain,
-        'token': user.email_verification_token,
-    })
     
-    send_mail(
+    queue_email(
+        user.email,
         subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-        html_message=message
+        html_template='users/emails/email_verification.html',
+        text_template='users/emails/email_verification.html',
+        context={
+            'user': user,
+            'protocol': 'https' if request.is_secure() else 'http',
+            'domain': current_site.domain,
+            'token': user.email_verification_token,
+        },
+        user=user
     )
 
 def send_password_reset_email(request, user):
     current_site = get_current_site(request)
     subject = 'Reset Your Password'
-    message = render_to_string('users/emails/password_reset.html', {
-        'user': user,
-        'protocol': 'https' if request.is_secure() else 'http',
-        'domain': current_site.domain,
-        'token': user.password_reset_token,
-    })
     
-    send_mail(
+    queue_email(
+        user.email,
         subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-        html_message=message
+        html_template='users/emails/password_reset.html',
+        text_template='users/emails/password_reset.html',
+        context={
+            'user': user,
+            'protocol': 'https' if request.is_secure() else 'http',
+            'domain': current_site.domain,
+            'token': user.password_reset_token,
+        },
+        user=user
     )
 
 def get_client_ip(request):